@@ -0,0 +1,501 @@
+"""
+OSCAR - Input Pipeline Benchmark
+Times the preparation of parameters and drivers (loading, regional aggregation, historical drivers)
+on a synthetic input_data tree, so the I/O path can be measured without the real data library.
+
+Main Logic:
+    1. Tree: A minimal input_data folder is fabricated: region dictionaries, primary emissions, land-use
+       and RF drivers datasets, and parameter files, with the names, dimensions and quirks each loader expects
+       (sectors, fuels, scenarios, models, non-yearly data, dataset-specific regions).
+    2. Values: Split from the bootstrap data over countries (or dataset regions), so that aggregated drivers
+       have realistic magnitudes; parameter files hold bootstrap configurations as their model options.
+    3. Isolation: Each stage runs in a fresh interpreter pointed at the tree (OSCAR_DATA_DIR), so that
+       in-process caches start cold and user settings are untouched; the best of several repeats is kept.
+    4. Stages: load_all_param (raw and compiled store), each primary loader, load_all_hist, load_all_scen,
+       aggreg_region (cold and warm mapping) and create_hist_drivers.
+    5. Report: Same format as the benchmark suite (compare with python -m oscar._bench.suite compare).
+
+Usage:
+    python -m oscar._bench.pipeline run [--n-iso 40] [--n-reg 5] [--out pipeline.json]
+    python -m oscar._bench.pipeline make DIR [--n-iso 40] [--n-reg 5]
+"""
+import os
+import sys
+import csv
+import json
+import time
+import shutil
+import tempfile
+import subprocess
+from pathlib import Path
+
+import numpy as np
+
+# Name of the synthetic regional aggregation (column of the region dictionaries)
+MOD_REGION = 'Synthetic'
+
+# Sizes of the tree: countries (ISO codes), model regions (besides 'Unknown'), options per parameter file
+TREE_SIZES = {'n_iso': 40, 'n_reg': 5, 'n_models': 4}
+
+# Starting, preindustrial and ending years of the historical drivers
+INDS = (1750, 1750, 2014)
+
+# Halogenated species: those taken from Meinshausen_2011 and those offset in scenarios
+SPC_HALO = ['CFC-11', 'CFC-12', 'CFC-113', 'CFC-114', 'CFC-115', 'CCl4', 'CH3CCl3', 'HCFC-22',
+            'Halon-1211', 'Halon-1202', 'Halon-1301', 'Halon-2402', 'CH3Br', 'CH3Cl', 'CF4', 'C2F6', 'HFC-23']
+
+# Emitted species: (bootstrap driver, units)
+EMISSIONS = {'E_CO2': ('Eff', 'PgC yr-1'), 'E_CH4': ('E_CH4', 'TgC yr-1'),
+             'E_SO2': ('E_SO2', 'TgS yr-1'), 'E_BC': ('E_BC', 'Tg yr-1')}
+
+# Primary datasets: years (first, last, step), region axis ('reg_iso' or 'region'), and extra dimensions
+# (dimensions over which bootstrap values are split are marked by a leading '+')
+HIST_EMISSIONS = {
+    'ACCMIP': ((1850, 2000, 10), 'reg_iso', {'scen': ['historical', 'RCP2.6'], '+sector': ['ene', 'ind', 'agr', 'for', 'gra']}),
+    'CDIAC': ((1751, 2014, 1), 'reg_iso', {'data': ['national', 'territorial'], '+fuel': ['solid', 'liquid', 'gas']}),
+    'CEDS': ((1750, 2014, 1), 'reg_iso', {'+sector': ['1A_Energy', '2_Industrial', '3B_Manure-management', '5C_Waste-combustion']}),
+    'EDGAR-HYDEv13': ((1890, 1990, 10), 'reg_iso', {'+sector': ['ene', 'ind', 'agr', 'def']}),
+    'EDGAR-HYDEv14': ((1890, 2000, 10), 'reg_iso', {'+sector': ['ENE', 'IND', 'AGL', 'DEF']}),
+    'EDGARv42': ((1970, 2008, 1), 'reg_iso', {'+sector': ['1A1', '2A', '4A', '5A']}),
+    'EDGARv42-FT2010': ((1970, 2010, 1), 'reg_iso', {'+sector': ['1A1', '2A', '5A']}),
+    'EDGARv432': ((1970, 2012, 1), 'reg_iso', {'+sector': ['1A1', '2A', '4A']}),
+    'EDGARv432-FT2016': ((1970, 2016, 1), 'reg_iso', {'+sector': ['1A1', '2A']}),
+    'EPA': ((1990, 2030, 5), 'reg_iso', {'+sector': ['ene1', 'ind1', 'agr1', 'agr5']}),
+    'Meinshausen_2011': ((1765, 2500, 5), None, {'scen': ['historical', 'RCP2.6', 'RCP4.5', 'RCP6.0', 'RCP8.5']}),
+    'PRIMAP': ((1850, 2015, 1), 'reg_iso', {'+sector': ['1', '2', '4', '5']}),
+}
+# (Meinshausen_2011 is one file, loaded by both the historical and scenario loaders)
+SCEN_EMISSIONS = {
+    'RCPdb': ((2000, 2500, 10), 'region', {'scen': ['RCP2.6', 'RCP4.5', 'RCP6.0', 'RCP8.5'], '+sector': ['ene', 'ind', 'for', 'gra']}),
+    'SRES': ((1990, 2100, 10), 'region', {'scen': ['A1B', 'A2', 'B1', 'B2'], 'model': ['AIM', 'IMAGE', 'MESSAGE']}),
+    'ScenarioMIP': ((2015, 2100, 5), 'region', {'scen': ['SSP1-2.6', 'SSP2-4.5', 'SSP3-7.0', 'SSP5-8.5'],
+                                               '+sector': ['Energy Sector', 'Industrial Sector', 'Forest Burning', 'Peat Burning']}),
+}
+LANDUSE = {
+    'LUH1': ((1700, 2100, 1), 'reg_iso', {'scen': ['historical', 'RCP2.6', 'RCP8.5']}),
+    'LUH1-TRENDYv4': ((1860, 2014, 1), 'reg_iso', {}),
+    'LUH2': ((1700, 2100, 1), 'reg_iso', {'scen': ['historical', 'historical_high', 'historical_low', 'SSP1-2.6', 'SSP2-4.5', 'SSP5-8.5']}),
+    'LUH2-TRENDYv8': ((1700, 2017, 1), 'reg_iso', {}),
+    'Houghton_2017': ((1850, 2015, 1), 'region', {}),
+}
+
+# Parameter files: (name, whether regional, {variable: dimension of model options (None for a mean value)})
+PARAMETERS = [
+    ('from_OSCARv2/ocean_CMIP5', False, {'p_mld': 'mod_Focean_trans', 'g_mld': 'mod_Focean_trans'}),
+    ('land_TRENDYv7', True, {var: 'mod_Fland_preind' for var in ['npp_0', 'igni_0', 'harv_0', 'graz_0', 'mu1_0', 'mu2_0',
+                                                                  'muM_0', 'rho1_0', 'rho2_0', 'p_agb']}),
+    ('from_OSCARv2/land_CMIP5', True, {var: 'mod_Fland_trans' for var in ['b_npp', 'b2_npp', 'CO2_cp', 'g_nppT', 'g_nppP',
+                                                                           'g_respT', 'g_respT2', 'g_respP']}),
+    ('from_OSCARv2/land_Earles_2012', True, {'p_hwp': 'mod_Ehwp_bb'}),
+    ('from_OSCARv2/land_GFED3', True, {'a_bb': None, 'g_igniC': 'mod_Efire_trans', 'g_igniT': 'mod_Efire_trans', 'g_igniP': 'mod_Efire_trans'}),
+    ('from_OSCARv2/wetlands_WETCHIMP', True, {var: 'mod_Ewet' for var in ['ewet_0', 'Awet_0', 'p_wet', 'g_wetC', 'g_wetT', 'g_wetP']}),
+    ('from_OSCARv2/atmosphere_CCMVal2', False, {'g_ageair': 'mod_Tg_ageair'}),
+    ('from_OSCARv2/regions_HTAP', True, {'p_reg_slcf': None}),
+    ('from_OSCARv2/ozochem_ACCMIP', False, {**{var: 'mod_O3t_emis' for var in ['x_O3t_CH4', 'x_O3t_NOX', 'x_O3t_CO', 'x_O3t_VOC']},
+                                            'G_O3t': 'mod_O3t_clim'}),
+    ('from_OSCARv2/aerchem_ACCMIP', False, {**{var: 'mod_SO4_load' for var in ['t_SO2', 't_DMS', 'G_SO4']},
+                                            **{var: 'mod_POA_load' for var in ['t_OMff', 't_OMbb', 'G_POA']},
+                                            **{var: 'mod_BC_load' for var in ['t_BCff', 't_BCbb', 'G_BC']},
+                                            **{var: 'mod_NO3_load' for var in ['t_NH3', 't_NOX', 'G_NO3']},
+                                            **{var: 'mod_SOA_load' for var in ['t_VOC', 't_BVOC', 'G_SOA']},
+                                            't_dust': 'mod_Mdust_load', 'G_dust': 'mod_Mdust_load',
+                                            't_salt': 'mod_Msalt_load', 'G_salt': 'mod_Msalt_load'}),
+    ('from_OSCARv2/regions_Reddy_2007', True, {'p_reg_bcsnow': None}),
+    ('from_OSCARv2/albedo_all', True, {'a_alb': 'mod_Falb_lcc', 'F_rsds': 'mod_Falb_rsds'}),
+    ('from_OSCARv2/temp_CMIP5', True, {'w_clim_Tl': 'mod_Tl_regequil', 'w_clim_To': 'mod_To_regequil',
+                                       **{var: 'mod_Tg_resp' for var in ['lambda_0', 'Th_g', 'Th_d', 'th_0']}}),
+    ('from_OSCARv2/prec_CMIP5', True, {'a_prec': 'mod_Pg_resp', 'b_prec': 'mod_Pg_resp', 'w_clim_Pl': 'mod_Pl_regequil'}),
+]
+
+
+# --- SYNTHETIC INPUT_DATA TREE ---
+
+class _Regions:
+    """Countries and dataset regions of the tree, and the bootstrap region each model region takes its values from."""
+
+    def __init__(self, n_iso, n_reg, n_template):
+        from .synthetic import _index
+        self.n_reg = n_reg
+        self.iso = np.arange(1, n_iso + 1)
+        self.reg_of_iso = 1 + (self.iso - 1) % n_reg
+        self.names = [f"R{k}" for k in range(1, n_reg + 1)]
+
+        # Model regions tiled from the bootstrap ones (values split among copies)
+        idx = _index(np.arange(n_template), n_reg + 1, unknown_first=True)
+        self.template = idx
+        self.weights = 1. / np.bincount(idx)[idx]
+
+    def model_values(self, da):
+        """Values of a bootstrap variable on the model regions (reg_land 0..n_reg)."""
+        import xarray as xr
+        out = da.reset_coords(drop=True).isel(reg_land=self.template).assign_coords(reg_land=np.arange(self.n_reg + 1))
+        return out * xr.DataArray(self.weights, dims='reg_land', coords={'reg_land': out.reg_land})
+
+    def split(self, da, axis):
+        """Splits bootstrap values over countries ('reg_iso') or dataset regions ('region')."""
+        import xarray as xr
+        da = self.model_values(da)
+        if axis == 'region':
+            return da.sel(reg_land=np.arange(1, self.n_reg + 1)).rename(reg_land='region').assign_coords(region=self.names)
+        count = np.bincount(self.reg_of_iso)[self.reg_of_iso]
+        out = da.sel(reg_land=xr.DataArray(self.reg_of_iso, dims='reg_iso')) / xr.DataArray(count, dims='reg_iso')
+        return out.drop_vars('reg_land').assign_coords(reg_iso=self.iso)
+
+    def write(self, regions_dir, mod_region):
+        """Writes the region dictionaries (ISO, dataset-specific) and long names of mod_region."""
+        regions_dir.mkdir(parents=True, exist_ok=True)
+        with open(regions_dir / 'dico_ISO.csv', 'w', newline='') as f:
+            csv.writer(f).writerows([['ISO', mod_region]] + [[iso, reg] for iso, reg in zip(self.iso, self.reg_of_iso)] + [[999, 0]])
+        rows = [[data, name, k + 1] for data in ['RCPdb', 'SRES', 'ScenarioMIP', 'Houghton_2017'] for k, name in enumerate(self.names)]
+        with open(regions_dir / 'dico_other_datasets.csv', 'w', newline='') as f:
+            csv.writer(f).writerows([['dataset', 'region', mod_region]] + rows)
+        with open(regions_dir / 'regions_long_name.csv', 'w', newline='') as f:
+            csv.writer(f).writerows([[mod_region], ['Unknown']] + [[f"Region {k}"] for k in range(1, self.n_reg + 1)])
+
+
+def _on_years(da, years):
+    """Bootstrap series put on other years (held constant beyond its own period)."""
+    if 'year' not in da.dims:
+        return da
+    y = da.year.values
+    return da.sel(year=np.clip(years, y[0], y[-1])).assign_coords(year=years)
+
+
+def _with_dims(da, dims, seed):
+    """Adds the extra dimensions of a dataset; values are split over '+' dimensions, and perturbed along the others."""
+    import xarray as xr
+    rng = np.random.default_rng(seed)
+    for name, labels in dims.items():
+        dim = name.lstrip('+')
+        da = da.expand_dims({dim: labels}, axis=-1)
+        if name.startswith('+'):
+            da = da / len(labels)
+        else:
+            da = da * xr.DataArray(1. + 0.05 * rng.standard_normal(len(labels)), dims=dim, coords={dim: labels})
+    return da
+
+
+def _scen_mask(ds, years, scen):
+    """Restricts historical scenarios to years up to 2014, and the others to later years (as in the primary data)."""
+    import xarray as xr
+    is_hist = xr.DataArray(['historical' in s for s in scen], dims='scen', coords={'scen': scen})
+    in_hist = xr.DataArray(years <= 2014, dims='year', coords={'year': years})
+    keep = (is_hist & in_hist) | (~is_hist & ~in_hist)
+    return ds.where(keep)
+
+
+def _write(ds, path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    ds.to_netcdf(path)
+
+
+def _write_emissions(tree, regions, For_h, specs, scen_mode, seed):
+    """Writes the primary emissions datasets (historical ones or scenarios)."""
+    import xarray as xr
+    for k, (data, ((y0, y1, step), axis, dims)) in enumerate(specs.items()):
+        years = np.arange(y0, y1 + 1, step)
+        ds = xr.Dataset()
+
+        # 1. Halogenated species (global)
+        if data in ['Meinshausen_2011', 'RCPdb']:
+            halo = For_h['E_Xhalo'].reindex(spc_halo=SPC_HALO).fillna(1.)
+            ds['E_Xhalo'] = _with_dims(_on_years(halo, years), {'scen': dims['scen']}, seed + k)
+            ds['E_Xhalo'].attrs['units'] = 'Gg yr-1'
+
+        # 2. Other species (regional)
+        if axis is not None:
+            for var, (base, units) in EMISSIONS.items():
+                name = 'Eff' if (scen_mode and var == 'E_CO2') else var
+                da = regions.split(_on_years(For_h[base], years), axis)
+                ds[name] = _with_dims(da, {d: v for d, v in dims.items() if d != 'model'}, seed + k)
+                ds[name].attrs['units'] = units
+
+        # 3. Dataset quirks: historical part of scenarios, models with markers, sector names
+        if 'scen' in dims and 'historical' in dims['scen']:
+            ds = _scen_mask(ds, years, dims['scen'])
+        if 'model' in dims:
+            ds = ds.expand_dims(model=dims['model'], axis=-1)
+            ds.coords['is_marker'] = (('scen', 'model'), np.eye(len(dims['scen']), len(dims['model']), dtype=bool))
+        if '+sector' in dims:
+            ds.coords['sector_long_name'] = ('sector', [f"{sec} (synthetic)" for sec in dims['+sector']])
+        _write(ds.transpose('year', ...), tree / 'drivers' / f'emissions_{data}.nc')
+
+
+def _write_landuse(tree, regions, For_h, Par, seed):
+    """Writes the primary land-use datasets."""
+    import xarray as xr
+    for k, (data, ((y0, y1, step), axis, dims)) in enumerate(LANDUSE.items()):
+        years = np.arange(y0, y1 + 1, step)
+        d_A = regions.split(_on_years(For_h['d_Acover'], years), axis)
+        ds = xr.Dataset()
+        ds['d_Anet'] = _with_dims(d_A, dims, seed + k)
+        if data == 'Houghton_2017':
+            ds['Epeat'] = 0.01 * ds['d_Anet'].sum(['bio_from', 'bio_to'])
+        else:
+            ds['d_Agross'] = 1.5 * ds['d_Anet']
+        if 'scen' in dims:
+            ds = _scen_mask(ds, years, dims['scen'])
+        for var in ds:
+            ds[var].attrs['units'] = 'PgC yr-1' if var == 'Epeat' else 'Mha yr-1'
+
+        # Preindustrial land cover (its year as attribute)
+        if data != 'Houghton_2017':
+            ds['Aland_0'] = regions.split(Par['Aland_0'], axis)
+            ds['Aland_0'].attrs = {'units': 'Mha', 'year': int(y0)}
+        _write(ds.transpose('year', ...), tree / 'drivers' / f'land-use_{data}.nc')
+
+
+def _write_RFdrivers(tree, For_h):
+    """Writes the primary datasets of RF drivers (natural forcings, contrails)."""
+    import xarray as xr
+    RF = {var: For_h[var] for var in ['RF_volc', 'RF_solar', 'RF_contr']}
+
+    # 1. AR5 forcings (more than the drivers used)
+    years = np.arange(1750, 2011 + 1)
+    ds = xr.Dataset({var: _on_years(RF[var], years) for var in RF})
+    ds['RF_CO2'] = xr.DataArray(np.linspace(0., 1.8, len(years)), dims='year', coords={'year': years})
+    for var in ds:
+        ds[var].attrs['units'] = 'W m-2'
+    _write(ds, tree / 'drivers' / 'radiative-forcing_AR5.nc')
+
+    # 2. Volcanic aerosols optical depth (raw and detrended)
+    years = np.arange(1850, 2014 + 1)
+    aod = -_on_years(RF['RF_volc'], years) / 25.
+    ds = xr.Dataset({'AOD550': xr.concat([aod, aod - aod.mean()], dim='data').assign_coords(data=['raw', 'detrended'])})
+    ds['AOD550'].attrs['units'] = '1'
+    _write(ds.transpose('year', ...), tree / 'drivers' / 'volcanic-activity_CMIP6.nc')
+
+    # 3. Solar irradiance (historical and projection)
+    years = np.arange(1850, 2300 + 1)
+    tsi = 1361. + 4. / 0.7 * _on_years(RF['RF_solar'], years) + 0.5 * np.sin(2 * np.pi * years / 11.)
+    ds = xr.Dataset({'TSI': xr.concat([tsi, tsi], dim='scen').assign_coords(scen=['historical', 'proj_CMIP6'])})
+    ds = _scen_mask(ds, years, ['historical', 'proj_CMIP6'])
+    ds['TSI_0'] = xr.DataArray(1360.8)
+    for var in ds:
+        ds[var].attrs['units'] = 'W m-2'
+    _write(ds.transpose('year', ...), tree / 'drivers' / 'solar-activity_CMIP6.nc')
+
+    # 4. Aviation (an observation dataset)
+    years = np.arange(1940, 2014 + 1)
+    ds = xr.Dataset({'dist_flown': 1e12 * (1. + _on_years(RF['RF_contr'], years) / max(float(RF['RF_contr'].max()), 1e-6))})
+    ds['dist_flown'].attrs['units'] = 'km yr-1'
+    _write(ds, tree / 'observations' / 'aviation_ICAO.nc')
+
+
+def _write_parameters(tree, regions, Par, n_models, mod_region):
+    """Writes the parameter files: bootstrap configurations are their model options, regions are tiled."""
+    import xarray as xr
+    from .synthetic import _tile
+    for name, regional, variables in PARAMETERS:
+        ds = xr.Dataset()
+        for var, mod_dim in variables.items():
+            da = Par[var]
+            if mod_dim is None:
+                da = da.mean('config') if 'config' in da.dims else da
+            elif 'config' in da.dims:
+                da = da.isel(config=np.arange(n_models) % Par.sizes['config']).rename(config=mod_dim)
+            else:
+                da = da.expand_dims({mod_dim: n_models}, axis=-1)
+            if mod_dim is not None:
+                da = da.assign_coords({mod_dim: [f"model{k}" for k in range(n_models)]})
+            ds[var] = da
+            ds[var].attrs = Par[var].attrs
+        if 'reg_land' in ds.dims:
+            ds = _tile(ds, 'reg_land', (regions.template, np.arange(regions.n_reg + 1)), regions.weights)
+        ds = ds.drop_vars([c for c in ds.coords if c not in ds.dims])
+        _write(ds, tree / 'parameters' / (f"{name}__{mod_region}.nc" if regional else f"{name}.nc"))
+
+
+def make_input_tree(root, n_iso=None, n_reg=None, n_models=None, mod_region=MOD_REGION, seed=0):
+    """
+    Fabricates a synthetic input_data tree under root (root/input_data), usable as data directory.
+
+    Args:
+        root (str or Path): Data directory of the tree (root/input_data is created).
+        n_iso (int): Number of countries of the primary datasets.
+        n_reg (int): Number of regions of mod_region (besides region 0, 'Unknown'); at least that of the bootstrap data (5).
+        n_models (int): Number of model options in each parameter file.
+        mod_region (str): Name of the regional aggregation of the region dictionaries and parameter files.
+        seed (int): Seed of the perturbations among datasets.
+    None keeps the sizes of TREE_SIZES.
+    Returns:
+        Path: The input_data folder.
+    """
+    import xarray as xr
+    from .._io.paths import get_bootstrap_dir
+
+    n_iso = n_iso or TREE_SIZES['n_iso']
+    n_reg = n_reg or TREE_SIZES['n_reg']
+    n_models = n_models or TREE_SIZES['n_models']
+    tree = Path(root) / 'input_data'
+
+    # 1. Templates
+    b_dir = get_bootstrap_dir()
+    with xr.open_dataset(b_dir / "forcing_hist_standard.nc") as TMP:
+        For_h = TMP.load()
+    with xr.open_dataset(b_dir / "parameters_mc_standard.nc") as TMP:
+        Par = TMP.load()
+    regions = _Regions(n_iso, n_reg, Par.sizes['reg_land'])
+
+    # 2. Region dictionaries, drivers and parameters
+    regions.write(tree / 'regions', mod_region)
+    _write_emissions(tree, regions, For_h, HIST_EMISSIONS, False, seed)
+    _write_emissions(tree, regions, For_h, SCEN_EMISSIONS, True, seed + 100)
+    _write_landuse(tree, regions, For_h, Par, seed + 200)
+    _write_RFdrivers(tree, For_h)
+    _write_parameters(tree, regions, Par, n_models, mod_region)
+    return tree
+
+
+# --- STAGES ---
+
+def _stages(mod_region):
+    """Stages of the pipeline: name -> (untimed preparation or None, timed call on its result)."""
+    import xarray as xr
+    from .._io.paths import get_in_dir
+    from .._core import fct_loadP, fct_loadD, fct_genD, fct_misc
+
+    def raw_CEDS():
+        with xr.open_dataset(get_in_dir() / 'drivers' / 'emissions_CEDS.nc') as TMP:
+            return TMP.load().sum('sector', min_count=1)
+
+    def warm_CEDS():
+        ds = raw_CEDS()
+        fct_misc.aggreg_region(ds, mod_region)
+        return ds
+
+    return {
+        'load_all_param': (None, lambda _: fct_loadP.load_all_param(mod_region, use_store=False)),
+        'load_all_param_store': (lambda: fct_loadP.load_all_param(mod_region), lambda _: fct_loadP.load_all_param(mod_region).load()),
+        'load_emissions_hist': (None, lambda _: fct_loadD.load_emissions_hist(mod_region)),
+        'load_landuse_hist': (None, lambda _: fct_loadD.load_landuse_hist(mod_region)),
+        'load_RFdrivers_hist': (None, lambda _: fct_loadD.load_RFdrivers_hist()),
+        'load_all_hist': (None, lambda _: fct_loadD.load_all_hist(mod_region)),
+        'load_emissions_scen': (None, lambda _: fct_loadD.load_emissions_scen(mod_region)),
+        'load_landuse_scen': (None, lambda _: fct_loadD.load_landuse_scen(mod_region)),
+        'load_RFdrivers_scen': (None, lambda _: fct_loadD.load_RFdrivers_scen()),
+        'load_all_scen': (None, lambda _: fct_loadD.load_all_scen(mod_region)),
+        'aggreg_region': (raw_CEDS, lambda ds: fct_misc.aggreg_region(ds, mod_region)),
+        'aggreg_region_warm': (warm_CEDS, lambda ds: fct_misc.aggreg_region(ds, mod_region)),
+        'create_hist_drivers': (lambda: fct_loadD.load_all_hist(mod_region), lambda For: fct_genD.create_hist_drivers(For, INDS)),
+    }
+
+STAGES = ['load_all_param', 'load_all_param_store',
+          'load_emissions_hist', 'load_landuse_hist', 'load_RFdrivers_hist', 'load_all_hist',
+          'load_emissions_scen', 'load_landuse_scen', 'load_RFdrivers_scen', 'load_all_scen',
+          'aggreg_region', 'aggreg_region_warm', 'create_hist_drivers']
+
+
+def _child(case_json):
+    """Runs one stage in this (fresh) process and prints its wall time and peak RSS as JSON."""
+    import warnings
+    import contextlib
+    from .suite import _peak_rss_mb
+
+    case = json.loads(case_json)
+    prepare, timed = _stages(case['mod_region'])[case['stage']]
+
+    with contextlib.redirect_stdout(sys.stderr), warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        arg = prepare() if prepare is not None else None
+        t0 = time.perf_counter()
+        timed(arg)
+        dt = time.perf_counter() - t0
+
+    print(json.dumps({'time': dt, 'rss_mb': _peak_rss_mb()}))
+
+
+def run_stage(stage, data_dir, mod_region=MOD_REGION, repeat=3):
+    """
+    Runs one stage in fresh interpreters pointed at data_dir, and returns its best wall time and largest peak RSS.
+    """
+    from .._io.paths import DATA_DIR_ENV
+    case = {'stage': stage, 'mod_region': mod_region}
+    env = {**os.environ, DATA_DIR_ENV: str(data_dir)}
+
+    times, rss = [], []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", f"from oscar._bench.pipeline import _child; _child({json.dumps(json.dumps(case))})"],
+                             capture_output=True, text=True, env=env)
+        if out.returncode != 0:
+            return {'case': stage, 'kind': 'pipeline', 'error': out.stderr.strip().splitlines()[-1:]}
+        res = json.loads(out.stdout.strip().splitlines()[-1])
+        times.append(res['time'])
+        rss.append(res['rss_mb'])
+    return {'case': stage, 'kind': 'pipeline', 'time': min(times), 'times': times,
+            'rss_mb': max(rss) if None not in rss else None}
+
+
+def run_pipeline(data_dir=None, n_iso=None, n_reg=None, repeat=3, out=None, select=None):
+    """
+    Times the stages of the input pipeline and returns the report (saved as JSON if out is given).
+
+    Args:
+        data_dir (str or Path): Data directory holding a synthetic tree (made in a temporary folder if None).
+        n_iso (int): Number of countries of the tree (if made here).
+        n_reg (int): Number of regions of the synthetic aggregation (if made here).
+        repeat (int): Runs per stage (best time and largest peak RSS are kept).
+        out (str or Path): JSON file of the report.
+        select (str): Only run stages whose name contains this string.
+    """
+    from .suite import _metadata
+
+    # 1. Tree (temporary unless given)
+    tmp_dir = None
+    if data_dir is None:
+        tmp_dir = data_dir = tempfile.mkdtemp(prefix="oscar_pipeline_")
+        t0 = time.perf_counter()
+        make_input_tree(data_dir, n_iso=n_iso, n_reg=n_reg)
+        print(f"[OSCAR] Synthetic input_data made in {time.perf_counter() - t0:.1f} s: {data_dir}")
+
+    # 2. Stages
+    sizes = {'n_iso': n_iso or TREE_SIZES['n_iso'], 'n_reg': n_reg or TREE_SIZES['n_reg']} if tmp_dir else {'data_dir': str(data_dir)}
+    report = {'meta': {**_metadata(), 'preset': 'pipeline', 'repeat': repeat, **sizes}, 'results': []}
+    try:
+        print(f"{'STAGE':<24} {'TIME [s]':>9} {'RSS [MB]':>9}")
+        for stage in [s for s in STAGES if select is None or select in s]:
+            res = run_stage(stage, data_dir, repeat=repeat)
+            report['results'].append(res)
+            if 'error' in res:
+                print(f"{stage:<24} FAILED: {res['error']}")
+            else:
+                print(f"{stage:<24} {res['time']:>9.3f} {res['rss_mb'] or float('nan'):>9.1f}")
+    finally:
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    if out is not None:
+        with open(out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report saved to: {out}")
+    return report
+
+
+def main(argv=None):
+    """Command line of the pipeline benchmark; returns the exit code (1 on failures)."""
+    import argparse
+    parser = argparse.ArgumentParser(prog="python -m oscar._bench.pipeline")
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_run = sub.add_parser('run', help="time the input pipeline")
+    p_run.add_argument('--data-dir', default=None, help="existing synthetic tree (default: made in a temporary folder)")
+    p_run.add_argument('--n-iso', type=int, default=None)
+    p_run.add_argument('--n-reg', type=int, default=None)
+    p_run.add_argument('--repeat', type=int, default=3)
+    p_run.add_argument('--out', default=None)
+    p_run.add_argument('--select', default=None)
+    p_make = sub.add_parser('make', help="fabricate a synthetic input_data tree")
+    p_make.add_argument('data_dir')
+    p_make.add_argument('--n-iso', type=int, default=None)
+    p_make.add_argument('--n-reg', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == 'make':
+        print(f"[OSCAR] Synthetic input_data made: {make_input_tree(args.data_dir, n_iso=args.n_iso, n_reg=args.n_reg)}")
+        return 0
+
+    report = run_pipeline(args.data_dir, n_iso=args.n_iso, n_reg=args.n_reg, repeat=args.repeat, out=args.out, select=args.select)
+    return 1 if any('error' in res for res in report['results']) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
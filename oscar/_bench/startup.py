@@ -0,0 +1,82 @@
+"""
+OSCAR - Import-Time Benchmark
+Guards the startup budget of the package and of its core modules.
+
+Main Logic:
+    1. Each module is imported in a fresh interpreter (no warm sys.modules).
+    2. The best of several runs is compared to the module's time budget.
+    3. Heavy dependencies that must stay deferred are checked as well.
+    4. Exit code is 1 if any budget is exceeded (usable in CI).
+
+Usage: python -m oscar._bench.startup
+"""
+import sys
+import json
+import subprocess
+
+# Budget per module: (max seconds, heavy modules that must NOT be imported)
+# Time budgets are generous on purpose; the deferred-module check is the strict part.
+IMPORT_BUDGETS = {
+    "oscar": (0.3, ["numpy", "xarray", "matplotlib", "scipy"]),
+    "oscar.cli": (0.3, ["numpy", "xarray", "matplotlib", "scipy"]),
+    "oscar._core.mod_process": (1.5, ["matplotlib", "scipy"]),
+    "oscar._core.fct_misc": (1.5, ["matplotlib", "scipy.odr", "scipy.sparse"]),
+    "oscar._core.fct_loadP": (1.5, ["matplotlib", "scipy.odr"]),
+    "oscar._core.fct_loadD": (1.5, ["matplotlib", "scipy.odr"]),
+    "oscar._core.fct_genD": (1.5, ["matplotlib", "scipy.stats"]),
+    "oscar._workflows.standard_run": (1.5, ["matplotlib", "scipy"]),
+}
+
+# Code run in the child interpreter
+_PROBE = (
+    "import sys, json, time\n"
+    "t0 = time.perf_counter()\n"
+    "import {module}\n"
+    "dt = time.perf_counter() - t0\n"
+    "print(json.dumps({{'time': dt, 'modules': sorted(sys.modules)}}))\n"
+)
+
+
+def measure_import(module, repeat=5):
+    """
+    Imports a module in fresh interpreters and returns the best time and loaded modules.
+    """
+    best, modules = None, []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", _PROBE.format(module=module)],
+                             capture_output=True, text=True, check=True)
+        res = json.loads(out.stdout.strip().splitlines()[-1])
+        if best is None or res["time"] < best:
+            best, modules = res["time"], res["modules"]
+    return best, modules
+
+
+def check_startup(budgets=None, repeat=5):
+    """
+    Measures all modules of the budget table.
+    Returns a list of dicts: module, time, budget, leaked (heavy modules loaded), ok.
+    """
+    budgets = IMPORT_BUDGETS if budgets is None else budgets
+    results = []
+    for module, (budget, deferred) in budgets.items():
+        dt, modules = measure_import(module, repeat=repeat)
+        leaked = [dep for dep in deferred if dep in modules]
+        results.append({"module": module, "time": dt, "budget": budget,
+                        "leaked": leaked, "ok": dt <= budget and not leaked})
+    return results
+
+
+def main(repeat=5):
+    """Prints the startup report and returns the exit code."""
+    results = check_startup(repeat=repeat)
+    print(f"{'MODULE':<35} {'TIME [s]':>9} {'BUDGET':>7}  STATUS")
+    for res in results:
+        status = "ok" if res["ok"] else "FAIL"
+        if res["leaked"]:
+            status += f" (imports {', '.join(res['leaked'])})"
+        print(f"{res['module']:<35} {res['time']:>9.3f} {res['budget']:>7.1f}  {status}")
+    return 0 if all(res["ok"] for res in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
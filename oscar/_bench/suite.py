@@ -0,0 +1,229 @@
+"""
+OSCAR - Performance Benchmark Suite
+Times the solver and the workflows on the shipped bootstrap data, and compares runs between versions.
+
+Main Logic:
+    1. Cases: run_standard, OSCAR(...) at several nt/scheme settings, the carbon sub-models,
+       and scaling over number of configs (nMC), scenarios, run length, regions and species.
+    2. Isolation: Each case runs in a fresh interpreter, so that peak RSS is its own
+       (inputs are built before the timer starts; the best of several repeats is kept).
+    3. Inputs: Synthetic Par, For and Ini of the requested sizes, tiled from the bootstrap data
+       (including the drivers sub-models would get from other modules; see oscar._bench.synthetic).
+    4. Report: Wall time and peak RSS of each case, with platform and version metadata, saved as JSON.
+    5. Compare: Two reports are matched case by case; slowdowns and peak RSS increases beyond their thresholds
+       are flagged (exit code 1).
+
+Usage:
+    python -m oscar._bench.suite run [--preset quick|default|full] [--out bench.json]
+    python -m oscar._bench.suite compare base.json new.json [--threshold 0.1] [--rss-threshold 0.1]
+"""
+import os
+import sys
+import json
+import time
+import platform
+import subprocess
+from pathlib import Path
+
+# Reference settings of the solver cases (others vary one setting at a time; None keeps the bootstrap size)
+BASE = {'n_mc': 10, 'n_scen': 1, 'n_years': 5, 'n_reg_land': None, 'n_spc_halo': None, 'nt': 4, 'scheme': 'imex'}
+
+# Cases per preset: (name, kind, settings overriding BASE)
+# kind is 'oscar' (full model), a sub-model name, or 'standard' (the whole standard workflow)
+_QUICK = [('oscar_base', 'oscar', {})]
+_QUICK += [(f"submodel_{name}", name, {}) for name in ['OSCAR_oceanC', 'OSCAR_landC', 'OSCAR_pfC']]
+_DEFAULT = _QUICK + [(f"oscar_nt{nt}", 'oscar', {'nt': nt}) for nt in [2, 8]]
+_DEFAULT += [("oscar_ExpInt", 'oscar', {'scheme': 'ExpInt'})]
+_DEFAULT += [(f"oscar_nMC{n}", 'oscar', {'n_mc': n}) for n in [1, 50, 200]]
+_DEFAULT += [(f"oscar_scen{n}", 'oscar', {'n_scen': n}) for n in [3, 9]]
+_DEFAULT += [(f"oscar_years{n}", 'oscar', {'n_years': n}) for n in [2, 10, 20]]
+_DEFAULT += [(f"oscar_reg{n}", 'oscar', {'n_reg_land': n}) for n in [10, 22]]
+_DEFAULT += [("oscar_halo74", 'oscar', {'n_spc_halo': 74})]
+_FULL = _DEFAULT + [('run_standard', 'standard', {})]
+_FULL += [('oscar_AR6_22reg_nMC500', 'oscar', {'n_reg_land': 22, 'n_mc': 500, 'n_scen': 9, 'n_years': 10})]
+PRESETS = {'quick': _QUICK, 'default': _DEFAULT, 'full': _FULL}
+
+
+# --- INPUTS ---
+
+def load_inputs(kind, settings):
+    """Returns synthetic (Ini, Par, For) of a case's model and sizes (see oscar._bench.synthetic)."""
+    from .synthetic import make_inputs
+    return make_inputs(n_reg_land=settings['n_reg_land'], n_config=settings['n_mc'], n_scen=settings['n_scen'],
+                       n_spc_halo=settings['n_spc_halo'], n_years=settings['n_years'], model=_get_model(kind))
+
+
+def _get_model(kind):
+    from .._core import mod_process
+    return getattr(mod_process, 'OSCAR' if kind == 'oscar' else kind)
+
+
+# --- MEASUREMENT ---
+
+def _peak_rss_mb():
+    """Peak resident memory of the current process in MB (None where unavailable)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if sys.platform == 'darwin' else rss / 2**10
+
+
+def _child(case_json):
+    """Runs one case in this (fresh) process and prints its wall time and peak RSS as JSON."""
+    import contextlib
+
+    case = json.loads(case_json)
+    kind, settings = case['kind'], case['settings']
+
+    with contextlib.redirect_stdout(sys.stderr):
+        # 1. Whole workflow (inputs loading and plots included)
+        if kind == 'standard':
+            from .._workflows.standard_run import run_standard
+            t0 = time.perf_counter()
+            run_standard(show_plot=False)
+            dt = time.perf_counter() - t0
+
+        # 2. Model call only
+        else:
+            model = _get_model(kind)
+            Ini, Par, For = load_inputs(kind, settings)
+            t0 = time.perf_counter()
+            model(Ini=Ini, Par=Par, For=For, nt=settings['nt'], scheme=settings['scheme'])
+            dt = time.perf_counter() - t0
+
+    print(json.dumps({'time': dt, 'rss_mb': _peak_rss_mb()}))
+
+
+def run_case(name, kind, settings, repeat=3):
+    """
+    Runs one case in fresh interpreters and returns its best wall time and largest peak RSS.
+    """
+    settings = {**BASE, **settings}
+    case = {'kind': kind, 'settings': settings}
+
+    times, rss = [], []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", f"from oscar._bench.suite import _child; _child({json.dumps(json.dumps(case))})"],
+                             capture_output=True, text=True)
+        if out.returncode != 0:
+            return {'case': name, 'kind': kind, 'settings': settings, 'error': out.stderr.strip().splitlines()[-1:]}
+        res = json.loads(out.stdout.strip().splitlines()[-1])
+        times.append(res['time'])
+        rss.append(res['rss_mb'])
+    return {'case': name, 'kind': kind, 'settings': settings, 'time': min(times), 'times': times,
+            'rss_mb': max(rss) if None not in rss else None}
+
+
+def _metadata():
+    """Versions and platform of a report, so that reports are compared knowingly."""
+    from importlib.metadata import version, PackageNotFoundError
+    meta = {'date': time.strftime("%Y-%m-%dT%H:%M:%S"), 'python': platform.python_version(),
+            'platform': platform.platform(), 'cpu_count': os.cpu_count()}
+    for pkg in ['oscar', 'numpy', 'xarray', 'scipy']:
+        try:
+            meta[pkg] = version(pkg)
+        except PackageNotFoundError:
+            meta[pkg] = "unknown"
+    try:
+        meta['git'] = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).parent,
+                                     capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        meta['git'] = None
+    return meta
+
+
+def run_suite(preset='default', repeat=3, out=None, select=None):
+    """
+    Runs the cases of a preset and returns the report (saved as JSON if out is given).
+
+    Args:
+        preset (str): 'quick', 'default' or 'full' (adds the whole standard workflow, several minutes).
+        repeat (int): Runs per case (best time and largest peak RSS are kept).
+        out (str or Path): JSON file of the report.
+        select (str): Only run cases whose name contains this string.
+    """
+    cases = [c for c in PRESETS[preset] if select is None or select in c[0]]
+    report = {'meta': {**_metadata(), 'preset': preset, 'repeat': repeat}, 'results': []}
+
+    print(f"{'CASE':<24} {'TIME [s]':>9} {'RSS [MB]':>9}")
+    for name, kind, settings in cases:
+        res = run_case(name, kind, settings, repeat=repeat)
+        report['results'].append(res)
+        if 'error' in res:
+            print(f"{name:<24} FAILED: {res['error']}")
+        else:
+            print(f"{name:<24} {res['time']:>9.3f} {res['rss_mb'] or float('nan'):>9.1f}")
+
+    if out is not None:
+        with open(out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report saved to: {out}")
+    return report
+
+
+# --- COMPARISON ---
+
+def compare_reports(base, new, threshold=0.1, rss_threshold=0.1):
+    """
+    Compares two reports (dicts or JSON files) case by case.
+    Returns a list of dicts: case, base and new time and RSS, time and RSS ratios (None where RSS is unavailable),
+    and regression flags on time (ratio > 1 + threshold), on memory (rss_ratio > 1 + rss_threshold) and on either.
+    """
+    reports = []
+    for report in (base, new):
+        if not isinstance(report, dict):
+            with open(report) as f:
+                report = json.load(f)
+        reports.append({res['case']: res for res in report['results'] if 'error' not in res})
+    base, new = reports
+
+    rows = []
+    for case in [c for c in base if c in new]:
+        ratio = new[case]['time'] / base[case]['time'] if base[case]['time'] > 0 else float('inf')
+        base_rss, new_rss = base[case]['rss_mb'], new[case]['rss_mb']
+        rss_ratio = new_rss / base_rss if base_rss and new_rss is not None else None
+        time_regression = ratio > 1 + threshold
+        rss_regression = rss_ratio is not None and rss_ratio > 1 + rss_threshold
+        rows.append({'case': case, 'base_time': base[case]['time'], 'new_time': new[case]['time'],
+                     'base_rss_mb': base_rss, 'new_rss_mb': new_rss, 'ratio': ratio, 'rss_ratio': rss_ratio,
+                     'time_regression': time_regression, 'rss_regression': rss_regression,
+                     'regression': time_regression or rss_regression})
+    return rows
+
+
+def main(argv=None):
+    """Command line of the suite; returns the exit code (1 on failures or regressions)."""
+    import argparse
+    parser = argparse.ArgumentParser(prog="python -m oscar._bench.suite")
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_run = sub.add_parser('run', help="run the benchmark suite")
+    p_run.add_argument('--preset', default='default', choices=list(PRESETS))
+    p_run.add_argument('--repeat', type=int, default=3)
+    p_run.add_argument('--out', default=None)
+    p_run.add_argument('--select', default=None)
+    p_cmp = sub.add_parser('compare', help="compare two reports")
+    p_cmp.add_argument('base')
+    p_cmp.add_argument('new')
+    p_cmp.add_argument('--threshold', type=float, default=0.1)
+    p_cmp.add_argument('--rss-threshold', type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        report = run_suite(args.preset, repeat=args.repeat, out=args.out, select=args.select)
+        return 1 if any('error' in res for res in report['results']) else 0
+
+    rows = compare_reports(args.base, args.new, threshold=args.threshold, rss_threshold=args.rss_threshold)
+    print(f"{'CASE':<24} {'BASE [s]':>9} {'NEW [s]':>9} {'RATIO':>7} {'RSS BASE':>9} {'RSS NEW':>9} {'RATIO':>7}  STATUS")
+    for row in rows:
+        status = " + ".join([kind for kind, flag in [("TIME", row['time_regression']), ("RSS", row['rss_regression'])] if flag])
+        status = f"REGRESSION ({status})" if status else "ok"
+        print(f"{row['case']:<24} {row['base_time']:>9.3f} {row['new_time']:>9.3f} {row['ratio']:>7.2f} "
+              f"{row['base_rss_mb'] or float('nan'):>9.1f} {row['new_rss_mb'] or float('nan'):>9.1f} "
+              f"{row['rss_ratio'] or float('nan'):>7.2f}  {status}")
+    return 1 if any(row['regression'] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
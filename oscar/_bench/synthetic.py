@@ -0,0 +1,133 @@
+"""
+OSCAR - Synthetic Inputs
+Builds Par, For and Ini of any size from the shipped bootstrap data, for scale and performance tests.
+
+Main Logic:
+    1. Variables: Taken from the model's own sets (var_in and prescribed variables for For,
+       var_prog and var_node for Ini); Par is the full bootstrap set.
+    2. Templates: Each dimension is resized by tiling the bootstrap values (configs, scenarios, halogenated
+       species, land regions); years beyond the template hold their last value.
+    3. Consistency: When land regions are tiled, extensive quantities (areas, stocks, emissions) are split
+       among the copies of each template region, so global totals are those of the template.
+    4. Missing drivers: Inputs of sub-models that come from other modules (e.g. D_Tl for OSCAR_landC)
+       are generated as ramps over the period.
+
+Example:
+    Ini, Par, For = make_inputs(n_reg_land=22, n_config=500, n_scen=9, n_years=86)  # AR6_22reg-sized run
+"""
+import numpy as np
+import xarray as xr
+
+# Leading units of extensive quantities (summed over regions); per-area or ratio units make a quantity intensive
+EXTENSIVE_UNITS = {'Mha', 'PgC', 'TgC', 'TgX', 'Tg', 'Gg'}
+
+# Values reached at the end of the period by generated drivers (from 0 at the start)
+DRIVER_RAMPS = {'D_Tg': 1.5, 'D_Tl': 2., 'D_To': 0.8, 'D_CO2': 150., 'D_Pl': 0.}
+
+
+def _is_extensive(da, default):
+    """Whether a regional variable is extensive, from its units (default if it has none)."""
+    units = da.attrs.get('units')
+    if units is None:
+        return default
+    tokens = units.split()
+    return tokens[0] in EXTENSIVE_UNITS and all(t == 'yr-1' for t in tokens[1:])
+
+
+def _tile(ds, dim, labels, weights=None, extensive_default=False):
+    """Resizes ds along dim with the template index 'labels' (new coordinate values are given by labels[1])."""
+    if dim not in ds.dims:
+        return ds
+    idx, coords = labels
+    out = ds.isel({dim: idx}).assign_coords({dim: coords})
+    if weights is not None:
+        for var in out.data_vars:
+            if dim in out[var].dims and _is_extensive(out[var], extensive_default):
+                out[var] = (out[var] * xr.DataArray(weights, dims=dim, coords={dim: coords})).astype(out[var].dtype)
+                out[var].attrs = ds[var].attrs
+    return out
+
+
+def _index(template, n, unknown_first=False):
+    """
+    Template index of n tiled elements (the first one, e.g. region 'Unknown', is kept once if unknown_first).
+    With unknown_first (regions), n cannot be smaller than the template: dropped regions would change global totals.
+    """
+    size = len(template)
+    if unknown_first:
+        if n < size:
+            raise ValueError(f"cannot make fewer regions than the template ({size - 1} besides region 0): got {n - 1}")
+        return np.concatenate([[0], 1 + np.arange(n - 1) % (size - 1)])
+    return np.arange(n) % size
+
+
+def make_inputs(n_reg_land=None, n_config=None, n_scen=None, n_spc_halo=None, n_years=None, model=None):
+    """
+    Returns synthetic (Ini, Par, For) for a model, resized from the bootstrap data.
+
+    Args:
+        n_reg_land (int): Number of land regions, not counting region 0 ('Unknown'), e.g. 22 for AR6_22reg;
+                          at least that of the bootstrap data (5), so that global totals are kept.
+        n_config (int): Number of configurations (nMC).
+        n_scen (int): Number of scenarios.
+        n_spc_halo (int): Number of halogenated species.
+        n_years (int): Number of years of forcing.
+        model (Model): Model the inputs are made for (default OSCAR; e.g. OSCAR_landC).
+    None keeps the size of the bootstrap data (5 regions, 50 configs, 9 scenarios, 37 species, 86 years).
+    """
+    from .._io.paths import get_bootstrap_dir
+    from .._core.mod_process import OSCAR
+    model = OSCAR if model is None else model
+
+    # 1. Templates
+    b_dir = get_bootstrap_dir()
+    Par = xr.open_dataset(b_dir / "parameters_mc_standard.nc").load()
+    For = xr.open_dataset(b_dir / "forcing_scen_standard.nc").load()
+    Ini = xr.open_dataset(b_dir / "scen_initial_state_standard.nc").load()
+    scen, years = For.scen, For.year.values
+    For = For[[var for var in For.data_vars if var in model.var_all]]
+    Ini = Ini[[var for var in Ini.data_vars if var in model.var_prog | model.var_node]]
+
+    # 2. Configs, scenarios and species (independent copies)
+    if n_config is not None:
+        idx = _index(Par.config, n_config)
+        Par, Ini = [_tile(ds, 'config', (idx, np.arange(n_config))) for ds in (Par, Ini)]
+    if n_scen is not None:
+        idx = _index(scen, n_scen)
+        names = [f"{scen.values[i]}" + (f"#{k // len(scen)}" if k >= len(scen) else "") for k, i in enumerate(idx)]
+        For = _tile(For, 'scen', (idx, names))
+    if n_spc_halo is not None:
+        idx = _index(Par.spc_halo, n_spc_halo)
+        names = [f"{Par.spc_halo.values[i]}" + (f"#{k // Par.sizes['spc_halo']}" if k >= Par.sizes['spc_halo'] else "") for k, i in enumerate(idx)]
+        Par, For, Ini = [_tile(ds, 'spc_halo', (idx, names)) for ds in (Par, For, Ini)]
+
+    # 3. Land regions (extensive quantities split among copies; forcing without units is extensive)
+    if n_reg_land is not None:
+        idx = _index(Par.reg_land, n_reg_land + 1, unknown_first=True)
+        weights = 1. / np.bincount(idx)[idx]
+        labels = (idx, np.arange(n_reg_land + 1))
+        Par = _tile(Par, 'reg_land', labels, weights)
+        For = _tile(For, 'reg_land', labels, weights, extensive_default=True)
+        Ini = _tile(Ini, 'reg_land', labels, weights)
+        names = ['Unknown'] + [f"Region {k}" for k in range(1, n_reg_land + 1)]
+        Par, For, Ini = [ds.assign_coords(reg_land_long_name=('reg_land', names)) if 'reg_land' in ds.dims else ds for ds in (Par, For, Ini)]
+
+    # 4. Years (beyond the template, forcing holds its last value)
+    if n_years is not None:
+        idx = np.minimum(np.arange(n_years), len(years) - 1)
+        years = years[0] + np.arange(n_years)
+        For = _tile(For, 'year', (idx, years))
+
+    # 5. Drivers computed by other modules in the full model (ramps), and missing initial states (zeros)
+    for var in sorted(model.var_in - set(For)):
+        dims = [dim for dim in OSCAR[var].core_dims]
+        ramp = xr.DataArray(np.linspace(0., DRIVER_RAMPS.get(var, 0.), len(years)), dims='year', coords={'year': years})
+        For[var] = ramp + sum([xr.zeros_like(Par[dim] if dim in Par.coords else For[dim], dtype=float) for dim in dims], xr.DataArray(0.))
+    for var in sorted((model.var_prog | model.var_node) - set(Ini)):
+        dims = model[var].core_dims
+        Ini[var] = sum([xr.zeros_like(Par[dim] if dim in Par.coords else For[dim], dtype=float) for dim in dims], xr.DataArray(0.))
+
+    # 6. The model's own checks
+    model._check_Ini(Ini)
+    model._check_For(For, 'year')
+    return Ini, Par, For
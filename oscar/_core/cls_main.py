@@ -20,6 +20,39 @@ import xarray as xr
 from time import perf_counter
 
 
+##################################################
+##   0. PRECISION
+##################################################
+
+## precision profiles of model runs, i.e. data types of:
+## 'state' (prognostic and node variables, accumulated over the run), 'compute' (parameters, drivers and diagnostic variables), 
+## 'output' (kept diagnostic variables; kept state variables are output with the 'state' type),
+## and 'vars' (specific variables, overriding their role in both computation and output)
+PRECISION_PROFILES = {
+    ## state in double precision (avoids drift in long runs), the bulk of the graph in single precision
+    'default': {'state':np.float64, 'compute':np.float32, 'output':np.float32, 'vars':{}},
+    ## all in single precision (as in earlier versions)
+    'single': {'state':np.float32, 'compute':np.float32, 'output':np.float32, 'vars':{}},
+    ## all in double precision
+    'double': {'state':np.float64, 'compute':np.float64, 'output':np.float64, 'vars':{}},
+    ## as 'default', but diagnostic outputs kept in half precision (large ensembles; saved as single precision in netCDF files)
+    ## half precision only holds absolute values up to 65504: larger values become inf (with a warning at the end of the run)
+    'compact': {'state':np.float64, 'compute':np.float32, 'output':np.float16, 'vars':{}},
+}
+
+## cast a variable to a data type (unchanged if None)
+def _cast(da, dtype):
+    return da if dtype is None or da.dtype == dtype else da.astype(dtype)
+
+## cast variables of a dataset to their data types (others unchanged; dataset not rebuilt if nothing to cast)
+## if a set is given as overflow, names of variables whose finite values overflow the new data type are added to it
+def _astype(ds, dtypes, overflow=None):
+    new = {var: ds[var].astype(dtypes[var]) for var in ds if dtypes.get(var) is not None and ds[var].dtype != dtypes[var]}
+    if overflow is not None:
+        overflow.update(var for var in new if bool((np.isinf(new[var]) & np.isfinite(ds[var])).any()))
+    return ds.assign(new) if new else ds
+
+
 ##################################################
 ##   1. MODELS
 ##################################################
@@ -221,12 +254,22 @@ class Model():
     def _get_vLin(self, Par):
         return xr.Dataset({var: self[var].vLin(Par) for var in self.var_prog})
 
+    ## get data types of computation and output from precision policy
+    def _get_precision(self, precision):
+        if isinstance(precision, str):
+            if precision not in PRECISION_PROFILES: raise ValueError("unknown precision profile: '{0}' (available: {1})".format(precision, list(PRECISION_PROFILES)))
+            precision = PRECISION_PROFILES[precision]
+        policy = {**PRECISION_PROFILES['default'], **precision}
+        dt_calc = {var: policy['vars'].get(var, policy['state'] if var in self.var_prog | self.var_node else policy['compute']) for var in self.var_all}
+        dt_out = {var: policy['vars'].get(var, policy['state'] if var in self.var_prog | self.var_node else policy['output']) for var in self.var_all}
+        return policy['compute'], dt_calc, dt_out
+
     ## -------
     ## Running
     ## -------
 
     ## running model
-    def __call__(self, Ini, Par, For, dtype=np.float32, var_keep=[], keep_prog=True, get_final=False, time_axis='year', scheme='imex', nt=2, nt_max=24, adapt_nt=True, no_warnings=True):
+    def __call__(self, Ini, Par, For, dtype=None, precision='default', var_keep=[], keep_prog=True, get_final=False, time_axis='year', scheme='imex', nt=2, nt_max=24, adapt_nt=True, no_warnings=True):
         '''
         Input:
         ------
@@ -241,8 +284,16 @@ class Model():
 
         Options:
         --------
-        dtype (type)            data type for computation, either np.float32 or float;
-                                default = np.float32
+        dtype (type)            single data type for all data (computation, state and output), e.g. np.float32 or float;
+                                if provided, it overrides the precision policy;
+                                default = None
+        precision (str or dict) precision policy of the run: name of a profile of PRECISION_PROFILES,
+                                or dict with some of its keys ('state', 'compute', 'output', 'vars'; others taken from 'default');
+                                the 'default' profile keeps state variables in double precision and the rest in single precision;
+                                kept state variables are output with the 'state' data type (unless set in 'vars');
+                                the 'compact' profile outputs in half precision, which overflows to inf above 65504 (with a warning);
+                                if None, data types of inputs are kept;
+                                default = 'default'
         var_keep (list)         variables to be kept as output;
                                 default = []
         keep_prog (bool)        whether prognostic and node variables should be kept as output;
@@ -275,11 +326,15 @@ class Model():
         if Ini is None: Ini = self._get_Ini(Par, For)
         else: self._check_Ini(Ini)
 
-        ## force data type
-        if dtype is not None:
-            Ini = Ini.astype(dtype)
-            Par = Par.astype(dtype)
-            For = For.astype(dtype)
+        ## force data types (following precision policy)
+        if dtype is not None: precision = {'state':dtype, 'compute':dtype, 'output':dtype, 'vars':{}}
+        if precision is not None:
+            dt_comp, dt_calc, dt_out = self._get_precision(precision)
+            Ini = _astype(Ini, dt_calc)
+            Par = Par.astype(dt_comp)
+            For = For.astype(dt_comp)
+        else:
+            dt_calc, dt_out = {}, {}
 
         ## get time axis and substeps
         time = For.coords[time_axis]
@@ -320,10 +375,12 @@ class Model():
             Var_old = Ini.copy(deep=True)
             for var in list_var_diag:
                 Var_old[var] = self[var](Var_old, Par, For.sel({time_axis: time[0]}, drop=True))
+                Var_old[var] = _cast(Var_old[var], dt_calc.get(var))
 
             ## initialization of kept variables
             Var_out = Var_old.drop([var for var in Var_old if var not in list_var_keep])
-            Var_out = [Var_out.assign_coords(**{time_axis: time[0]}).expand_dims(time_axis, 0)]
+            overflow = set()
+            Var_out = [_astype(Var_out, dt_out, overflow).assign_coords(**{time_axis: time[0]}).expand_dims(time_axis, 0)]
 
             ## LOOP ON TIME-STEP
             for t in range(1, len(time)):
@@ -342,8 +399,8 @@ class Model():
                 dt = float(time[t] - time[t-1]) / float(steps[t])
                 For_t = For.sel({time_axis: time[t]}, drop=True)
 
-                ## anticipate new output (initialized to zero)
-                Var_out.append(0 * Var_out[-1].isel({time_axis: 0}, drop=True))
+                ## anticipate new output (initialized to zero, and averaged with computation types)
+                Var_out.append(_astype(0 * Var_out[-1].isel({time_axis: 0}, drop=True), dt_calc))
 
                 ## LOOP ON SUBSTEPS
                 print('(nt = ' + str(int(steps[t])) +')', end='\n' if t+1==len(time) else '\r')
@@ -355,8 +412,10 @@ class Model():
                         Var_new[var] = self[var](Var_old, Par, For_t, f_dot=lambda dX_dt: f_dX(dX_dt, vLin[var], dt))
                     for var in list_var_node:
                         Var_new[var] = self[var](Var_old, Par, For_t)
+                    Var_new = _astype(Var_new, dt_calc)
                     for var in list_var_diag:
                         Var_new[var] = self[var](Var_new, Par, For_t)
+                        Var_new[var] = _cast(Var_new[var], dt_calc.get(var))
 
                     ## iterate variables
                     Var_old = Var_new.copy(deep=True)
@@ -371,8 +430,8 @@ class Model():
                     Var_out[-1] += float(1/steps[t]) * Var_new # this gives mid-year values
                     #Var_out[-1] = Var_new # this would give end-year values
 
-                ## assign time coordinate
-                Var_out[-1] = Var_out[-1].assign_coords(**{time_axis: time[t]}).expand_dims(time_axis, 0)
+                ## assign time coordinate (and output types)
+                Var_out[-1] = _astype(Var_out[-1], dt_out, overflow).assign_coords(**{time_axis: time[t]}).expand_dims(time_axis, 0)
 
             ## FINALIZATION
             ## concatenate/assign time axis of final output
@@ -388,6 +447,10 @@ class Model():
             if get_final: 
                 for var in Var_fin: Var_fin[var].attrs['units'] = self[var].units
 
+        ## warn about output values out of their data type range (outside of hidden warnings)
+        if overflow:
+            warnings.warn('output values out of range of their data type, set to inf: ' + ', '.join(sorted(overflow)), RuntimeWarning)
+
         ## printing time counter
         print('total running time: {:.1f} minutes'.format((perf_counter() - t0) / 60))
 
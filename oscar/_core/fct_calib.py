@@ -37,7 +37,6 @@ CONTENT
 import warnings
 import numpy as np
 import xarray as xr
-import matplotlib.pyplot as plt
 
 from .fct_misc import aggreg_region, fit_odr, check_odr
 
@@ -16,20 +16,21 @@ The fact that you are presently reading this means that you have had knowledge o
 ##################################################
 ##################################################
 
-import random
 import warnings
 import numpy as np
 import xarray as xr
 
-from scipy.stats import theilslopes
-
-from core_fct.fct_misc import extend_timeseries
+from .fct_misc import extend_timeseries, theil_sen_slope, parallel_map, pack_LUC, get_LUC_pairs
 
 
 ##################################################
-## 1. GENERATE ONE TIME-SERIES
+## 1. GENERATE TIME-SERIES
 ##################################################
 
+##=====================
+## 1.1. One combination
+##=====================
+
 ## create one full timeseries of historical drivers
 def make_one_timeseries(Old, data_list, inds, data_connect, missing_data, preindustrial, ref_length=None):
     '''
@@ -101,7 +102,7 @@ def make_one_timeseries(Old, data_list, inds, data_connect, missing_data, preind
         years = xr.DataArray(np.arange(New.year.max()-ref_length+1, indH+1), coords={'year':np.arange(New.year.max()-ref_length+1, indH+1)}, dims=['year'])
         for VAR in New:        
         
-            ## catching warnings from theilslopes and empty slices averaging
+            ## catching warnings from empty slices averaging
             with warnings.catch_warnings():
                 warnings.filterwarnings('ignore')
 
@@ -113,9 +114,9 @@ def make_one_timeseries(Old, data_list, inds, data_connect, missing_data, preind
                     year_ref = New[VAR].loc[New.year.max()-ref_length+1:New.year.max()].year.mean('year')
                     
                     ## local and global trends
-                    trend_reg = xr.apply_ufunc(lambda X: theilslopes(X)[0], New[VAR].loc[New.year.max()-ref_length+1:New.year.max()], input_core_dims=[['year']], vectorize=True)
+                    trend_reg = xr.apply_ufunc(theil_sen_slope, New[VAR].loc[New.year.max()-ref_length+1:New.year.max()], input_core_dims=[['year']])
                     if 'reg_land' in New.coords:
-                        trend_glob = theilslopes(New[VAR].loc[New.year.max()-ref_length+1:New.year.max()].sum('reg_land', min_count=1))[0]
+                        trend_glob = theil_sen_slope(New[VAR].loc[New.year.max()-ref_length+1:New.year.max()].sum('reg_land', min_count=1).values)
                     
                     ## extension (remove last line if not scale_to_global)
                     Ext = (years - year_ref) * trend_reg + VAR_ref
@@ -158,6 +159,257 @@ def make_one_timeseries(Old, data_list, inds, data_connect, missing_data, preind
     return New.fillna(0.).assign_coords(**{data_axis:' '.join(data_list)}).expand_dims(data_axis, -1)
 
 
+##======================
+## 1.2. All combinations
+##======================
+
+## note: arrays below are shaped (combi, year, reg, other), with reg of length 1 if there is no regional axis
+
+## apply one extension step to all combinations at once
+def _splice_step(S, E, direction, data_connect, dump_index=None):
+    '''
+    Function to extend stacked time-series with other stacked time-series (one data source per combination).
+    It follows the rules of extend_timeseries with ref_length=1, as used by make_one_timeseries.
+    
+    Input:
+    ------
+    S (np.ndarray)          stacked time-series to be extended
+    E (np.ndarray)          stacked time-series used for extension
+    direction (str)         must be 'forward' or 'backward' (in time)
+    data_connect (str)      'raw' or 'rel_change' (see make_one_timeseries)
+
+    Output:
+    -------
+    new (np.ndarray)        extended time-series
+    extend (np.ndarray)     boolean mask (combi, year) of the years covered by the extension
+
+    Options:
+    --------
+    dump_index (int)        index on reg axis where the difference between global and local rescaling is dumped;
+                            if None, rescaling is only local;
+                            default = None
+    '''
+
+    ## years covered (if any value is defined) and overlap
+    ref_valid = ~np.isnan(S).all((2, 3))
+    ext_valid = ~np.isnan(E).all((2, 3))
+    overlap = ref_valid & ext_valid
+    has_overlap = overlap.any(1)
+    n_year = S.shape[1]
+    ind = np.arange(n_year)[np.newaxis, :]
+
+    ## junction year and years to cover
+    if direction == 'forward':
+        ind_ref = n_year - 1 - np.argmax(overlap[:, ::-1], 1)
+        ind_ext = n_year - 1 - np.argmax(ext_valid[:, ::-1], 1)
+        extend = (ind > ind_ref[:, np.newaxis]) & (ind <= ind_ext[:, np.newaxis])
+    elif direction == 'backward':
+        ind_ref = np.argmax(overlap, 1)
+        ind_ext = np.argmax(ext_valid, 1)
+        extend = (ind >= ind_ext[:, np.newaxis]) & (ind < ind_ref[:, np.newaxis])
+    else:
+        raise ValueError("'direction' can only be 'forward' or 'backward'")
+    extend &= has_overlap[:, np.newaxis]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+
+        ## simply juxtapose
+        if data_connect == 'raw':
+            new = np.where(extend[..., np.newaxis, np.newaxis], np.nan_to_num(S) + E, S)
+
+        ## or rescale locally
+        else:
+            S_ref = S[np.arange(len(S)), ind_ref]
+            E_ref = E[np.arange(len(E)), ind_ref]
+            new = np.where(extend[..., np.newaxis, np.newaxis], np.nan_to_num(S) + E * S_ref[:, np.newaxis] / E_ref[:, np.newaxis], S)
+
+            ## and dump difference with global rescaling
+            if dump_index is not None:
+                glob = E * np.nansum(S_ref, 1)[:, np.newaxis, np.newaxis] / np.nansum(E_ref, 1)[:, np.newaxis, np.newaxis]
+                dump = np.nan_to_num(new[:, :, dump_index]) + np.nansum(glob, 2) - np.nansum(new, 2)
+                new[:, :, dump_index] = np.where(extend[..., np.newaxis], dump, new[:, :, dump_index])
+
+    ## return
+    return new, extend
+
+
+## create all full timeseries of historical drivers at once
+def make_all_timeseries(Old, data_combi, inds, data_connect, missing_data, preindustrial, ref_length=None):
+    '''
+    Function to put together all time-series of forcing data for a list of combinations.
+    Equivalent to concatenating make_one_timeseries over data_combi, but all variables and combinations are spliced together on stacked arrays.
+    
+    Input:
+    ------
+    Old (xr.Dataset)        dataset containing all data sources of data_combi
+    data_combi (list)       list of data_list (see make_one_timeseries)
+    inds (tuple)            starting (ind0), preindustrial (indPI) and ending (indH) years of the output time-series
+    data_connect (str)      how data sources are connected together (see make_one_timeseries)
+    missing_data (str)      how the time-series is extended forward for missing data (see make_one_timeseries)
+    preindustrial (str)     how preindustrial (e.g. emissions) are defined (see make_one_timeseries)
+        
+    Output:
+    -------
+    New (xr.Dataset)        dataset which consistent time-series covering ind0 to indH, with one combination per element of data axis
+
+    Options:
+    --------
+    ref_length (int)        length of time period used for extension of missing_data;
+                            default = None
+    '''
+
+    ## check arguments are a possibility
+    assert data_connect in ['raw', 'rel_change']
+    assert missing_data in ['cst', 'trend', 'safe_trend']
+    assert preindustrial in ['zero', 'offset', 'safe_offset']
+
+    ## unpack indexes
+    ind0, indPI, indH = inds[:3]
+
+    ## get data info
+    data_axis = [coord for coord in Old.dims if 'data_' in coord][0]
+    data_index = {str(data):n for n, data in enumerate(Old[data_axis].values)}
+
+    ## get master and complementing data sources of each combination (in order of use)
+    masters, forwards, backwards = [], [], []
+    for data_list in data_combi:
+        n0 = [var.count('*') for var in data_list].index(2)
+        masters.append(data_index[data_list[n0].replace('*', '')])
+        forwards.append([data_index[data] for data in data_list[n0+1:]])
+        backwards.append([data_index[data] for data in data_list[:n0][::-1]])
+    n_combi = len(data_combi)
+
+    ## common time axis (covering data and output period)
+    years = np.arange(min(int(Old.year.min()), ind0), max(int(Old.year.max()), indH) + 1)
+    Old = Old.reindex(year=years)
+    iPI, iH = indPI - years[0], indH - years[0]
+
+    ## scaling losses are dumped in reg_land=0 (same rule as make_one_timeseries)
+    dump_loss = data_connect == 'rel_change' and 'reg_land' in Old.coords and any([len(chain) > 0 for chain in forwards + backwards])
+
+    ## stack variables as (data, year, reg, other)
+    Data, dims, dump_index = {}, {}, {}
+    for VAR in Old:
+        reg = [dim for dim in Old[VAR].dims if dim == 'reg_land']
+        other = [dim for dim in Old[VAR].dims if dim not in [data_axis, 'year', 'reg_land']]
+        X = Old[VAR].transpose(data_axis, 'year', *reg, *other).values.astype(float)
+        Data[VAR] = X.reshape(X.shape[0], X.shape[1], Old.sizes['reg_land'] if len(reg) > 0 else 1, -1)
+        dims[VAR] = (reg, other)
+        dump_index[VAR] = None
+        if dump_loss:
+            if len(reg) == 0 or len(other) > 0 or 0 not in Old.reg_land:
+                raise ValueError("'dump_loss_in' requested but inadequate set of coordinates provided: {0}".format({'reg_land':0}))
+            dump_index[VAR] = int(np.argmax(Old.reg_land.values == 0))
+
+    ## get initial datasets
+    New = {VAR:Data[VAR][masters] for VAR in Data}
+    covered = np.zeros((n_combi, len(years)), dtype=bool)
+    for VAR in New:
+        covered |= ~np.isnan(New[VAR]).all((2, 3))
+
+    ## complement forward, then backward (one step for all combinations at once)
+    for direction, chains in [('forward', forwards), ('backward', backwards)]:
+        for k in range(max([len(chain) for chain in chains], default=0)):
+            active = np.array([len(chain) > k for chain in chains])
+            sources = [chain[k] for chain in chains if len(chain) > k]
+            covered_k = np.zeros((active.sum(), len(years)), dtype=bool)
+            for VAR in New:
+                covered_k |= ~np.isnan(New[VAR][active]).all((2, 3))
+                New[VAR][active], extend = _splice_step(New[VAR][active], Data[VAR][sources], direction, data_connect, dump_index=dump_index[VAR])
+                covered_k |= extend
+            covered[active] = covered_k
+
+    ## extend further forward
+    last = len(years) - 1 - np.argmax(covered[:, ::-1], 1)
+    todo = last < iH
+    if todo.any():
+        ind = np.arange(len(years))[np.newaxis, :]
+        
+        ## reference window and extended years
+        window = last[todo, np.newaxis] + np.arange(-ref_length+1, 1)[np.newaxis, :]
+        in_window = (window >= 0) & covered[todo][np.arange(todo.sum())[:, np.newaxis], np.maximum(window, 0)]
+        window = np.maximum(window, 0)
+        extended = (ind >= last[todo, np.newaxis] - ref_length + 1) & (ind <= iH)
+        
+        ## catching warnings from empty slices averaging
+        with warnings.catch_warnings():
+            warnings.filterwarnings('ignore')
+
+            for VAR in New:
+                X = New[VAR][todo]
+                X_win = np.where(in_window[..., np.newaxis, np.newaxis], X[np.arange(len(X))[:, np.newaxis], window], np.nan)
+                X_ref = np.nanmean(X_win, 1)
+
+                ## extend following latest trend
+                if missing_data in ['trend', 'safe_trend']:
+                    year_win = np.where(in_window, years[window], np.nan)
+                    year_ref = np.nanmean(year_win, 1)
+                    dt = (years[np.newaxis, :] - year_ref[:, np.newaxis])[..., np.newaxis, np.newaxis]
+
+                    ## local and global trends
+                    trend_reg = theil_sen_slope(X_win, year_win[..., np.newaxis, np.newaxis], axis=1)
+                    Ext = dt * trend_reg[:, np.newaxis] + X_ref[:, np.newaxis]
+                    if len(dims[VAR][0]) > 0:
+                        X_glob = np.where(np.isnan(X_win).all(2), np.nan, np.nansum(X_win, 2))
+                        trend_glob = theil_sen_slope(X_glob, year_win[..., np.newaxis], axis=1)
+                        sum_ref = np.where(np.isnan(X_ref).all(1), np.nan, np.nansum(X_ref, 1))
+                        sum_ext = np.where(np.isnan(Ext).all(2), np.nan, np.nansum(Ext, 2))
+                        i0 = int(np.argmax(Old.reg_land.values == 0))
+                        Ext[:, :, i0] = np.nan_to_num(Ext[:, :, i0]) + dt[:, :, 0] * trend_glob[:, np.newaxis] + sum_ref[:, np.newaxis] - sum_ext
+                    
+                    ## ensure no negative emissions (if requested)
+                    if missing_data == 'safe_trend': 
+                        Ext = np.where(Ext >= 0, Ext, 0)
+
+                ## or with constant values
+                elif missing_data == 'cst':
+                    Ext = np.broadcast_to(X_ref[:, np.newaxis], X.shape)
+
+                ## apply extension to missing data
+                New[VAR][todo] = np.where(np.isnan(X) & extended[..., np.newaxis, np.newaxis], Ext, X)
+        covered[todo] |= extended
+
+    ## extend further backward linearly to zero
+    first = np.argmax(covered, 1)
+    todo = first > iPI
+    if todo.any():
+        ind = np.arange(len(years))[np.newaxis, :]
+        extended = ((ind >= iPI) & (ind < first[todo, np.newaxis]))[..., np.newaxis, np.newaxis]
+        for VAR in New:
+            X = New[VAR][todo]
+            X_first = X[np.arange(len(X)), first[todo]][:, np.newaxis]
+            lin = X_first / (first[todo] - iPI)[:, np.newaxis, np.newaxis, np.newaxis] * (ind - iPI)[..., np.newaxis, np.newaxis]
+            New[VAR][todo] = np.where(extended & np.isnan(X), lin, X)
+
+    ## slice over proper time period and format output
+    data_coord = [' '.join(data_list) for data_list in data_combi]
+    for VAR in New:
+        X = New[VAR][:, iPI:iH+1]
+        
+        ## offset by preindustrial value (if requested)
+        if preindustrial in ['offset', 'safe_offset']:
+            X = X - np.nan_to_num(X[:, :1])
+            
+            ## ensure no negative emissions (if requested)
+            if preindustrial == 'safe_offset':
+                X = np.where(X >= 0, X, 0)
+
+        ## extend with zeros over preindustrial period
+        if ind0 < indPI:
+            X = np.concatenate([np.zeros((X.shape[0], indPI - ind0) + X.shape[2:]), X], 1)
+        X = np.where(np.isnan(X), 0., X)
+
+        ## back to original dimensions (with data axis last)
+        reg, other = dims[VAR]
+        X = X.reshape(X.shape[:2] + tuple(Old.sizes[dim] for dim in reg + other))
+        New[VAR] = xr.DataArray(X, coords={data_axis:data_coord, 'year':np.arange(min(ind0, indPI), indH + 1)}, dims=[data_axis, 'year'] + reg + other)
+        New[VAR] = New[VAR].assign_coords({dim:Old[dim] for dim in reg + other if dim in Old.coords})
+        New[VAR] = New[VAR].transpose(*[dim for dim in Old[VAR].dims if dim != data_axis], data_axis)
+
+    ## return
+    return xr.Dataset(New)
+
+
 ##################################################
 ## 2. GENERATE ALL TIME-SERIES
 ##################################################
@@ -167,8 +419,8 @@ def make_one_timeseries(Old, data_list, inds, data_connect, missing_data, preind
 ##=====================
 
 ## check all possible combinations
-## /!\ WARNING: this is done randomly! it is inefficient and unsuited for too many combinations (>1000)
-def check_combinations(For, inds, ignored=[], n_safe=2000, n_break=1000):
+## note: combinations are enumerated exactly (depth-first through the overlaps of datasets), in a deterministic order
+def check_combinations(For, inds, ignored=[], **useless):
     '''
     Function to check all possible combinations of data sources to create consistent time-series of forcing data.
     
@@ -179,17 +431,14 @@ def check_combinations(For, inds, ignored=[], n_safe=2000, n_break=1000):
 
     Output:
     -------
-    combi (list)        list of all possible combinations found;
-                        each combination is given as a chronological list of data sources, with central one surrounded by '*'
+    combi (list)        list of all possible combinations;
+                        each combination is given as a chronological list of data sources, with central one surrounded by '*';
+                        combinations are ordered by central data source (in order of data axis), then by complementing data sources
 
     Options:
     --------
     ignored (list)      name of data sources to be ignored as master (central) data sources;
                         default = []
-    n_safe (int)        random loop will assume convergence after [number of combinations found] * n_safe iterations;
-                        default = 2000
-    n_break (int)       random loop will break after n_safe * n_break iterations;
-                        default = 1000
     '''
 
     ## unpack indexes
@@ -197,43 +446,44 @@ def check_combinations(For, inds, ignored=[], n_safe=2000, n_break=1000):
 
     ## get data info
     data_axis = [coord for coord in For.dims if 'data_' in coord][0]
-    data_values = For.dropna(data_axis, how='all').coords[data_axis].values
 
-    ## get years covered by emission datasets
-    year_min, year_max = {}, {}
+    ## get years covered by each dataset (in one pass over all variables)
+    ## a year is covered if any variable has any value for this dataset
+    is_valid = xr.DataArray(np.zeros((len(For[data_axis]), len(For['year'])), dtype=bool), coords={data_axis:For[data_axis], 'year':For['year']}, dims=[data_axis, 'year'])
+    for VAR in For:
+        if 'year' in For[VAR].dims:
+            is_valid = is_valid | For[VAR].notnull().any([dim for dim in For[VAR].dims if dim not in ['year', data_axis]])
+    is_valid = is_valid.transpose(data_axis, 'year').values
+    years = For['year'].values
+    data_values = [data for data, valid in zip(For[data_axis].values, is_valid) if valid.any()]
+    year_min = {data:int(years[valid].min()) for data, valid in zip(For[data_axis].values, is_valid) if valid.any()}
+    year_max = {data:int(years[valid].max()) for data, valid in zip(For[data_axis].values, is_valid) if valid.any()}
+
+    ## all chains complementing forward from a given ending year (memoized)
+    forward_chains = {}
+    def forward(end):
+        if end not in forward_chains:
+            candidates = [var for var in data_values if year_max[var] > end and year_min[var] < end] if end < indH else []
+            if len(candidates) == 0: forward_chains[end] = [[]]
+            else: forward_chains[end] = [[var] + chain for var in candidates for chain in forward(year_max[var])]
+        return forward_chains[end]
+
+    ## all chains complementing backward from a given starting year (memoized)
+    backward_chains = {}
+    def backward(start):
+        if start not in backward_chains:
+            candidates = [var for var in data_values if year_min[var] < start and year_max[var] > start] if start > indPI else []
+            if len(candidates) == 0: backward_chains[start] = [[]]
+            else: backward_chains[start] = [chain + [var] for var in candidates for chain in backward(year_min[var])]
+        return backward_chains[start]
+
+    ## combine all chains around each initial dataset
+    combi = []
     for data in data_values:
-        year_min[data] = int(For.sel({data_axis:data}).dropna('year', how='all').year.min())
-        year_max[data] = int(For.sel({data_axis:data}).dropna('year', how='all').year.max())
-
-    ## look for all combinations randomly!
-    combi = set()
-    n_loop = 0
-    while n_loop <= len(combi) * n_safe:
-        n_loop += 1
-
-        ## set initial dataset
-        data = random.choice([var for var in data_values if var not in ignored])
-        data_list = ['*'+data+'*']
-        years = [year_min[data], year_max[data]]
-
-        ## randomly complement forward
-        while max(years) < indH and any([year_max[var] > max(years) and year_min[var] < max(years) for var in data_values]):
-            data = random.choice([var for var in data_values if year_max[var] > max(years) and year_min[var] < max(years)])
-            data_list.append(data)
-            years[-1] = year_max[data]
-
-        ## randomly complement backward
-        while min(years) > indPI and any([year_min[var] < min(years) and year_max[var] > min(years) for var in data_values]):
-            data = random.choice([var for var in data_values if year_min[var] < min(years) and year_max[var] > min(years)])
-            data_list.insert(0, data)
-            years[0] = year_min[data]
-
-        ## add to pool of combinations
-        combi = combi | set([' '.join(data_list)])
-
-        ## safe breaking of while loop
-        if n_loop > n_safe*n_break:
-            break
+        if data not in ignored:
+            for chain_b in backward(year_min[data]):
+                for chain_f in forward(year_max[data]):
+                    combi.append(' '.join(chain_b + ['*'+data+'*'] + chain_f))
 
     ## return
     return combi
@@ -243,10 +493,19 @@ def check_combinations(For, inds, ignored=[], n_safe=2000, n_break=1000):
 ## 2.2. Create all cases
 ##======================
 
+## create all combinations of one task (defined at module level so it can be sent to worker processes)
+def _make_hist_task(task):
+    For1, inds, options, ignored = task
+    data_combi = [var.split(' ') for var in check_combinations(For1, inds=inds, ignored=ignored)]
+    return make_all_timeseries(For1, data_combi, **options)
+
+
 ## create all possible combinations for each driver
+## note: data axes (and halogenated species) are independent, so they can be processed concurrently in worker processes
 def create_hist_drivers(For, inds, ignored=['EDGAR-HYDEv13', 'EDGAR-HYDEv14'], 
     Xhalo_PI={'CF4':1950, 'C2F6':1950, 'HFC-23':1950, 'CH3Br':1950, 'CH3Cl':1950},
-    LCC_vars=['d_Acover', 'd_Anet', 'd_Agross']):
+    LCC_vars=['d_Acover', 'd_Anet', 'd_Agross'],
+    max_workers=1):
 
     '''
     Function to create historical drivers for OSCAR.
@@ -269,6 +528,11 @@ def create_hist_drivers(For, inds, ignored=['EDGAR-HYDEv13', 'EDGAR-HYDEv14'],
     LCC_vars (list)     list of variables that describe land-cover change;
                         this will be used to calculate preindustrial land-cover;
                         default = ['d_Acover', 'd_Anet', 'd_Agross']
+    max_workers (int)   maximum number of data axes (or halogenated species) processed concurrently (processes);
+                        if None, uses as many processes as CPUs;
+                        1 means sequential processing;
+                        WARNING: with more than 1, calling scripts need an "if __name__ == '__main__':" guard on spawn platforms (macOS, Windows);
+                        default = 1
     '''
 
     print('creating secondary historical drivers')
@@ -276,41 +540,33 @@ def create_hist_drivers(For, inds, ignored=['EDGAR-HYDEv13', 'EDGAR-HYDEv14'],
     ## get units
     units = {VAR:For[VAR].units for VAR in For if 'units' in For[VAR].attrs}
 
-    ## loop on data axes
-    For0 = []
+    ## prepare tasks on data axes
+    ## each task is (primary drivers, indexes for combinations, options of make_all_timeseries, ignored), listed under its data axis
+    ## halogenated species are separate tasks, listed in spc_halo order
+    tasks = {}
     for data_axis in [var for var in For.dims if 'data_' in var]:
 
         ## select subset of variables defined on data_axis
         For1 = For.drop([VAR for VAR in For if data_axis not in For[VAR].dims])
         For1 = For1.drop([var for var in For1.coords if all([var not in For1[VAR].coords for VAR in For1])])
 
-        ## actually create combinations
         ## 1. emissions (fossil fuel)
         if 'data_Eff' in data_axis:
             options = {'inds':inds, 'data_connect':'rel_change', 'missing_data':'trend', 'preindustrial':'zero', 'ref_length':5}
-            data_combi = [var.split(' ') for var in check_combinations(For1, inds=inds, ignored=ignored)]
-            For2 = [make_one_timeseries(For1, data_list, **options) for data_list in data_combi]
-            For0.append(xr.concat(For2, dim=data_axis))
+            tasks[data_axis] = [(For1, inds, options, ignored)]
 
         ## 2. emissions (halogenated)
         elif 'data_E_Xhalo' in data_axis:
-            For_tmp = []
+            tasks[data_axis] = []
             for spc in For1.spc_halo.values:
                 spc_inds = (inds[0], max(inds[1], Xhalo_PI[spc]) if str(spc) in Xhalo_PI.keys() else inds[1], inds[2])
                 options = {'inds':spc_inds, 'data_connect':'rel_change', 'missing_data':'cst', 'preindustrial':'offset', 'ref_length':1}
-                data_combi = [var.split(' ') for var in check_combinations(For1.sel(spc_halo=spc, drop=True), inds=inds, ignored=ignored)]
-                For2 = [make_one_timeseries(For1.sel(spc_halo=spc, drop=True), data_list, **options) for data_list in data_combi]
-                For_tmp.append(xr.concat(For2, dim=data_axis).expand_dims('spc_halo', -2).assign_coords(spc_halo=[spc]))
-            For_tmp = xr.concat(For_tmp, dim='spc_halo')
-            For_tmp.coords[data_axis.replace('data_','mask_')] = np.logical_not(For_tmp['E_Xhalo'].isnull().all([var for var in For_tmp.dims if var not in ['spc_halo', data_axis]]))
-            For0.append(For_tmp)            
+                tasks[data_axis].append((For1.sel(spc_halo=spc, drop=True), inds, options, ignored))
 
         ## 3. emissions (rest)
         elif 'data_E' in data_axis:
             options = {'inds':inds, 'data_connect':'rel_change', 'missing_data':'trend', 'preindustrial':'offset', 'ref_length':5}
-            data_combi = [var.split(' ') for var in check_combinations(For1, inds=inds, ignored=ignored)]
-            For2 = [make_one_timeseries(For1, data_list, **options) for data_list in data_combi]
-            For0.append(xr.concat(For2, dim=data_axis))
+            tasks[data_axis] = [(For1, inds, options, ignored)]
 
         ## 4. land-use
         ## note: options other than data_connect='raw' and missing_data='cst' will likely ruin data consistency!
@@ -321,26 +577,39 @@ def create_hist_drivers(For, inds, ignored=['EDGAR-HYDEv13', 'EDGAR-HYDEv14'],
                 VAR = [var for var in For1 if var in LCC_vars][0]
                 For1['Aland'] = For1[VAR].sum('bio_from', min_count=1).rename({'bio_to':'bio_land'}).cumsum('year') - For1[VAR].sum('bio_to', min_count=1).cumsum('year').rename({'bio_from':'bio_land'})
                 For1['Aland'] += For1.Aland_0 - For1['Aland'].sel(year=For1.Aland_0.year,drop=True)
-            data_combi = [var.split(' ') for var in check_combinations(For1, inds=inds, ignored=ignored)]
-            For2 = xr.concat([make_one_timeseries(For1.drop('Aland_0'), data_list, **options) for data_list in data_combi], dim=data_axis)
-            if len(LCC_vars) > 0:
-                For2['Aland_0'] = For2.Aland.sel(year=inds[0])
-                For2 = For2.drop('Aland')
-            For0.append(For2)
+            tasks[data_axis] = [(For1.drop('Aland_0'), inds, options, ignored)]
 
         ## 5. RF drivers (natural)
         elif 'data_RF_volc' in data_axis or 'data_RF_solar' in data_axis:
             options = {'inds':inds, 'data_connect':'rel_change', 'missing_data':'cst', 'preindustrial':'zero', 'ref_length':11}
-            data_combi = [var.split(' ') for var in check_combinations(For1, inds=inds, ignored=ignored)]
-            For2 = [make_one_timeseries(For1, data_list, **options) for data_list in data_combi]
-            For0.append(xr.concat(For2, dim=data_axis))
+            tasks[data_axis] = [(For1, inds, options, ignored)]
 
         ## 6. RF drivers (anthropogenic)
         elif 'data_RF' in data_axis:
             options = {'inds':inds, 'data_connect':'rel_change', 'missing_data':'trend', 'preindustrial':'zero', 'ref_length':5}
-            data_combi = [var.split(' ') for var in check_combinations(For1, inds=inds, ignored=ignored)]
-            For2 = [make_one_timeseries(For1, data_list, **options) for data_list in data_combi]
-            For0.append(xr.concat(For2, dim=data_axis))
+            tasks[data_axis] = [(For1, inds, options, ignored)]
+
+    ## actually create combinations (all tasks are independent)
+    results = iter(parallel_map(_make_hist_task, [task for data_axis in tasks for task in tasks[data_axis]], max_workers=max_workers, use_processes=True))
+
+    ## gather results per data axis
+    For0 = []
+    for data_axis in tasks:
+        For2 = [next(results) for _ in tasks[data_axis]]
+
+        ## halogenated species are stacked, and masked where undefined
+        if 'data_E_Xhalo' in data_axis:
+            For_tmp = xr.concat([For3.expand_dims('spc_halo', -2).assign_coords(spc_halo=[spc]) for For3, spc in zip(For2, For.spc_halo.values)], dim='spc_halo')
+            For_tmp.coords[data_axis.replace('data_','mask_')] = np.logical_not(For_tmp['E_Xhalo'].isnull().all([var for var in For_tmp.dims if var not in ['spc_halo', data_axis]]))
+            For0.append(For_tmp)
+
+        ## preindustrial land-cover is taken from the recomposed time-series
+        elif 'data_LULCC' in data_axis and len(LCC_vars) > 0:
+            For2[0]['Aland_0'] = For2[0].Aland.sel(year=inds[0])
+            For0.append(For2[0].drop('Aland'))
+
+        else:
+            For0.append(For2[0])
 
     ## merge all variables
     For0 = xr.merge(For0)
@@ -459,3 +728,31 @@ def create_scen_drivers(Hist, Scen, inds, data_connect='transition', trans_lengt
     ## return final dataset
     return For.fillna(0.)
 
+
+##################################################
+## 4. PACK LAND-USE DRIVERS
+##################################################
+
+## pack land-cover transitions of historical and scenario drivers onto their shared active pairs
+## note: this is done once drivers are created, as 'create_hist_drivers' needs the full 'bio_from' x 'bio_to' matrix
+def pack_LUC_drivers(Hist, Scen):
+    '''
+    Function to pack land-use drivers ('d_Acover', 'd_Ashift' and 'd_Hwood') onto the active ('bio_from', 'bio_to') pairs, for the 'packed_LUC' book-keeping.
+    
+    Input:
+    ------
+    Hist (xr.Dataset)       dataset containing secondary historical drivers
+    Scen (xr.Dataset)       dataset containing secondary scenario drivers
+
+    Output:
+    -------
+    Hist (xr.Dataset)       dataset containing packed historical drivers
+    Scen (xr.Dataset)       dataset containing packed scenario drivers;
+                            both are packed onto the same pairs (active in either), given by their 'bio_pair' axis
+    '''
+
+    ## shared pairs
+    pairs = get_LUC_pairs(Hist, Scen)
+
+    ## return packed datasets
+    return pack_LUC(Hist, pairs=pairs), pack_LUC(Scen, pairs=pairs)
@@ -21,8 +21,6 @@ import warnings
 import numpy as np
 import xarray as xr
 
-from scipy.stats import theilslopes
-
 from .fct_misc import extend_timeseries, lognorm_distrib_param
 
 
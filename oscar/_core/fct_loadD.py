@@ -53,12 +53,11 @@ import warnings
 import numpy as np
 import xarray as xr
 
-from .fct_misc import aggreg_region, group_scenarios
+from .fct_misc import aggreg_region, group_scenarios, parallel_map
 
 # Handle input path
+# (resolved when used, so that importing this module has no side effect)
 from .._io.paths import get_in_dir
-# Define the central input_data path for this file
-INPUT_PATH = get_in_dir()
 
 
 ##################################################
@@ -73,6 +72,7 @@ INPUT_PATH = get_in_dir()
 def load_emissions_hist(mod_region, 
     datasets=['ACCMIP', 'CDIAC', 'CEDS', 'EDGAR-HYDEv13', 'EDGAR-HYDEv14', 'EDGARv42', 'EDGARv42-FT2010', 'EDGARv432', 'EDGARv432-FT2016', 'EPA', 'Meinshausen_2011', 'PRIMAP'], 
     dropped_species=['PM10', 'PM2p5'], 
+    max_workers=4,
     **useless):
     '''
     Function to load and format primary historical emissions datasets, taken from the 'input_data' folder.
@@ -93,6 +93,9 @@ def load_emissions_hist(mod_region,
                                            'EPA', 'Meinshausen_2011', 'PRIMAP']
     dropped_species (list)      species to be excluded from the loaded datasets;
                                 default = ['PM10', 'PM2p5']
+    max_workers (int)           maximum number of datasets loaded concurrently (threads);
+                                1 means sequential loading;
+                                default = 4
     '''
 
     ## list of missing halogenated species taken from Meinshausen_2011
@@ -124,27 +127,19 @@ def load_emissions_hist(mod_region,
         'EPA':['agr5'], # slightly inconsistent as mixing e.g. agricultural waste burning & savannah burning
         'PRIMAP':['5']}
 
-    ## main loading loop
-    For0 = []
-    units = {}
-    for data in datasets:
+    ## loading function for one dataset
+    def load_one(data):
 
         ## load data if available
-        if os.path.isfile(INPUT_PATH / 'drivers' / f'emissions_{data}.nc'):
-            with xr.open_dataset(INPUT_PATH / 'drivers' / f'emissions_{data}.nc') as TMP: 
+        if os.path.isfile(get_in_dir() / 'drivers' / f'emissions_{data}.nc'):
+            with xr.open_dataset(get_in_dir() / 'drivers' / f'emissions_{data}.nc') as TMP: 
                 For1 = TMP.load()
 
         ## display message otherwise
         else: raise IOError('{0} not available'.format(data))
 
-        ## get and check units
-        for VAR in For1:
-            if 'units' in For1[VAR].attrs:
-                if VAR not in units.keys():
-                    units[VAR] = For1[VAR].units
-                else:
-                    if units[VAR] != For1[VAR].units:
-                        raise RuntimeWarning('inconsistent units: {0} (internal dic) vs. {1} ({2} in {3})'.format(units[VAR], For1[VAR].units, "'"+VAR+"'", "'"+data+"'"))
+        ## get units (checked later, in order of datasets)
+        file_units = {VAR:For1[VAR].units for VAR in For1 if 'units' in For1[VAR].attrs}
 
         ##---
 
@@ -198,9 +193,24 @@ def load_emissions_hist(mod_region,
         else:
             For1 = aggreg_region(For1, mod_region, old_axis='region', dataset=data)
 
-        ## append to final list (with new dimension)
-        For0.append(For1.expand_dims('data', -1).assign_coords(data=[data]))
-        del For1
+        ## return (with new dimension)
+        return For1.expand_dims('data', -1).assign_coords(data=[data]), file_units
+
+    ## main loading loop (over a bounded pool of workers; results kept in order of datasets)
+    For0 = []
+    units = {}
+    for data, (For1, file_units) in zip(datasets, parallel_map(load_one, datasets, max_workers=max_workers)):
+
+        ## check units
+        for VAR in file_units:
+            if VAR not in units.keys():
+                units[VAR] = file_units[VAR]
+            else:
+                if units[VAR] != file_units[VAR]:
+                    raise RuntimeWarning('inconsistent units: {0} (internal dic) vs. {1} ({2} in {3})'.format(units[VAR], file_units[VAR], "'"+VAR+"'", "'"+data+"'"))
+
+        ## append to final list
+        For0.append(For1)
 
     ## merge into one xarray
     For0 = xr.merge(For0)
@@ -283,8 +293,8 @@ def load_emissions_scen(mod_region,
     for data in datasets:
 
         ## load data if available
-        if os.path.isfile(INPUT_PATH / 'drivers' / f'emissions_{data}.nc'):
-            with xr.open_dataset(INPUT_PATH / 'drivers' / f'emissions_{data}.nc') as TMP: 
+        if os.path.isfile(get_in_dir() / 'drivers' / f'emissions_{data}.nc'):
+            with xr.open_dataset(get_in_dir() / 'drivers' / f'emissions_{data}.nc') as TMP: 
                 For1 = TMP.load()
 
         ## display message otherwise
@@ -412,6 +422,7 @@ def load_emissions_scen(mod_region,
 def load_landuse_hist(mod_region, 
     datasets=['LUH1', 'LUH1-TRENDYv4', 'LUH2', 'LUH2-TRENDYv8', 'Houghton_2017'],
     LCC='all',
+    max_workers=4,
     **useless):
     '''
     Function to load and format primary historical land-use datasets, taken from the 'input_data' folder.
@@ -431,29 +442,24 @@ def load_landuse_hist(mod_region,
     LCC (str)               which of 'gross' or 'net' land-cover transitions should be kept;
                             unless both are kept ('all'), the driver is renamed to 'd_Acover';
                             default = 'all'
+    max_workers (int)       maximum number of datasets loaded concurrently (threads);
+                            1 means sequential loading;
+                            default = 4
     '''
 
-    ## main loading loop
-    For0 = []
-    units = {}
-    for data in datasets:
+    ## loading function for one dataset
+    def load_one(data):
 
         ## load data if available
-        if os.path.isfile(INPUT_PATH / 'drivers' / f'land-use_{data}.nc'):
-            with xr.open_dataset(INPUT_PATH / 'drivers' / f'land-use_{data}.nc') as TMP: 
+        if os.path.isfile(get_in_dir() / 'drivers' / f'land-use_{data}.nc'):
+            with xr.open_dataset(get_in_dir() / 'drivers' / f'land-use_{data}.nc') as TMP: 
                 For1 = TMP.load()
 
         ## display message otherwise
         else: raise IOError('{0} not available'.format(data))
 
-        ## get and check units
-        for VAR in For1:
-            if 'units' in For1[VAR].attrs:
-                if VAR not in units.keys():
-                    units[VAR] = For1[VAR].units
-                else:
-                    if units[VAR] != For1[VAR].units:
-                        raise RuntimeWarning('inconsistent units: {0} (internal dic) vs. {1} ({2} in {3})'.format(units[VAR], For1[VAR].units, "'"+VAR+"'", "'"+data+"'"))
+        ## get units (checked later, in order of datasets)
+        file_units = {VAR:For1[VAR].units for VAR in For1 if 'units' in For1[VAR].attrs}
 
         ##---
 
@@ -488,9 +494,24 @@ def load_landuse_hist(mod_region,
         else:
             For1 = aggreg_region(For1, mod_region, old_axis='region', dataset=data)
 
+        ## return
+        return For1, file_units
+
+    ## main loading loop (over a bounded pool of workers; results kept in order of datasets)
+    For0 = []
+    units = {}
+    for data, (For1, file_units) in zip(datasets, parallel_map(load_one, datasets, max_workers=max_workers)):
+
+        ## check units
+        for VAR in file_units:
+            if VAR not in units.keys():
+                units[VAR] = file_units[VAR]
+            else:
+                if units[VAR] != file_units[VAR]:
+                    raise RuntimeWarning('inconsistent units: {0} (internal dic) vs. {1} ({2} in {3})'.format(units[VAR], file_units[VAR], "'"+VAR+"'", "'"+data+"'"))
+
         ## append to final list
         For0.append(For1)
-        del For1
 
     ## merge into one xarray
     For0 = xr.merge(For0)
@@ -543,8 +564,8 @@ def load_landuse_scen(mod_region,
     for data in datasets:
 
         ## load data if available
-        if os.path.isfile(INPUT_PATH / 'drivers' / f'land-use_{data}.nc'):
-            with xr.open_dataset(INPUT_PATH / 'drivers' / f'land-use_{data}.nc') as TMP: 
+        if os.path.isfile(get_in_dir() / 'drivers' / f'land-use_{data}.nc'):
+            with xr.open_dataset(get_in_dir() / 'drivers' / f'land-use_{data}.nc') as TMP: 
                 For1 = TMP.load()
 
         ## display message otherwise
@@ -609,6 +630,7 @@ def load_RFdrivers_hist(
     datasets=['radiative-forcing_AR5', 'volcanic-activity_CMIP6', 'solar-activity_CMIP6', 'aviation_ICAO'],
     extension={'RF_volc':'AOD550', 'RF_solar':'TSI', 'RF_contr':'dist_flown'}, 
     offset_volc=True,
+    max_workers=4,
     **useless):
     '''
     Function to load and format primary historical RF drivers datasets, taken from the 'input_data' folder.
@@ -631,32 +653,27 @@ def load_RFdrivers_hist(
                             default = {'RF_volc':'AOD550', 'RF_solar':'TSI', 'RF_contr':'dist_flown'}
     offset_volc (bool)      whether volcanoes forcing should be offset by the average of the whole time-series;
                             default = True
+    max_workers (int)       maximum number of datasets loaded concurrently (threads);
+                            1 means sequential loading;
+                            default = 4
     '''
 
-    ## main loading loop
-    For0 = []
-    units = {}
-    for data in datasets:
+    ## loading function for one dataset
+    def load_one(data):
 
         ## load data if available
-        if os.path.isfile(INPUT_PATH / 'drivers' / f'{data}.nc'):
-            with xr.open_dataset(INPUT_PATH / 'drivers' / f'{data}.nc') as TMP: 
+        if os.path.isfile(get_in_dir() / 'drivers' / f'{data}.nc'):
+            with xr.open_dataset(get_in_dir() / 'drivers' / f'{data}.nc') as TMP: 
                 For1 = TMP.load()
-        elif os.path.isfile(INPUT_PATH / 'observations' / f'{data}.nc'):
-            with xr.open_dataset(INPUT_PATH / 'observations' / f'{data}.nc') as TMP: 
+        elif os.path.isfile(get_in_dir() / 'observations' / f'{data}.nc'):
+            with xr.open_dataset(get_in_dir() / 'observations' / f'{data}.nc') as TMP: 
                 For1 = TMP.load()
 
         ## display message otherwise
         else: raise IOError('{0} not available'.format(data))
 
-        ## get and check units
-        for VAR in For1:
-            if 'units' in For1[VAR].attrs:
-                if VAR not in units.keys():
-                    units[VAR] = For1[VAR].units
-                else:
-                    if units[VAR] != For1[VAR].units:
-                        raise RuntimeWarning('inconsistent units: {0} (internal dic) vs. {1} ({2} in {3})'.format(units[VAR], For1[VAR].units, "'"+VAR+"'", "'"+data+"'"))
+        ## get units (checked later, in order of datasets)
+        file_units = {VAR:For1[VAR].units for VAR in For1 if 'units' in For1[VAR].attrs}
 
         ##---
 
@@ -685,9 +702,24 @@ def load_RFdrivers_hist(
         if not all(np.diff(For1.year.values) == 1):
             For1 = For1.interp({'year':np.arange(int(For1.year[0]), int(For1.year[-1])+1, 1)})
 
-        ## append to final list (with new dimension)
-        For0.append(For1.expand_dims('data', -1).assign_coords(data=[data[::-1][:data[::-1].find('_')][::-1]]))
-        del For1
+        ## return (with new dimension)
+        return For1.expand_dims('data', -1).assign_coords(data=[data[::-1][:data[::-1].find('_')][::-1]]), file_units
+
+    ## main loading loop (over a bounded pool of workers; results kept in order of datasets)
+    For0 = []
+    units = {}
+    for data, (For1, file_units) in zip(datasets, parallel_map(load_one, datasets, max_workers=max_workers)):
+
+        ## check units
+        for VAR in file_units:
+            if VAR not in units.keys():
+                units[VAR] = file_units[VAR]
+            else:
+                if units[VAR] != file_units[VAR]:
+                    raise RuntimeWarning('inconsistent units: {0} (internal dic) vs. {1} ({2} in {3})'.format(units[VAR], file_units[VAR], "'"+VAR+"'", "'"+data+"'"))
+
+        ## append to final list
+        For0.append(For1)
 
     ## merge into one xarray
     For0 = xr.merge(For0)
@@ -770,8 +802,8 @@ def load_RFdrivers_scen(
     for data in datasets:
 
         ## load data if available
-        if os.path.isfile(INPUT_PATH / 'drivers' / f'{data}.nc'):
-            with xr.open_dataset(INPUT_PATH / 'drivers' / f'{data}.nc') as TMP: 
+        if os.path.isfile(get_in_dir() / 'drivers' / f'{data}.nc'):
+            with xr.open_dataset(get_in_dir() / 'drivers' / f'{data}.nc') as TMP: 
                 For1 = TMP.load()
 
         ## display message otherwise
@@ -98,9 +98,9 @@ import xarray as xr
 from .fct_calib import calib_land_TRENDYv7
 
 # Handle input path
+# (resolved when used, so that importing this module has no side effect)
 from .._io.paths import get_in_dir
-# Define the central input_data path for this file
-INPUT_PATH = get_in_dir()
+from .._io._compilers import open_param_store
 
 
 ##################################################
@@ -177,8 +177,8 @@ def load_ocean_chem(**useless):
 def load_ocean_CMIP5(recalibrate=False, **useless):
 
     ## load from existing file
-    if os.path.isfile(INPUT_PATH / 'parameters' / 'from_OSCARv2' / 'ocean_CMIP5.nc') and not recalibrate:
-        with xr.open_dataset(INPUT_PATH / 'parameters' / 'from_OSCARv2' / 'ocean_CMIP5.nc') as TMP: Par = TMP.load()
+    if os.path.isfile(get_in_dir() / 'parameters' / 'from_OSCARv2' / 'ocean_CMIP5.nc') and not recalibrate:
+        with xr.open_dataset(get_in_dir() / 'parameters' / 'from_OSCARv2' / 'ocean_CMIP5.nc') as TMP: Par = TMP.load()
     ## otherwise, launch calibration
     else:
         raise RuntimeError('embedded calibration not available yet')
@@ -218,7 +218,10 @@ def load_land_misc(**useless):
 
 ## preindustrial land carbon-cycle
 ## calibrated on TRENDYv7 models
-def load_land_TRENDYv7(mod_region, recalibrate=False, path_in=INPUT_PATH / 'parameters', **useless):
+def load_land_TRENDYv7(mod_region, recalibrate=False, path_in=None, **useless):
+
+    ## default path
+    if path_in is None: path_in = get_in_dir() / 'parameters'
 
     ## load from existing file
     if os.path.isfile(path_in / f'land_TRENDYv7__{mod_region}.nc') and not recalibrate:
@@ -236,8 +239,8 @@ def load_land_TRENDYv7(mod_region, recalibrate=False, path_in=INPUT_PATH / 'para
 def load_land_CMIP5(mod_region, recalibrate=False, **useless):
 
     ## load from existing file
-    if os.path.isfile(INPUT_PATH / 'parameters' / 'from_OSCARv2' / f'land_CMIP5__{mod_region}.nc') and not recalibrate:
-        with xr.open_dataset(INPUT_PATH / 'parameters' / 'from_OSCARv2' / f'land_CMIP5__{mod_region}.nc') as TMP: Par = TMP.load()
+    if os.path.isfile(get_in_dir() / 'parameters' / 'from_OSCARv2' / f'land_CMIP5__{mod_region}.nc') and not recalibrate:
+        with xr.open_dataset(get_in_dir() / 'parameters' / 'from_OSCARv2' / f'land_CMIP5__{mod_region}.nc') as TMP: Par = TMP.load()
     ## otherwise, launch calibration
     else:
         raise RuntimeError('embedded calibration not available yet')
@@ -275,8 +278,8 @@ def load_land_wooduse(mod_region, recalibrate=False, **useless):
     ## other parameters
     ## (Earles et al., 2012; doi:10.1038/nclimate1535)
     ## load from existing file
-    if os.path.isfile(INPUT_PATH / 'parameters' / 'from_OSCARv2' / f'land_Earles_2012__{mod_region}.nc') and not recalibrate:
-        with xr.open_dataset(INPUT_PATH / 'parameters' / 'from_OSCARv2' / f'land_Earles_2012__{mod_region}.nc') as TMP: Par2 = TMP.load()
+    if os.path.isfile(get_in_dir() / 'parameters' / 'from_OSCARv2' / f'land_Earles_2012__{mod_region}.nc') and not recalibrate:
+        with xr.open_dataset(get_in_dir() / 'parameters' / 'from_OSCARv2' / f'land_Earles_2012__{mod_region}.nc') as TMP: Par2 = TMP.load()
     ## otherwise, launch calibration
     else:
         raise RuntimeError('embedded calibration not available yet')
@@ -292,8 +295,8 @@ def load_land_wooduse(mod_region, recalibrate=False, **useless):
 def load_land_GFED3(mod_region, recalibrate=False, **useless):
     
     ## load from existing file
-    if os.path.isfile(INPUT_PATH / 'parameters' / 'from_OSCARv2' / f'land_GFED3__{mod_region}.nc') and not recalibrate:
-        with xr.open_dataset(INPUT_PATH / 'parameters' / 'from_OSCARv2' / f'land_GFED3__{mod_region}.nc') as TMP: Par = TMP.load()
+    if os.path.isfile(get_in_dir() / 'parameters' / 'from_OSCARv2' / f'land_GFED3__{mod_region}.nc') and not recalibrate:
+        with xr.open_dataset(get_in_dir() / 'parameters' / 'from_OSCARv2' / f'land_GFED3__{mod_region}.nc') as TMP: Par = TMP.load()
     ## otherwise, launch calibration
     else:
         raise RuntimeError('embedded calibration not available yet')
@@ -388,8 +391,8 @@ def load_wetlands_WETCHIMP(mod_region, recalibrate=False, **useless):
     ## TODO: properly uncouple from land cover data
 
     ## load from existing file
-    if os.path.isfile(INPUT_PATH / 'parameters' / 'from_OSCARv2' / f'wetlands_WETCHIMP__{mod_region}.nc') and not recalibrate:
-        with xr.open_dataset(INPUT_PATH / 'parameters' / 'from_OSCARv2' / f'wetlands_WETCHIMP__{mod_region}.nc') as TMP: Par = TMP.load()
+    if os.path.isfile(get_in_dir() / 'parameters' / 'from_OSCARv2' / f'wetlands_WETCHIMP__{mod_region}.nc') and not recalibrate:
+        with xr.open_dataset(get_in_dir() / 'parameters' / 'from_OSCARv2' / f'wetlands_WETCHIMP__{mod_region}.nc') as TMP: Par = TMP.load()
     ## otherwise, launch calibration
     else:
         raise RuntimeError('embedded calibration not available yet')
@@ -462,8 +465,8 @@ def load_atmosphere_misc(**useless):
 def load_atmosphere_CCMVal2(recalibrate=False, **useless):
     
     ## load from existing file
-    if os.path.isfile(INPUT_PATH / 'parameters' / 'from_OSCARv2' / 'atmosphere_CCMVal2.nc') and not recalibrate:
-        with xr.open_dataset(INPUT_PATH / 'parameters' / 'from_OSCARv2' / 'atmosphere_CCMVal2.nc') as TMP: Par = TMP.load()
+    if os.path.isfile(get_in_dir() / 'parameters' / 'from_OSCARv2' / 'atmosphere_CCMVal2.nc') and not recalibrate:
+        with xr.open_dataset(get_in_dir() / 'parameters' / 'from_OSCARv2' / 'atmosphere_CCMVal2.nc') as TMP: Par = TMP.load()
     ## otherwise, launch calibration
     else:
         raise RuntimeError('embedded calibration not available yet')
@@ -664,8 +667,8 @@ def load_halo_lifetime(**useless):
 def load_regions_HTAP(mod_region, recalibrate=False, **useless):
     
     ## load from existing file
-    if os.path.isfile(INPUT_PATH / 'parameters' / 'from_OSCARv2' / f'regions_HTAP__{mod_region}.nc') and not recalibrate:
-        with xr.open_dataset(INPUT_PATH / 'parameters' / 'from_OSCARv2' / f'regions_HTAP__{mod_region}.nc') as TMP: Par = TMP.load()
+    if os.path.isfile(get_in_dir() / 'parameters' / 'from_OSCARv2' / f'regions_HTAP__{mod_region}.nc') and not recalibrate:
+        with xr.open_dataset(get_in_dir() / 'parameters' / 'from_OSCARv2' / f'regions_HTAP__{mod_region}.nc') as TMP: Par = TMP.load()
     ## otherwise, launch calibration
     else:
         raise RuntimeError('embedded calibration not available yet')
@@ -765,8 +768,8 @@ def load_O3t_regional(**useless):
 def load_O3t_response(recalibrate=False, **useless):
     
     ## load from existing file
-    if os.path.isfile(INPUT_PATH / 'parameters' / 'from_OSCARv2' / 'ozochem_ACCMIP.nc') and not recalibrate:
-        with xr.open_dataset(INPUT_PATH / 'parameters' / 'from_OSCARv2' / 'ozochem_ACCMIP.nc') as TMP: Par = TMP.load()
+    if os.path.isfile(get_in_dir() / 'parameters' / 'from_OSCARv2' / 'ozochem_ACCMIP.nc') and not recalibrate:
+        with xr.open_dataset(get_in_dir() / 'parameters' / 'from_OSCARv2' / 'ozochem_ACCMIP.nc') as TMP: Par = TMP.load()
     ## otherwise, launch calibration
     else:
         raise RuntimeError('embedded calibration not available yet')
@@ -926,8 +929,8 @@ def load_AER_regional(**useless):
 def load_AER_atmoload(recalibrate=False, **useless):
     
     ## load from existing file
-    if os.path.isfile(INPUT_PATH / 'parameters' / 'from_OSCARv2' / 'aerchem_ACCMIP.nc') and not recalibrate:
-        with xr.open_dataset(INPUT_PATH / 'parameters' / 'from_OSCARv2' / 'aerchem_ACCMIP.nc') as TMP: Par = TMP.load()
+    if os.path.isfile(get_in_dir() / 'parameters' / 'from_OSCARv2' / 'aerchem_ACCMIP.nc') and not recalibrate:
+        with xr.open_dataset(get_in_dir() / 'parameters' / 'from_OSCARv2' / 'aerchem_ACCMIP.nc') as TMP: Par = TMP.load()
     ## otherwise, launch calibration
     else:
         raise RuntimeError('embedded calibration not available yet')
@@ -1167,8 +1170,8 @@ def load_RFaer_indirect(**useless):
 def load_regions_Reddy_2007(mod_region, recalibrate=False, **useless):
     
     ## load from existing file
-    if os.path.isfile(INPUT_PATH / 'parameters' / 'from_OSCARv2' / f'regions_Reddy_2007__{mod_region}.nc') and not recalibrate:
-        with xr.open_dataset(INPUT_PATH / 'parameters' / 'from_OSCARv2' / f'regions_Reddy_2007__{mod_region}.nc') as TMP: Par = TMP.load()
+    if os.path.isfile(get_in_dir() / 'parameters' / 'from_OSCARv2' / f'regions_Reddy_2007__{mod_region}.nc') and not recalibrate:
+        with xr.open_dataset(get_in_dir() / 'parameters' / 'from_OSCARv2' / f'regions_Reddy_2007__{mod_region}.nc') as TMP: Par = TMP.load()
     ## otherwise, launch calibration
     else:
         raise RuntimeError('embedded calibration not available yet')
@@ -1224,8 +1227,8 @@ def load_RFlcc_all(mod_region, recalibrate=False, **useless):
     ## other parameters
     ## /!\ compiled from various land cover, albedo and radiative flux climatologies
     ## load from existing file
-    if os.path.isfile(INPUT_PATH / 'parameters' / 'from_OSCARv2' / f'albedo_all__{mod_region}.nc') and not recalibrate:
-        with xr.open_dataset(INPUT_PATH / 'parameters' / 'from_OSCARv2' / f'albedo_all__{mod_region}.nc') as TMP: Par2 = TMP.load()
+    if os.path.isfile(get_in_dir() / 'parameters' / 'from_OSCARv2' / f'albedo_all__{mod_region}.nc') and not recalibrate:
+        with xr.open_dataset(get_in_dir() / 'parameters' / 'from_OSCARv2' / f'albedo_all__{mod_region}.nc') as TMP: Par2 = TMP.load()
     ## otherwise, launch calibration
     else:
         raise RuntimeError('embedded calibration not available yet')
@@ -1301,8 +1304,8 @@ def load_RF_atmfrac(**useless):
 def load_temp_CMIP5(mod_region, use_CMIP6_global=True, recalibrate=False, **useless):
 
     ## load from existing file
-    if os.path.isfile(INPUT_PATH / 'parameters' / 'from_OSCARv2' / f'temp_CMIP5__{mod_region}.nc') and not recalibrate:
-        with xr.open_dataset(INPUT_PATH / 'parameters' / 'from_OSCARv2' / f'temp_CMIP5__{mod_region}.nc') as TMP: Par = TMP.load()
+    if os.path.isfile(get_in_dir() / 'parameters' / 'from_OSCARv2' / f'temp_CMIP5__{mod_region}.nc') and not recalibrate:
+        with xr.open_dataset(get_in_dir() / 'parameters' / 'from_OSCARv2' / f'temp_CMIP5__{mod_region}.nc') as TMP: Par = TMP.load()
     ## otherwise, launch calibration
     else:
         raise RuntimeError('embedded calibration not available yet')
@@ -1346,8 +1349,8 @@ def load_temp_CMIP5(mod_region, use_CMIP6_global=True, recalibrate=False, **usel
 def load_prec_CMIP5(mod_region, recalibrate=False, **useless):
 
     ## load from existing file
-    if os.path.isfile(INPUT_PATH / 'parameters' / 'from_OSCARv2' / f'prec_CMIP5__{mod_region}.nc') and not recalibrate:
-        with xr.open_dataset(INPUT_PATH / 'parameters' / 'from_OSCARv2' / f'prec_CMIP5__{mod_region}.nc') as TMP: Par = TMP.load()
+    if os.path.isfile(get_in_dir() / 'parameters' / 'from_OSCARv2' / f'prec_CMIP5__{mod_region}.nc') and not recalibrate:
+        with xr.open_dataset(get_in_dir() / 'parameters' / 'from_OSCARv2' / f'prec_CMIP5__{mod_region}.nc') as TMP: Par = TMP.load()
     ## otherwise, launch calibration
     else:
         raise RuntimeError('embedded calibration not available yet')
@@ -1402,7 +1405,7 @@ def load_pH_all(**useless):
 ##################################################
 
 ## wrapping function
-def load_all_param(mod_region, recalibrate=False):
+def load_all_param(mod_region, recalibrate=False, use_store=True):
     '''
     Wrapper function to load all primary parameters.
     
@@ -1419,6 +1422,11 @@ def load_all_param(mod_region, recalibrate=False):
     recalibrate (bool)      whether to recalibrate all possible parameters;
                             WARNING: currently not working;
                             default = False
+    use_store (bool)        whether to use the compiled per-region store;
+                            it is rebuilt only if input files or loading code change;
+                            the returned dataset is then opened lazily;
+                            ignored if recalibrate = True;
+                            default = True
     '''
 
     print('loading primary parameters')
@@ -1445,6 +1453,13 @@ def load_all_param(mod_region, recalibrate=False):
         load_OHC_all,
         load_pH_all]
     
-    ## return all
-    return xr.merge([load(mod_region=mod_region, recalibrate=recalibrate) for load in load_list])
+    ## merge all
+    def merge_all():
+        return xr.merge([load(mod_region=mod_region, recalibrate=recalibrate) for load in load_list])
+
+    ## return compiled store if possible
+    if use_store and not recalibrate:
+        return open_param_store(mod_region, builder=merge_all)
+    else:
+        return merge_all()
 
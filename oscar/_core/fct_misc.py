@@ -19,31 +19,120 @@ The fact that you are presently reading this means that you have had knowledge o
 import os
 import csv
 import warnings
+import functools
+import concurrent.futures
 import numpy as np
 import xarray as xr
-import scipy.odr as odr
-import matplotlib.pyplot as plt
 
 # Handle input path
+# (resolved when used, so that importing this module has no side effect)
 from .._io.paths import get_in_dir
-# Define the central input_data path for this file
-INPUT_PATH = get_in_dir()
+from .._io._catalog import get_catalog
 
 
 ##################################################
 ##   A. ODR FIT ROUTINES
 ##################################################
 
-## rolling mean function
-def rolling_mean(da, time_axis, time_len):
-    return da.rolling({time_axis: time_len}, center=True).mean().dropna(time_axis).values
+## rolling mean and std of all complete windows, using cumulative sums
+def rolling_stats(data, time_len, min_cv, axis=-1):
+    '''
+    Function to calculate rolling mean and std (ddof=0) over all complete windows of many time-series at once.
+    Same values as xarray centred rolling mean and std (up to round-off), but windows containing NaN are kept as NaN instead of being dropped.
+    
+    Input:
+    ------
+    data (np.ndarray)       time-series
+    time_len (int)          length of the rolling window
+    min_cv (float)          value of minimum relative uncertainty for the rolling std
+        
+    Output:
+    -------
+    mean (np.ndarray)       rolling mean, with length(axis) - time_len + 1 windows along axis
+    std (np.ndarray)        rolling std, same shape as mean
+
+    Options:
+    --------
+    axis (int)              time axis;
+                            default = -1
+    '''
+
+    ## centre data (limits round-off errors of cumulative sums)
+    X = np.moveaxis(np.asarray(data, dtype=float), axis, -1)
+    with warnings.catch_warnings():
+        warnings.filterwarnings('ignore')
+        X0 = np.nan_to_num(np.nanmean(X, -1, keepdims=True))
+    is_nan = np.isnan(X)
+    X = np.where(is_nan, 0., X - X0)
+
+    ## window sums from cumulative sums
+    def window_sum(Z):
+        C = np.concatenate([np.zeros(Z.shape[:-1] + (1,)), np.cumsum(Z, -1)], -1)
+        return C[..., time_len:] - C[..., :-time_len]
+    mean = window_sum(X) / time_len
+    var = np.maximum(window_sum(X**2) / time_len - mean**2, 0.)
+    invalid = window_sum(is_nan.astype(float)) > 0
+
+    ## add offset back and apply minimum uncertainty
+    mean = np.where(invalid, np.nan, mean + X0)
+    std = np.maximum(np.where(invalid, np.nan, np.sqrt(var)), min_cv * mean)
+    return np.moveaxis(mean, -1, axis), np.moveaxis(std, -1, axis)
+
+
+## format data of one ODR fit (rolling values flattened over scenarios)
+def _prepare_odr(data_x, data_y, par_fg, par_lb, par_ub, y_func, y_jacb=None, y_jacx=None, 
+    std_x=True, std_y=True, time_axis='year', time_len=5, min_cv=1E-6, scen_axis='scen', scen_skip=[], cache=None):
+    assert len(par_fg) == len(par_lb) == len(par_ub)
+
+    ## rolling values of one data array (cached per data array, as the same data is often used in several fits)
+    def stats(da):
+        key = (id(da), time_axis, time_len, min_cv, scen_axis, tuple(scen_skip))
+        if cache is None or key not in cache:
+            scens = [scen for scen in da[scen_axis].values if scen not in scen_skip]
+            mean, std = rolling_stats(da.sel({scen_axis: scens}).transpose(scen_axis, time_axis).values, time_len=time_len, min_cv=min_cv)
+            out = (mean[~np.isnan(mean)], std[~np.isnan(std)])
+            if cache is None: return out
+            cache[key] = (da, out)
+        return cache[key][1]
+
+    ## format data
+    x = [stats(da)[0] for da in data_x]
+    if len(x) == 1: x = [x[0], 0 * x[0]] # weird fix because of odr
+    y = stats(data_y)[0] if data_y is not None else True
+    sx = [stats(da)[1] for da in data_x] if std_x else None
+    if sx is not None and len(sx) == 1: sx = [sx[0], min_cv * x[0]] # weird fix because of odr
+    sy = stats(data_y)[1] if std_y and data_y is not None else None
+
+    ## return everything needed by the fit
+    return {'x':x, 'y':y, 'sx':sx, 'sy':sy, 'implicit':data_y is None, 'par_fg':par_fg, 'par_lb':par_lb, 'par_ub':par_ub, 
+        'y_func':y_func, 'y_jacb':y_jacb, 'y_jacx':y_jacx}
+
+
+## run one ODR fit on formatted data (top-level, so it can be sent to worker processes)
+def _run_odr(prob):
+
+    ## heavy dependency (imported on use)
+    import scipy.odr as odr
+
+    ## conversions between beta and parameters
+    p_ = lambda b, pmin, pmax: pmin + (pmax - pmin) / (1 + np.exp(-b))
+    b_ = lambda p, pmin, pmax: np.log((p - pmin) / (pmax - p))
+    dp_db = lambda b, pmin, pmax: (pmax - pmin) * np.exp(-b) / (1 + np.exp(-b))**2
 
+    ## shortcut functions
+    y_func, y_jacb, y_jacx = prob['y_func'], prob['y_jacb'], prob['y_jacx']
+    F = lambda f_, alpha: [pmin if pmin==pmax else f_(a, pmin, pmax) for a, pmin, pmax in zip(alpha, prob['par_lb'], prob['par_ub'])]
 
-## rolling std function
-def rolling_std(da, time_axis, time_len, min_cv):
-    min_std = min_cv * rolling_mean(da, time_axis=time_axis, time_len=time_len)
-    std = da.rolling({time_axis: time_len}, center=True).std().dropna(time_axis).values    
-    return np.maximum(std, min_std)
+    ## define data and model
+    data = odr.RealData(x=prob['x'], y=prob['y'], sx=prob['sx'], sy=prob['sy'])
+    func = lambda beta, x: y_func(F(p_, beta), x)
+    jacb = (lambda beta, x: y_jacb(F(p_, beta), x) * np.array(F( dp_db, beta))[:, np.newaxis]) if y_jacb is not None else None
+    jacx = (lambda beta, x: y_jacx(F(p_, beta), x)) if y_jacx is not None else None
+    model = odr.Model(func, jacb, jacx, implicit=prob['implicit'])
+
+    ## ODR fit and return
+    odr_out = odr.ODR(data, model, beta0=F(b_, prob['par_fg'])).run()
+    return F(p_, odr_out.beta)
 
 
 ## wrapping function for ODR fit
@@ -86,36 +175,43 @@ def fit_odr(data_x, data_y, par_fg, par_lb, par_ub, y_func, y_jacb=None, y_jacx=
     scen_skip (list)        list of scenarios/experiments to be ignored by the fit;
                             default = []
     '''
-    assert len(par_fg) == len(par_lb) == len(par_ub)
+    return _run_odr(_prepare_odr(data_x, data_y, par_fg, par_lb, par_ub, y_func, y_jacb=y_jacb, y_jacx=y_jacx, 
+        std_x=std_x, std_y=std_y, time_axis=time_axis, time_len=time_len, min_cv=min_cv, scen_axis=scen_axis, scen_skip=scen_skip))
 
-    ## conversions between beta and parameters
-    p_ = lambda b, pmin, pmax: pmin + (pmax - pmin) / (1 + np.exp(-b))
-    b_ = lambda p, pmin, pmax: np.log((p - pmin) / (pmax - p))
-    dp_db = lambda b, pmin, pmax: (pmax - pmin) * np.exp(-b) / (1 + np.exp(-b))**2
 
-    ## shortcut functions
-    F = lambda f_, alpha: [pmin if pmin==pmax else f_(a, pmin, pmax) for a, pmin, pmax in zip(alpha, par_lb, par_ub)]
-    mean = lambda da: rolling_mean(da, time_axis=time_axis, time_len=time_len)
-    std = lambda da: rolling_std(da, time_axis=time_axis, time_len=time_len, min_cv=min_cv)
+## batched ODR fits (many independent problems at once)
+def fit_odr_batch(problems, max_workers=None, use_processes=False, **options):
+    '''
+    Function to execute many independent ODR fits at once (e.g. over regions, biomes and models).
+    Rolling values of all problems are calculated first (once per data array), then fits are run on a pool of workers.
+    
+    Input:
+    ------
+    problems (list)         list of dict, each with the arguments of fit_odr for one fit;
+                            at least data_x, data_y, par_fg, par_lb, par_ub and y_func
+        
+    Output:
+    -------
+    par_out (list)          list of output parameters values, in the order of problems
 
-    ## format data
-    x = [np.hstack([mean(da.sel({scen_axis: scen}, drop=True)) for scen in da.scen if scen not in scen_skip]) for da in data_x]
-    if len(x) == 1: x = [x[0], 0 * x[0]] # weird fix because of odr
-    y = np.hstack([mean(data_y.sel({scen_axis: scen}, drop=True)) for scen in data_y.scen if scen not in scen_skip]) if data_y is not None else True
-    sx = [np.hstack([std(da.sel({scen_axis: scen}, drop=True)) for scen in da.scen if scen not in scen_skip]) for da in data_x] if std_x else None
-    if len(sx) == 1: sx = [sx[0], min_cv * x[0]] # weird fix because of odr
-    sy = np.hstack([std(data_y.sel({scen_axis: scen}, drop=True)) for scen in data_y.scen if scen not in scen_skip]) if std_x else None
-    data = odr.RealData(x=x, y=y, sx=sx, sy=sy)
+    Options:
+    --------
+    max_workers (int)       maximum number of concurrent fits (see parallel_map);
+                            default = None
+    use_processes (bool)    whether to use processes instead of threads;
+                            y_func, y_jacb and y_jacx must then be picklable (e.g. not lambda functions);
+                            default = False
+    **options               options of fit_odr shared by all problems;
+                            values given in a problem take precedence
+    '''
 
-    ## define model
-    func = lambda beta, x: y_func(F(p_, beta), x)
-    jacb = (lambda beta, x: y_jacb(F(p_, beta), x) * np.array(F( dp_db, beta))[:, np.newaxis]) if y_jacb is not None else None
-    jacx = (lambda beta, x: y_jacx(F(p_, beta), x)) if y_jacx is not None else None
-    model = odr.Model(func, jacb, jacx, implicit=True if data_y is None else False)
+    ## format data of all problems (with shared cache of rolling values)
+    cache = {}
+    prepared = [_prepare_odr(**{**options, **problem, 'cache':cache}) for problem in problems]
+    del cache
 
-    ## ODR fit and return
-    odr_out = odr.ODR(data, model, beta0=F(b_, par_fg)).run()
-    return F(p_, odr_out.beta)
+    ## run all fits
+    return parallel_map(_run_odr, prepared, max_workers=max_workers, use_processes=use_processes)
     
 
 ## checking and plotting fit
@@ -143,6 +239,7 @@ def check_odr(data_x, data_y, par_bg, y_func,
 
     ## optional plot (to be refined!)
     if plot_ax is not None:
+        import matplotlib.pyplot as plt
         plt.style.use('seaborn-colorblind')
         ## plot data
         plt.plot(x_ref[0].year, y_ref, marker='+', ls='none', ms=4, alpha=0.8)
@@ -181,6 +278,52 @@ def lognorm_distrib_param(mean, std):
 ##   C. REGIONAL AGGREGATION
 ##################################################
 
+## load region mapping files (cached per input folder, aggregation and file versions)
+@functools.lru_cache(maxsize=32)
+def load_region_mapping(regions_dir, mod_region, stamp=None):
+    '''
+    Function to read the dictionaries mapping ISO (or dataset-specific) regions to OSCAR regions.
+    The 'stamp' argument is only used as cache key, so that edited files are read again.
+    '''
+
+    ## region mapping files to be loaded
+    list_load = [zou for zou in os.listdir(regions_dir) if all([_  in zou for _ in ['dico_', '.csv']])]
+
+    ## load and create combined dictionary
+    dico = {}
+    for zou in list_load:
+        with open(regions_dir / zou) as f: TMP = np.array([line for line in csv.reader(f)])
+        ## ISO-formated regions
+        if 'ISO' in zou: 
+            dico = {**dico, **{int(key):int(val) for key, val in zip(TMP[1:,0], TMP[1:,TMP[0,:].tolist().index(mod_region)])}}
+        ## dataset-specific regions
+        else: 
+            dico = {**dico, **{(key0, key1):int(val) for key0, key1, val in zip(TMP[1:,0], TMP[1:,1], TMP[1:,TMP[0,:].tolist().index(mod_region)])}}
+
+    ## load long region names
+    with open(regions_dir / 'regions_long_name.csv') as f: 
+        TMP = np.array([line for line in csv.reader(f)])
+    long_name = {n:name for n, name in enumerate(TMP[1:,TMP[0,:].tolist().index(mod_region)])}
+
+    return dico, long_name
+
+
+## sparse aggregation matrix from old to new regions (cached per mapping and old regional axis)
+@functools.lru_cache(maxsize=128)
+def region_matrix(regions_dir, mod_region, stamp, dataset, old_regions):
+    '''
+    Function to create the (new x old) sparse matrix of region membership, and the sorted new regions.
+    '''
+    import scipy.sparse as sparse
+    dico, _ = load_region_mapping(regions_dir, mod_region, stamp)
+    if dataset is None: new_of_old = np.array([dico[reg] for reg in old_regions])
+    else: new_of_old = np.array([dico[(dataset, reg)] for reg in old_regions])
+    new_regions = np.unique(new_of_old)
+    matrix = sparse.csr_matrix((np.ones(len(old_regions)), (np.searchsorted(new_regions, new_of_old), np.arange(len(old_regions)))), 
+        shape=(len(new_regions), len(old_regions)))
+    return matrix, new_regions
+
+
 ## aggregate regional data to OSCAR regions
 ## /!\ WARNING: translated regions that are not in input data will not appear in output data (i.e. might have to use combine_first instead of merge, with the output data)
 def aggreg_region(ds_in, mod_region, weight_var={}, old_axis='reg_iso', new_axis='reg_land', time_axis='year', dataset=None):
@@ -217,28 +360,15 @@ def aggreg_region(ds_in, mod_region, weight_var={}, old_axis='reg_iso', new_axis
     ## check old axis in ds_in and new_axis not in ds_in
     assert old_axis in ds_in.coords and new_axis not in ds_in.coords
     
-    ## make deep copy to be safe
-    ds_out = ds_in.copy(deep=True)
-
-    ## region mapping files to be loaded
-    list_load = [zou for zou in os.listdir(INPUT_PATH / 'regions') if all([_  in zou for _ in ['dico_', '.csv']])]
-
-    ## load and create combined dictionary
-    dico = {}
-    for zou in list_load:
-        with open(INPUT_PATH / 'regions' / zou) as f: TMP = np.array([line for line in csv.reader(f)])
-        ## ISO-formated regions
-        if 'ISO' in zou: 
-            dico = {**dico, **{int(key):int(val) for key, val in zip(TMP[1:,0], TMP[1:,TMP[0,:].tolist().index(mod_region)])}}
-        ## dataset-specific regions
-        else: 
-            dico = {**dico, **{(key0, key1):int(val) for key0, key1, val in zip(TMP[1:,0], TMP[1:,1], TMP[1:,TMP[0,:].tolist().index(mod_region)])}}
-
-    ## load long region names
-    with open(INPUT_PATH / 'regions' / 'regions_long_name.csv') as f: 
-        TMP = np.array([line for line in csv.reader(f)])
-    long_name = {n:name for n, name in enumerate(TMP[1:,TMP[0,:].tolist().index(mod_region)])}
-
+    ## make shallow copy (data arrays are never modified in place)
+    ds_out = ds_in.copy()
+
+    ## get cached region mapping (files are read again only if modified)
+    regions_dir = get_in_dir() / 'regions'
+    stamp = tuple(sorted((f.name, f.stat().st_mtime_ns) for f in os.scandir(regions_dir) if f.name.endswith('.csv')))
+    _, long_name = load_region_mapping(regions_dir, mod_region, stamp)
+    matrix, new_regions = region_matrix(regions_dir, mod_region, stamp, dataset, tuple(ds_out[old_axis].values.tolist()))
+    
     ## apply weights to weighted variables
     for var in weight_var:
         ds_out[var] = ds_out[var] * ds_out[weight_var[var]]
@@ -247,12 +377,21 @@ def aggreg_region(ds_in, mod_region, weight_var={}, old_axis='reg_iso', new_axis
     ds_non = ds_out.drop([var for var in ds_out if old_axis in ds_out[var].dims] + [old_axis])
     ds_out = ds_out.drop([var for var in ds_out if old_axis not in ds_out[var].dims])
 
-    ## new regional aggregation
-    if dataset is None: 
-        ds_out.coords[new_axis] = xr.DataArray([dico[reg] for reg in ds_out[old_axis].values], dims=old_axis)
-    else: 
-        ds_out.coords[new_axis] = xr.DataArray([dico[(dataset, reg)] for reg in ds_out[old_axis].values], dims=old_axis)
-    ds_out = ds_out.groupby(new_axis).sum(old_axis, min_count=1, keep_attrs=True)
+    ## new regional aggregation (as sparse matrix product along old axis; NaN if no valid value, like sum with min_count=1)
+    ds_agg = xr.Dataset(coords={new_axis: new_regions}, attrs=ds_out.attrs)
+    for var in ds_out:
+        da = ds_out[var]
+        axis = da.get_axis_num(old_axis)
+        X = np.moveaxis(da.values, axis, 0)
+        shape = X.shape
+        X = X.reshape(shape[0], -1)
+        is_valid = ~np.isnan(X)
+        val = matrix @ np.where(is_valid, X, 0.)
+        val[(matrix @ is_valid.astype(float)) == 0] = np.nan
+        val = np.moveaxis(val.reshape((len(new_regions),) + shape[1:]), 0, axis)
+        ds_agg[var] = xr.DataArray(val, dims=[new_axis if dim == old_axis else dim for dim in da.dims], 
+            coords={dim: da[dim] for dim in da.dims if dim != old_axis and dim in da.coords}, attrs=da.attrs)
+    ds_out = ds_agg
     ds_out.coords[new_axis + '_long_name'] = xr.DataArray([long_name[reg] for reg in ds_out[new_axis].values], dims=new_axis)
 
     ## remove weights
@@ -277,33 +416,40 @@ def aggreg_region(ds_in, mod_region, weight_var={}, old_axis='reg_iso', new_axis
 ##################################################
 
 ## general loading function
-def load_data(name):
+def load_data(name, variables=None):
     '''
     Convenience function to load any dataset in the 'input_data' folder.
+    Files are looked up in the persistent input catalog, so the folder is not walked at every call.
     
     Input:
     ------
-    name (str)      part of file name -- must be unique to work
+    name (str)          part of file name -- must be unique to work
         
     Output:
     -------
-    (xr.Dataset)    loaded dataset
+    (xr.Dataset)        loaded dataset
+
+    Options:
+    --------
+    variables (list)    data variables to load (coordinates are always loaded);
+                        if None, all variables are loaded;
+                        default = None
     '''
 
-    ## lists all available files
-    list_files = [os.path.join(dp, f) for dp, dn, fn in os.walk(INPUT_PATH) for f in fn if f[-3:] == '.nc']
-    
-    ## check compatible files
-    okay_files = [f for f in list_files if name in f]
+    ## find file in catalog (error if no file or not unique)
+    path, entry = get_catalog(get_in_dir()).find(name)
 
-    ## error if no file or not unique
-    if len(okay_files) == 0:
-        raise RuntimeError("no files were found (input name = '{0}')".format(name))
-    elif len(okay_files) > 1:
-        raise RuntimeError("more than one file was found (input name = '{0}')".format(name))
+    ## skip unwanted variables
+    if variables is not None:
+        missing = [var for var in variables if var not in entry['data_vars']]
+        if len(missing) > 0:
+            raise RuntimeError("variables not found in file (input name = '{0}'; missing = {1})".format(name, missing))
+        drop = [var for var in entry['data_vars'] if var not in variables]
+    else:
+        drop = None
 
     ## return loaded file otherwise
-    with xr.open_dataset(okay_files[0]) as TMP: 
+    with xr.open_dataset(path, drop_variables=drop) as TMP: 
         return TMP.load()
 
 
@@ -414,6 +560,63 @@ def extend_timeseries(ref, ext, direction, time_axis='year', juxtaposition=False
     return new
 
 
+## median of pairwise slopes (Theil-Sen) along one axis, for all other axes at once
+def theil_sen_slope(y, x=None, axis=-1):
+    '''
+    Function to calculate Theil-Sen slopes (median of pairwise slopes) of many short time-series at once.
+    Results are the same as scipy.stats.theilslopes(y, x)[0] applied to each 1D slice;
+    notably, the slope is NaN if a slice contains NaN or less than two points.
+    Memory scales with the square of the axis length, so this is meant for short windows (e.g. 5 years).
+    
+    Input:
+    ------
+    y (np.ndarray)          values
+        
+    Output:
+    -------
+    slope (np.ndarray)      slopes, with the same shape as y without axis
+
+    Options:
+    --------
+    x (np.ndarray)          coordinates along axis; either 1D or broadcastable to y;
+                            points where x is NaN are ignored (this allows windows of different length);
+                            if None, uses 0, 1, 2...;
+                            default = None
+    axis (int)              axis along which slopes are calculated;
+                            default = -1
+    '''
+
+    ## move axis last and broadcast x
+    y = np.moveaxis(np.asarray(y, dtype=float), axis, -1)
+    if x is None: 
+        x = np.arange(y.shape[-1], dtype=float)
+    elif np.ndim(x) == 1: 
+        x = np.asarray(x, dtype=float)
+    else: 
+        x = np.moveaxis(np.broadcast_to(np.asarray(x, dtype=float), np.moveaxis(y, -1, axis).shape), axis, -1)
+    x = np.broadcast_to(x, y.shape)
+
+    ## all pairwise slopes (pairs with equal or NaN x are excluded)
+    i, j = np.triu_indices(y.shape[-1], 1)
+    if len(i) == 0:
+        return np.full(y.shape[:-1], np.nan)
+    dx, dy = x[..., j] - x[..., i], y[..., j] - y[..., i]
+    valid = (dx != 0) & ~np.isnan(dx)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slopes = np.where(valid, dy / dx, np.inf)
+
+    ## median over valid pairs (excluded pairs are sorted last)
+    slopes.sort(axis=-1)
+    n_pair = valid.sum(-1, keepdims=True)
+    lo = np.take_along_axis(slopes, np.maximum(n_pair - 1, 0) // 2, -1)[..., 0]
+    hi = np.take_along_axis(slopes, np.minimum(n_pair // 2, len(i) - 1), -1)[..., 0]
+    slope = (lo + hi) / 2
+
+    ## NaN if any point is NaN or if there is no pair
+    has_nan = (np.isnan(y) & ~np.isnan(x)).any(-1)
+    return np.where(has_nan | (n_pair[..., 0] == 0), np.nan, slope)
+
+
 ##################################################
 ##   F. GROUP CONSISTENT SCENARIOS
 ##################################################
@@ -485,3 +688,176 @@ def group_scenarios(ds_in, scen_axis='scen', time_axis='year', group_scen=[], de
     ## return (cleaned dataset)
     return ds_out.dropna(time_axis, how='all')
 
+
+
+##################################################
+##   G. PARALLEL EXECUTION
+##################################################
+
+## map function over items using a bounded pool of workers
+def parallel_map(func, items, max_workers=None, use_processes=False):
+    '''
+    Function to apply 'func' to each of 'items' concurrently. Results are returned in the order of 'items',
+    and the first exception raised by a worker is raised again here.
+    
+    Input:
+    ------
+    func (callable)         function of one argument
+    items (iterable)        arguments to be passed to func
+        
+    Output:
+    -------
+    (list)                  results of func for each item
+
+    Options:
+    --------
+    max_workers (int)       maximum number of concurrent workers;
+                            if None, uses as many workers as items (up to the number of CPUs);
+                            if 1, items are processed sequentially in the calling process;
+                            default = None
+    use_processes (bool)    whether to use processes instead of threads;
+                            func and items (and results) must then be picklable;
+                            default = False
+    '''
+    
+    ## number of workers
+    items = list(items)
+    if max_workers is None:
+        max_workers = min(len(items), os.cpu_count() or 1)
+
+    ## sequential execution
+    if max_workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+
+    ## concurrent execution (map keeps input order)
+    Executor = concurrent.futures.ProcessPoolExecutor if use_processes else concurrent.futures.ThreadPoolExecutor
+    with Executor(max_workers=max_workers) as pool:
+        return list(pool.map(func, items))
+
+
+##################################################
+##   H. PACKED LAND-COVER TRANSITIONS
+##################################################
+
+## pack land-cover transitions onto their active ('bio_from', 'bio_to') pairs
+def pack_LUC(ds_in, pairs=None, pair_axis='bio_pair'):
+    '''
+    Function to pack the 'bio_from' x 'bio_to' matrix of land-use drivers onto one axis of active transitions.
+    Most transitions are nil in all regions and years (e.g. Urban to Forest), so that the packed axis is much shorter than the matrix.
+    
+    Input:
+    ------
+    ds_in (xr.Dataset)      dataset of land-use drivers; all variables over both 'bio_from' and 'bio_to' are packed,
+                            and 'd_Hwood' (over 'bio_land') is put on the diagonal pairs
+        
+    Output:
+    -------
+    ds_out (xr.Dataset)     dataset with packed variables over pair_axis;
+                            the origin and destination biomes of each pair are given by 'bio_from' and 'bio_to' coordinates along pair_axis
+
+    Options:
+    --------
+    pairs (list)            ('bio_from', 'bio_to') pairs to be kept, so that several datasets can be packed alike (e.g. historical and scenarios; see get_LUC_pairs);
+                            if None, pairs that are non-zero anywhere in ds_in are kept (and diagonal pairs where 'd_Hwood' is non-zero);
+                            default = None
+    pair_axis (str)         name of the packed axis;
+                            default = 'bio_pair'
+    '''
+
+    ## variables to be packed
+    var_lcc, var_hwood = _LUC_vars(ds_in)
+
+    ## get active pairs
+    if pairs is None: pairs = get_LUC_pairs(ds_in)
+
+    ## packed axis (with biomes of each pair as coordinates)
+    index = xr.DataArray(np.arange(len(pairs)), dims=pair_axis, 
+        coords={pair_axis:np.arange(len(pairs)), 'bio_from':(pair_axis, [pair[0] for pair in pairs]), 'bio_to':(pair_axis, [pair[1] for pair in pairs])})
+
+    ## pack variables
+    ds_out = ds_in.drop_vars(var_lcc + var_hwood).drop_vars([var for var in ['bio_from', 'bio_to'] if var in ds_in.coords])
+    for VAR in var_lcc:
+        ds_out[VAR] = ds_in[VAR].drop_vars(['bio_from', 'bio_to']).isel(bio_from=_position(ds_in.bio_from, index.bio_from), bio_to=_position(ds_in.bio_to, index.bio_to)).assign_coords(index.coords)
+        ds_out[VAR].attrs = ds_in[VAR].attrs
+    for VAR in var_hwood:
+        ds_out[VAR] = ds_in[VAR].drop_vars('bio_land').isel(bio_land=_position(ds_in.bio_land, index.bio_from)).assign_coords(index.coords).where(index.bio_from == index.bio_to, 0.)
+        ds_out[VAR].attrs = ds_in[VAR].attrs
+
+    ## return
+    return ds_out
+
+
+## variables of land-use drivers to be packed: over the 'bio_from' x 'bio_to' matrix, and wood harvest over 'bio_land'
+def _LUC_vars(ds_in):
+    var_lcc = [VAR for VAR in ds_in if 'bio_from' in ds_in[VAR].dims and 'bio_to' in ds_in[VAR].dims]
+    var_hwood = ['d_Hwood'] if 'd_Hwood' in ds_in and 'bio_land' in ds_in['d_Hwood'].dims else []
+    return var_lcc, var_hwood
+
+
+## get active ('bio_from', 'bio_to') pairs of land-use drivers
+def get_LUC_pairs(*ds_in):
+    '''
+    Function to get the ('bio_from', 'bio_to') pairs that are active in any of several datasets of land-use drivers.
+    
+    Input:
+    ------
+    ds_in (xr.Dataset)      dataset(s) of land-use drivers (e.g. historical and scenarios)
+        
+    Output:
+    -------
+    pairs (list)            pairs that are non-zero anywhere (and diagonal pairs where 'd_Hwood' is non-zero), ordered as in the full matrix
+    '''
+
+    ## union of active pairs over all datasets
+    active = None
+    for ds in ds_in:
+        var_lcc, var_hwood = _LUC_vars(ds)
+        bio = ds.bio_from.values if len(var_lcc) > 0 else ds.bio_land.values
+        if active is None:
+            active = xr.DataArray(np.zeros((len(bio), len(bio)), dtype=bool), coords={'bio_from':bio, 'bio_to':bio}, dims=['bio_from', 'bio_to'])
+        for VAR in var_lcc:
+            active = active | (ds[VAR].fillna(0) != 0).any([dim for dim in ds[VAR].dims if dim not in ['bio_from', 'bio_to']])
+        for VAR in var_hwood:
+            hwood = (ds[VAR].fillna(0) != 0).any([dim for dim in ds[VAR].dims if dim != 'bio_land']).sel(bio_land=active.bio_from.values).values
+            active = active | xr.DataArray(np.diag(hwood), coords=active.coords, dims=active.dims)
+
+    ## return (ordered as in the full matrix)
+    return [(bio1, bio2) for bio1 in active.bio_from.values for bio2 in active.bio_to.values if active.sel(bio_from=bio1, bio_to=bio2)]
+
+
+## positions of biome labels along an axis (as indexer along the packed axis)
+def _position(axis, labels):
+    return xr.DataArray([list(axis.values).index(lbl) for lbl in labels.values], dims=labels.dims)
+
+
+## unpack variables over active pairs back to the 'bio_from' x 'bio_to' matrix
+def unpack_LUC(ds_in, bio_land=None, pair_axis='bio_pair'):
+    '''
+    Function to unpack variables over active pairs (see pack_LUC) back to the 'bio_from' x 'bio_to' matrix, with zeros for inactive pairs.
+    
+    Input:
+    ------
+    ds_in (xr.Dataset)      dataset with packed variables (e.g. outputs of a model with packed book-keeping)
+        
+    Output:
+    -------
+    ds_out (xr.Dataset)     dataset with variables over 'bio_from' and 'bio_to'
+
+    Options:
+    --------
+    bio_land (list)         biomes of the output matrix (e.g. Par.bio_land), in their order;
+                            if None, only biomes of the pairs are used;
+                            default = None
+    pair_axis (str)         name of the packed axis;
+                            default = 'bio_pair'
+    '''
+    
+    ## unstack pairs
+    ds_out = ds_in.set_index({pair_axis:['bio_from', 'bio_to']}).unstack(pair_axis, fill_value=0.)
+
+    ## full matrix if requested
+    if bio_land is not None:
+        ds_out = ds_out.reindex(bio_from=np.asarray(bio_land), bio_to=np.asarray(bio_land), fill_value=0.)
+
+    ## return
+    return ds_out
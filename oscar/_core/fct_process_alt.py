@@ -24,6 +24,7 @@ CONTENT
     1.2. Full
     1.3. Lite
     1.4. Cut
+    1.5. Packed
 """
 
 ##################################################
@@ -1037,3 +1038,281 @@ def cut_LUC(model_in):
     ## RETURN
     return model
 
+
+##============
+## 1.5. Packed
+##============
+
+## this version is the 'full' version, with the 'bio_from' x 'bio_to' matrix packed onto its active pairs only
+## it gives the same results but is lighter, as most transitions are nil (e.g. Urban to Forest)
+## note: 'd_Acover', 'd_Ashift' and 'd_Hwood' must be packed with 'pack_LUC' (e.g. with 'pack_LUC_drivers', once historical and scenario drivers are created)
+## note: 'pairs' is the 'bio_pair' coordinate of the packed drivers (i.e. For.bio_pair)
+
+def packed_LUC(model_in, pairs):
+    model = model_in.copy(add_name='_packed_LUC')
+
+    ## ancillary: positions of the pairs' biomes and (pairs x biomes) membership matrices (cached per 'bio_land' axis)
+    cache = {}
+    def _pairs_on(bio_land, side, dtype=None):
+        key = (tuple(bio_land.values), side, dtype)
+        if key not in cache:
+            if dtype is None: cache[key] = xr.DataArray([list(bio_land.values).index(bio) for bio in pairs[side].values], dims='bio_pair', coords=pairs.coords)
+            else: cache[key] = (pairs[side] == bio_land).astype(dtype)
+        return cache[key]
+
+    ## ancillary functions: from 'bio_land' onto origin or destination biome of pairs
+    def _from(X): return X.isel(bio_land=_pairs_on(X.bio_land, 'bio_from')).drop_vars('bio_land')
+    def _to(X): return X.isel(bio_land=_pairs_on(X.bio_land, 'bio_to')).drop_vars('bio_land')
+
+    ## ancillary functions: sum of pairs onto their origin or destination biome
+    def _sum_from(X, Par): return xr.dot(X, _pairs_on(Par.bio_land, 'bio_from', X.dtype), dims='bio_pair')
+    def _sum_to(X, Par): return xr.dot(X, _pairs_on(Par.bio_land, 'bio_to', X.dtype), dims='bio_pair')
+
+
+    ## land-use book-keeping initialization of vegetation carbon
+    model.process('D_Fveg_bk', ('cveg_0', 'D_cveg', 'd_Acover', 'd_Hwood', 'd_Ashift'), 
+        lambda Var, Par: Eq__D_Fveg_bk(Var, Par), 
+        units='PgC yr-1')
+
+    def Eq__D_Fveg_bk(Var, Par):
+        ## ancillary
+        p_shift = 1 - np.exp(-Par.npp_0 / Var.cveg_0 * Par.t_shift).where(Var.cveg_0 != 0, 0)
+        ## main values
+        D_Fveg_bk_lcc = -_to(Var.cveg_0 + Var.D_cveg) * Var.d_Acover
+        D_Fveg_bk_harv = -Var.d_Hwood
+        D_Fveg_bk_shift = -_to((Var.cveg_0 + Var.D_cveg) * p_shift) * Var.d_Ashift
+        ## summing
+        return D_Fveg_bk_lcc + D_Fveg_bk_harv + D_Fveg_bk_shift
+
+
+    ## land-use book-keeping initialization of litter carbon
+    model.process('D_Fsoil1_bk', ('csoil1_0', 'D_csoil1', 'd_Acover'), 
+        lambda Var, Par: Eq__D_Fsoil1_bk(Var, Par), 
+        units='PgC yr-1')
+
+    def Eq__D_Fsoil1_bk(Var, Par):
+        D_Fsoil1_bk_lcc = (_from(Var.csoil1_0 + Var.D_csoil1) - _to(Var.csoil1_0 + Var.D_csoil1)) * Var.d_Acover
+        return D_Fsoil1_bk_lcc
+
+
+    ## land-use book-keeping initialization of soil carbon
+    model.process('D_Fsoil2_bk', ('csoil2_0', 'D_csoil2', 'd_Acover'), 
+        lambda Var, Par: Eq__D_Fsoil2_bk(Var, Par), 
+        units='PgC yr-1')
+
+    def Eq__D_Fsoil2_bk(Var, Par):
+        D_Fsoil2_bk_lcc = (_from(Var.csoil2_0 + Var.D_csoil2) - _to(Var.csoil2_0 + Var.D_csoil2)) * Var.d_Acover
+        return D_Fsoil2_bk_lcc
+
+
+    ## land-use initial slash flux to litter pool
+    model.process('D_Fslash1', ('cveg_0', 'D_cveg', 'd_Acover', 'd_Hwood', 'd_Ashift'), 
+        lambda Var, Par: Eq__D_Fslash1(Var, Par), 
+        units='PgC yr-1')
+
+    def Eq__D_Fslash1(Var, Par):
+        ## ancillary
+        p_mu1 = Par.mu1_0 / (Par.mu1_0 + Par.mu2_0)
+        p_shift = 1 - np.exp(-Par.npp_0 / Var.cveg_0 * Par.t_shift).where(Var.cveg_0 != 0, 0)
+        ## main values
+        D_Fslash_lcc = _from(p_mu1 * (Var.cveg_0 + Var.D_cveg) * (Par.p_agb * (1 - Par.p_hwp.sum('box_hwp', min_count=1)) + (1 - Par.p_agb))) * Var.d_Acover
+        D_Fslash_harv = _from(p_mu1 * (1 - Par.p_hwp.sum('box_hwp', min_count=1))) * Var.d_Hwood
+        D_Fslash_shift = _from(p_mu1 * (Var.cveg_0 + Var.D_cveg) * (Par.p_agb * (1 - Par.p_hwp.sum('box_hwp', min_count=1)) + (1 - Par.p_agb)) * p_shift) * Var.d_Ashift
+        ## summing
+        return D_Fslash_lcc + D_Fslash_harv + D_Fslash_shift
+
+
+    ## land-use initial slash flux to soil pool
+    model.process('D_Fslash2', ('cveg_0', 'D_cveg', 'd_Acover', 'd_Hwood', 'd_Ashift'), 
+        lambda Var, Par: Eq__D_Fslash2(Var, Par), 
+        units='PgC yr-1')
+
+    def Eq__D_Fslash2(Var, Par):
+        ## ancillary
+        p_mu2 = Par.mu2_0 / (Par.mu1_0 + Par.mu2_0)
+        p_shift = 1 - np.exp(-Par.npp_0 / Var.cveg_0 * Par.t_shift).where(Var.cveg_0 != 0, 0)
+        ## main values
+        D_Fslash_lcc = _from(p_mu2 * (Var.cveg_0 + Var.D_cveg) * (Par.p_agb * (1 - Par.p_hwp.sum('box_hwp', min_count=1)) + (1 - Par.p_agb))) * Var.d_Acover
+        D_Fslash_harv = _from(p_mu2 * (1 - Par.p_hwp.sum('box_hwp', min_count=1))) * Var.d_Hwood
+        D_Fslash_shift = _from(p_mu2 * (Var.cveg_0 + Var.D_cveg) * (Par.p_agb * (1 - Par.p_hwp.sum('box_hwp', min_count=1)) + (1 - Par.p_agb)) * p_shift) * Var.d_Ashift
+        ## summing
+        return D_Fslash_lcc + D_Fslash_harv + D_Fslash_shift
+
+
+    ## land-use initial flux to harvested wood product pools
+    model.process('D_Fhwp', ('cveg_0', 'D_cveg', 'd_Acover', 'd_Hwood', 'd_Ashift'), 
+        lambda Var, Par: Eq__D_Fhwp(Var, Par), 
+        units='PgC yr-1')
+
+    def Eq__D_Fhwp(Var, Par):
+        ## ancillary
+        p_shift = 1 - np.exp(-Par.npp_0 / Var.cveg_0 * Par.t_shift).where(Var.cveg_0 != 0, 0)
+        ## main values
+        D_Fhwp_lcc = _from((Var.cveg_0 + Var.D_cveg) * Par.p_agb * Par.p_hwp) * Var.d_Acover
+        D_Fhwp_harv = _from(Par.p_hwp) * Var.d_Hwood
+        D_Fhwp_shift = _from((Var.cveg_0 + Var.D_cveg) * Par.p_agb * Par.p_hwp * p_shift) * Var.d_Ashift
+        ## summing
+        return D_Fhwp_lcc + D_Fhwp_harv + D_Fhwp_shift
+
+
+    ## wildfire emissions (under book-keeping)
+    model.process('D_Efire_bk', ('f_igni', 'D_Cveg_bk'), 
+        lambda Var, Par: Eq__D_Efire_bk(Var, Par), 
+        units='PgC yr-1')
+
+    def Eq__D_Efire_bk(Var, Par):
+        return _to(Par.igni_0 * Var.f_igni) * Var.D_Cveg_bk
+
+
+    ## crop harvest emissions (under book-keeping)
+    model.process('D_Eharv_bk', ('D_Cveg_bk',), 
+        lambda Var, Par: Eq__D_Eharv_bk(Var, Par), 
+        units='PgC yr-1')
+
+    def Eq__D_Eharv_bk(Var, Par):
+        return _to(Par.harv_0) * Var.D_Cveg_bk
+
+
+    ## pasture grazing emissions (under book-keeping)
+    model.process('D_Egraz_bk', ('D_Cveg_bk',), 
+        lambda Var, Par: Eq__D_Egraz_bk(Var, Par), 
+        units='PgC yr-1')
+
+    def Eq__D_Egraz_bk(Var, Par):
+        return _to(Par.graz_0) * Var.D_Cveg_bk
+
+
+    ## mortality flux to litter (under book-keeping)
+    model.process('D_Fmort1_bk', ('D_Cveg_bk',), 
+        lambda Var, Par: Eq__D_Fmort1_bk(Var, Par), 
+        units='PgC yr-1')
+
+    def Eq__D_Fmort1_bk(Var, Par):
+        return _to(Par.mu1_0) * Var.D_Cveg_bk
+
+
+    ## mortality flux to soil (under book-keeping)
+    model.process('D_Fmort2_bk', ('D_Cveg_bk',), 
+        lambda Var, Par: Eq__D_Fmort2_bk(Var, Par), 
+        units='PgC yr-1')
+
+    def Eq__D_Fmort2_bk(Var, Par):
+        return _to(Par.mu2_0) * Var.D_Cveg_bk
+
+
+    ## litter respiration flux (under book-keeping)
+    model.process('D_Rh1_bk', ('f_resp', 'D_Csoil1_bk'), 
+        lambda Var, Par: Eq__D_Rh1_bk(Var, Par), 
+        units='PgC yr-1')
+
+    def Eq__D_Rh1_bk(Var, Par):
+        return _to(Par.rho1_0 * Var.f_resp) * Var.D_Csoil1_bk
+
+
+    ## metabolisation flux (under book-keeping)
+    model.process('D_Fmet_bk', ('f_resp', 'D_Csoil1_bk'), 
+        lambda Var, Par: Eq__D_Fmet_bk(Var, Par), 
+        units='PgC yr-1')
+
+    def Eq__D_Fmet_bk(Var, Par):
+        return _to(Par.muM_0 * Var.f_resp) * Var.D_Csoil1_bk
+
+
+    ## soil respiration flux (under book-keeping)
+    model.process('D_Rh2_bk', ('f_resp', 'D_Csoil2_bk'), 
+        lambda Var, Par: Eq__D_Rh2_bk(Var, Par), 
+        units='PgC yr-1')
+
+    def Eq__D_Rh2_bk(Var, Par):
+        return _to(Par.rho2_0 * Var.f_resp) * Var.D_Csoil2_bk
+
+
+    ## land-use change emissions
+    model.process('D_Eluc', ('D_NBP_bk',), 
+        lambda Var, Par: Eq__D_Eluc(Var, Par), 
+        units='PgC yr-1')
+
+    def Eq__D_Eluc(Var, Par):
+        return -Var.D_NBP_bk.sum('bio_pair', min_count=1).sum('reg_land', min_count=1)
+
+
+    ## PROGNOSTIC: biome area
+    model.process('D_Aland', ('D_Aland', 'd_Acover'), 
+        None, lambda Var, Par: DiffEq__D_Aland(Var, Par), lambda Par: vLin__D_Aland(Par), 
+        units='Mha', core_dims=['reg_land', 'bio_land'])
+
+    def DiffEq__D_Aland(Var, Par):
+        return _sum_to(Var.d_Acover, Par) - _sum_from(Var.d_Acover, Par)
+
+    def vLin__D_Aland(Par):
+        return 1E-18
+
+
+    ## PROGNOSTIC: vegetation carbon stock (under book-keeping)
+    model.process('D_Cveg_bk', ('D_Cveg_bk', 'D_Fveg_bk', 'D_NPP_bk', 'D_Efire_bk', 'D_Eharv_bk', 'D_Egraz_bk', 'D_Fmort1_bk', 'D_Fmort2_bk'), 
+        None, lambda Var, Par: DiffEq__D_Cveg_bk(Var, Par), lambda Par: vLin__D_Cveg_bk(Par), 
+        units='PgC', core_dims=['reg_land', 'bio_pair'])
+    
+    def DiffEq__D_Cveg_bk(Var, Par):
+        return Var.D_Fveg_bk + Var.D_NPP_bk - Var.D_Efire_bk - Var.D_Eharv_bk - Var.D_Egraz_bk - Var.D_Fmort1_bk - Var.D_Fmort2_bk
+    
+    def vLin__D_Cveg_bk(Par):
+        return _to(Par.igni_0 + Par.harv_0 + Par.graz_0 + Par.mu1_0 + Par.mu2_0)
+
+
+    ## PROGNOSTIC: litter carbon stock (under book-keeping)
+    model.process('D_Csoil1_bk', ('D_Csoil1_bk', 'D_Fsoil1_bk', 'D_Fslash1', 'D_Fmort1_bk', 'D_Rh1_bk', 'D_Fmet_bk'), 
+        None, lambda Var, Par: DiffEq__D_Csoil1_bk(Var, Par), lambda Par: vLin__D_Csoil1_bk(Par), 
+        units='PgC', core_dims=['reg_land', 'bio_pair'])
+    
+    def DiffEq__D_Csoil1_bk(Var, Par):
+        return Var.D_Fsoil1_bk + Var.D_Fslash1 + Var.D_Fmort1_bk - Var.D_Rh1_bk - Var.D_Fmet_bk
+
+    def vLin__D_Csoil1_bk(Par):
+        return _to((Par.rho1_0 + Par.muM_0).where(Par.rho1_0 + Par.muM_0 != 0, 1E-18))
+
+
+    ## PROGNOSTIC: soil carbon stock (under book-keeping)
+    model.process('D_Csoil2_bk', ('D_Csoil2_bk', 'D_Fsoil2_bk', 'D_Fslash2', 'D_Fmort2_bk', 'D_Fmet_bk', 'D_Rh2_bk'), 
+        None, lambda Var, Par: DiffEq__D_Csoil2_bk(Var, Par), lambda Par: vLin__D_Csoil2_bk(Par), 
+        units='PgC', core_dims=['reg_land', 'bio_pair'])
+
+    def DiffEq__D_Csoil2_bk(Var, Par):
+        return Var.D_Fsoil2_bk + Var.D_Fslash2 + Var.D_Fmort2_bk + Var.D_Fmet_bk - Var.D_Rh2_bk
+
+    def vLin__D_Csoil2_bk(Par):
+        return _to(Par.rho2_0)
+
+
+    ## PROGNOSTIC: harvested wood products stock
+    model.process('D_Chwp', ('D_Chwp', 'D_Fhwp', 'D_Ehwp'), 
+        None, lambda Var, Par: DiffEq__D_Chwp(Var, Par), lambda Par: vLin__D_Chwp(Par), 
+        units='PgC', core_dims=['reg_land', 'bio_pair', 'box_hwp'])
+
+    def DiffEq__D_Chwp(Var, Par):
+        return Var.D_Fhwp - Var.D_Ehwp
+
+    def vLin__D_Chwp(Par):
+        return 1 / Par.w_t_hwp / Par.t_hwp
+
+
+    ## CO2 emissions from natural biomass burning (= wildfire)
+    model.process('D_Efire', ('cveg_0', 'D_efire', 'D_Aland', 'D_Efire_bk'), 
+        lambda Var, Par: Eq__D_Efire__packed(Var, Par), 
+        units='PgC yr-1')
+
+    def Eq__D_Efire__packed(Var, Par):
+        return Par.igni_0 * Var.cveg_0 * Var.D_Aland + Var.D_efire * (Par.Aland_0 + Var.D_Aland) + _sum_to(Var.D_Efire_bk, Par)
+
+
+    ## non-CO2 emissions from anthropogenic biomass burning
+    model.process('D_Ebb_ant', ('D_Ehwp',), 
+        lambda Var, Par: Eq__D_Ebb_ant__packed(Var, Par), 
+        units='TgX yr-1')
+
+    def Eq__D_Ebb_ant__packed(Var, Par):
+        return Par.a_bb * _sum_from((Par.p_hwp_bb * Var.D_Ehwp).sum('box_hwp', min_count=1), Par)
+
+
+    ## RETURN
+    return model
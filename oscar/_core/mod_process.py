@@ -62,6 +62,9 @@ B. SUB-MODELS
 ##################################################
 ##################################################
 
+import weakref
+import threading
+
 import numpy as np
 import xarray as xr
 
@@ -89,6 +92,97 @@ Mha_to_m2 = 1E10
 A_Earth = 510072E9 # m2
 
 
+## partitions of the ensemble by selected formulation (cached per parameters, switch and parameters used)
+## note: parameters are weakly referenced, so that entries are dropped with the parameters of their run
+_switch_parts = {}
+_switch_lock = threading.Lock()
+
+## evaluate alternative formulations only for the configurations that select them
+def eval_switch(switch, branches, Var, Par, member_axis='config'):
+    '''
+    Function to evaluate a process with alternative formulations, each one only for the members that select it.
+    Members are partitioned once per parameters dataset; if all members select the same formulation, only this one is computed.
+    
+    Input:
+    ------
+    switch (str)            name of the switch parameter: either one-hot over an option axis (e.g. 'pCO2_switch'),
+                            or boolean with True selecting the first of two formulations (e.g. 'fert_is_Log')
+    branches (list)         functions (of Var and Par) of the formulations, in order of the option axis;
+                            parameters must be accessed as attributes of Par (e.g. Par.CO2_0)
+    Var (xr.Dataset)        input variables of the process
+    Par (xr.Dataset)        parameters
+
+    Output:
+    -------
+    Out (xr.DataArray)      output of the process
+
+    Options:
+    --------
+    member_axis (str)       axis of the ensemble members;
+                            default = 'config'
+    '''
+
+    ## parameters used by the formulations (only these are subset per formulation)
+    names = tuple(sorted({name for branch in branches for name in branch.__code__.co_names if name in Par.data_vars}))
+
+    ## get partition (once per parameters, switch and parameters used)
+    key = (id(Par), switch, names)
+    with _switch_lock:
+        if key not in _switch_parts or _switch_parts[key][0]() is not Par:
+            _switch_parts[key] = (weakref.ref(Par, lambda _, key=key: _switch_parts.pop(key, None)),) + _partition_switch(Par, switch, names, len(branches), member_axis)
+        _, weights, parts, n_member = _switch_parts[key]
+
+    ## non-binary switch: weighted sum of all formulations
+    if weights is not None:
+        return sum([weight * branch(Var, Par) for weight, branch in zip(weights, branches)])
+
+    ## one formulation for all members
+    if n_member is None:
+        return branches[parts[0][0]](Var, Par)
+
+    ## each formulation on its members (positional members, to avoid realignment)
+    Var = Var.drop_vars(member_axis, errors='ignore')
+    Out = [branches[k](Var.isel({member_axis:idx}) if member_axis in Var.dims else Var, Par_k) for k, idx, Par_k in parts]
+
+    ## scatter back to members' order
+    Out = xr.broadcast(*[Out_k if member_axis in Out_k.dims else Out_k.expand_dims({member_axis:len(idx)}) for Out_k, (_, idx, _) in zip(Out, parts)], exclude=[member_axis])
+    dims = Out[0].dims
+    Out = [Out_k.transpose(member_axis, *[dim for dim in dims if dim != member_axis]) for Out_k in Out]
+    values = np.empty((n_member,) + Out[0].shape[1:], dtype=np.result_type(*Out))
+    for Out_k, (_, idx, _) in zip(Out, parts):
+        values[idx] = Out_k.values
+    return xr.DataArray(values, dims=Out[0].dims, coords={**Out[0].drop_vars(member_axis, errors='ignore').coords, **({member_axis:Par[member_axis]} if member_axis in Par.coords else {})}).transpose(*dims)
+
+
+## partition members by selected formulation
+## note: the returned objects must not reference Par (they are cached as long as it lives)
+def _partition_switch(Par, switch, names, n_branch, member_axis):
+    sw = Par[switch]
+    option_axis = [dim for dim in sw.dims if dim != member_axis]
+
+    ## weights of formulations (as members x formulations)
+    if len(option_axis) == 0 and n_branch == 2: 
+        W = xr.concat([sw.astype(float), 1 - sw.astype(float)], dim='option_axis')
+    elif len(option_axis) == 1 and sw.sizes[option_axis[0]] == n_branch: 
+        W = sw.astype(float).rename({option_axis[0]:'option_axis'})
+    else: 
+        raise ValueError("switch '{0}' does not match {1} formulations".format(switch, n_branch))
+    W = W.transpose(*[dim for dim in [member_axis] if dim in W.dims], 'option_axis')
+
+    ## non-binary switch (e.g. mixed formulations)
+    if not (np.isin(W.values, [0, 1]).all() and (W.values.sum(-1) == 1).all()):
+        return [W.isel(option_axis=k, drop=True).astype(sw.dtype) for k in range(n_branch)], None, None
+
+    ## one formulation for all members
+    choice = W.values.argmax(-1)
+    if choice.ndim == 0 or (choice == choice.flat[0]).all():
+        return None, [(int(choice.flat[0]), None, None)], None
+
+    ## members of each formulation (with the parameters they use)
+    parts = [(k, np.flatnonzero(choice == k), Par[list(names)].isel({member_axis:np.flatnonzero(choice == k)}).drop_vars(member_axis, errors='ignore')) for k in np.unique(choice)]
+    return None, parts, len(choice)
+
+
 ##################################################
 ##   1. CARBON DIOXIDE
 ##################################################
@@ -109,20 +203,22 @@ OSCAR.process('dic_0', (),
 
 def Eq__dic_0(Var, Par):
     ## polynomial fit
-    dic_0_Poly = 1970 + (1964 - 1970) / (18.4 - 17.7) * (Par.To_0 - 17.7)
+    def dic_0_Poly(Var, Par):
+        return 1970 + (1964 - 1970) / (18.4 - 17.7) * (Par.To_0 - 17.7)
     ## CO2Sys Pade approximant
-    a0_0 = 30015.6 * (1 - 0.0226536 * (Par.To_0 - 15) + 0.000167105 * (Par.To_0 - 15)**2)
-    a1_0 = 13.4574 * (1 - 0.019829 * (Par.To_0 - 15) + 0.000113872 * (Par.To_0 - 15)**2)
-    a2_0 = -0.243121 * (1 + 0.000443511 * (Par.To_0 - 15) - 0.000473227 * (Par.To_0 - 15)**2)
-    dic_0_Pade = a0_0 * (Par.CO2_0 / 380.) / (1 + a1_0 * (Par.CO2_0 / 380. ) + a2_0 * (Par.CO2_0 / 380.)**2)
+    def dic_0_Pade(Var, Par):
+        a0_0 = 30015.6 * (1 - 0.0226536 * (Par.To_0 - 15) + 0.000167105 * (Par.To_0 - 15)**2)
+        a1_0 = 13.4574 * (1 - 0.019829 * (Par.To_0 - 15) + 0.000113872 * (Par.To_0 - 15)**2)
+        a2_0 = -0.243121 * (1 + 0.000443511 * (Par.To_0 - 15) - 0.000473227 * (Par.To_0 - 15)**2)
+        return a0_0 * (Par.CO2_0 / 380.) / (1 + a1_0 * (Par.CO2_0 / 380. ) + a2_0 * (Par.CO2_0 / 380.)**2)
     ## CO2Sys Power law
-    p0_0 = 2160.156 * (1 - 0.00347063 * (Par.To_0 - 15) - 0.0000250016 * (Par.To_0 - 15)**2)
-    p1_0 = 0.0595961 * (1 + 0.0200328 * (Par.To_0 - 15) + 0.000192084 * (Par.To_0 - 15)**2)
-    p2_0 = 0.318665 * (1 - 0.00151292 * (Par.To_0 - 15) - 0.000198978 * (Par.To_0 - 15)**2)
-    dic_0_Power = p0_0 * ((Par.CO2_0 / 380.) - p2_0)**p1_0    
+    def dic_0_Power(Var, Par):
+        p0_0 = 2160.156 * (1 - 0.00347063 * (Par.To_0 - 15) - 0.0000250016 * (Par.To_0 - 15)**2)
+        p1_0 = 0.0595961 * (1 + 0.0200328 * (Par.To_0 - 15) + 0.000192084 * (Par.To_0 - 15)**2)
+        p2_0 = 0.318665 * (1 - 0.00151292 * (Par.To_0 - 15) - 0.000198978 * (Par.To_0 - 15)**2)
+        return p0_0 * ((Par.CO2_0 / 380.) - p2_0)**p1_0
     ## choosing configuration
-    dic_0 = xr.concat([dic_0_Poly.assign_coords(fct_pco2='Poly'), dic_0_Pade.assign_coords(fct_pco2='Pade'), dic_0_Power.assign_coords(fct_pco2='Power')], dim='fct_pco2')
-    return (Par.pCO2_switch * dic_0).sum('fct_pco2', min_count=1)
+    return eval_switch('pCO2_switch', [dic_0_Poly, dic_0_Pade, dic_0_Power], Var, Par)
 
 
 ## partial pressure of CO2 at sea surface
@@ -133,29 +229,32 @@ OSCAR.process('D_pCO2', ('dic_0', 'D_dic', 'D_To'),
     units='ppm')
 
 def Eq__D_pCO2(Var, Par):
-    ## common variables
-    To = Par.To_0 + Var.D_To
-    dic = Var.dic_0 + Var.D_dic
     ## polynomial fit
-    D_pCO2_Poly = ( (1.5568 - 1.3993E-2 * Par.To_0) * Var.D_dic
-                  + (7.4706 - 0.20207 * Par.To_0) * 1E-3 * Var.D_dic**2
-                  - (1.2748 - 0.12015 * Par.To_0) * 1E-5 * Var.D_dic**3
-                  + (2.4491 - 0.12639 * Par.To_0) * 1E-7 * Var.D_dic**4
-                  - (1.5468 - 0.15326 * Par.To_0) * 1E-10 * Var.D_dic**5 )
-    D_pCO2_Poly = (Par.CO2_0 + D_pCO2_Poly) * np.exp(0.0423 * Var.D_To / Par.w_clim_To) - Par.CO2_0
+    def D_pCO2_Poly(Var, Par):
+        D_pCO2 = ( (1.5568 - 1.3993E-2 * Par.To_0) * Var.D_dic
+                 + (7.4706 - 0.20207 * Par.To_0) * 1E-3 * Var.D_dic**2
+                 - (1.2748 - 0.12015 * Par.To_0) * 1E-5 * Var.D_dic**3
+                 + (2.4491 - 0.12639 * Par.To_0) * 1E-7 * Var.D_dic**4
+                 - (1.5468 - 0.15326 * Par.To_0) * 1E-10 * Var.D_dic**5 )
+        return (Par.CO2_0 + D_pCO2) * np.exp(0.0423 * Var.D_To / Par.w_clim_To) - Par.CO2_0
     ## CO2Sys Pade approximant
-    a0 = 30015.6 * (1 - 0.0226536 * (To - 15) + 0.000167105 * (To - 15)**2)
-    a1 = 13.4574 * (1 - 0.019829 * (To - 15) + 0.000113872 * (To - 15)**2)
-    a2 = -0.243121 * (1 + 0.000443511 * (To - 15) - 0.000473227 * (To - 15)**2)
-    D_pCO2_Pade = 380 * (a0 - a1*dic - np.sqrt((a0 - a1*dic)**2 - 4*a2*dic**2)) / (2*a2*dic) - Par.CO2_0
+    def D_pCO2_Pade(Var, Par):
+        To = Par.To_0 + Var.D_To
+        dic = Var.dic_0 + Var.D_dic
+        a0 = 30015.6 * (1 - 0.0226536 * (To - 15) + 0.000167105 * (To - 15)**2)
+        a1 = 13.4574 * (1 - 0.019829 * (To - 15) + 0.000113872 * (To - 15)**2)
+        a2 = -0.243121 * (1 + 0.000443511 * (To - 15) - 0.000473227 * (To - 15)**2)
+        return 380 * (a0 - a1*dic - np.sqrt((a0 - a1*dic)**2 - 4*a2*dic**2)) / (2*a2*dic) - Par.CO2_0
     ## CO2Sys Power law
-    p0 = 2160.156 * (1 - 0.00347063 * (To - 15) - 0.0000250016 * (To - 15)**2)
-    p1 = 0.0595961 * (1 + 0.0200328 * (To - 15) + 0.000192084 * (To - 15)**2)
-    p2 = 0.318665 * (1 - 0.00151292 * (To - 15) - 0.000198978 * (To - 15)**2)
-    D_pCO2_Power = 380 * (p2 + (dic/p0)**(1/p1)) - Par.CO2_0
+    def D_pCO2_Power(Var, Par):
+        To = Par.To_0 + Var.D_To
+        dic = Var.dic_0 + Var.D_dic
+        p0 = 2160.156 * (1 - 0.00347063 * (To - 15) - 0.0000250016 * (To - 15)**2)
+        p1 = 0.0595961 * (1 + 0.0200328 * (To - 15) + 0.000192084 * (To - 15)**2)
+        p2 = 0.318665 * (1 - 0.00151292 * (To - 15) - 0.000198978 * (To - 15)**2)
+        return 380 * (p2 + (dic/p0)**(1/p1)) - Par.CO2_0
     ## choosing configuration
-    D_pCO2 = xr.concat([D_pCO2_Poly.assign_coords(fct_pco2='Poly'), D_pCO2_Pade.assign_coords(fct_pco2='Pade'), D_pCO2_Power.assign_coords(fct_pco2='Power')], dim='fct_pco2')
-    return (Par.pCO2_switch * D_pCO2).sum('fct_pco2', min_count=1)
+    return eval_switch('pCO2_switch', [D_pCO2_Poly, D_pCO2_Pade, D_pCO2_Power], Var, Par)
 
 
 ## mixed-layer depth
@@ -269,11 +368,13 @@ OSCAR.process('f_fert', ('D_CO2',),
 
 def Eq__f_fert(Var, Par):
     ## logarithmic formulation
-    f_fert_Log = 1 + Par.b_npp * np.log1p(Var.D_CO2 / Par.CO2_0)
+    def f_fert_Log(Var, Par):
+        return 1 + Par.b_npp * np.log1p(Var.D_CO2 / Par.CO2_0)
     ## hyperbolic formulation
-    f_fert_Hyp = (1 + Var.D_CO2 / (Par.CO2_0 - Par.CO2_cp)) / (Var.D_CO2 / Par.CO2_0 * (1/Par.b2_npp * (2*Par.CO2_0 - Par.CO2_cp) / (Par.CO2_0 - Par.CO2_cp) - 1) + 1)
+    def f_fert_Hyp(Var, Par):
+        return (1 + Var.D_CO2 / (Par.CO2_0 - Par.CO2_cp)) / (Var.D_CO2 / Par.CO2_0 * (1/Par.b2_npp * (2*Par.CO2_0 - Par.CO2_cp) / (Par.CO2_0 - Par.CO2_cp) - 1) + 1)
     ## choosing configuration
-    return Par.fert_is_Log * f_fert_Log + (1-Par.fert_is_Log) * f_fert_Hyp
+    return eval_switch('fert_is_Log', [f_fert_Log, f_fert_Hyp], Var, Par)
 
 
 ## net primary productivity (areal)
@@ -1909,12 +2010,14 @@ OSCAR.process('D_pH', ('D_CO2',),
 def Eq__D_pH(Var, Par):
     ## logarithmic formulation (approximative)
     ## (Tans 2009; doi:10.5670/oceanog.2009.94)
-    D_pH_log = -0.85 * np.log1p(Var.D_CO2 / Par.CO2_0)
+    def D_pH_log(Var, Par):
+        return -0.85 * np.log1p(Var.D_CO2 / Par.CO2_0)
     ## polynomial formulation
     ## (Bernie et al., 2010; doi:10.1029/2010GL043181)
-    D_pH_poly = -0.00173 * Var.D_CO2 + 1.3264E-6 * (2*Par.CO2_0 * Var.D_CO2 + Var.D_CO2**2) - 4.4943E-10 * (3*Var.D_CO2 * Par.CO2_0**2 + 3*Par.CO2_0 * Var.D_CO2**2 + Var.D_CO2**3)
+    def D_pH_poly(Var, Par):
+        return -0.00173 * Var.D_CO2 + 1.3264E-6 * (2*Par.CO2_0 * Var.D_CO2 + Var.D_CO2**2) - 4.4943E-10 * (3*Var.D_CO2 * Par.CO2_0**2 + 3*Par.CO2_0 * Var.D_CO2**2 + Var.D_CO2**3)
     ## choose configuration
-    return Par.pH_is_Log * D_pH_log + (1-Par.pH_is_Log) * D_pH_poly
+    return eval_switch('pH_is_Log', [D_pH_log, D_pH_poly], Var, Par)
 
 
 ##################################################
@@ -1923,14 +2026,20 @@ def Eq__D_pH(Var, Par):
 
 ## ocean carbon cycle only
 proc_oceanC = ['dic_0', 'D_pCO2', 'D_mld', 'D_dic', 'D_Fin', 'D_Fout', 'D_Fcirc', 'D_Focean', 'D_Cosurf']
-OSCAR_oceanC = OSCAR.copy(add_name='_oceanC', only=proc_oceanC)
 
 ## land carbon cycle only
 proc_landC = ['cveg_0', 'csoil1_0', 'csoil2_0', 'f_fert', 'D_npp', 'f_igni', 'D_efire', 'D_eharv', 'D_egraz', 'D_fmort1', 'D_fmort2', 'f_resp', 'D_rh1', 'D_fmet', 'D_rh2', 'D_nbp', 'D_cveg', 'D_csoil1', 'D_csoil2']
 proc_landC += ['D_Fveg_bk', 'D_Fsoil1_bk', 'D_Fsoil2_bk', 'D_Fslash1', 'D_Fslash2', 'D_Fhwp', 'D_NPP_bk', 'D_Efire_bk', 'D_Eharv_bk', 'D_Egraz_bk', 'D_Fmort1_bk', 'D_Fmort2_bk', 'D_Rh1_bk', 'D_Fmet_bk', 'D_Rh2_bk', 'D_Ehwp', 'D_NBP_bk', 'D_Eluc', 'D_Fland', 'D_Flasc', 'D_Aland', 'D_Cveg_bk', 'D_Csoil1_bk', 'D_Csoil2_bk', 'D_Chwp']
-OSCAR_landC = OSCAR.copy(add_name='_landC', only=proc_landC)
 
 ## permafrost carbon only
 proc_pfC = ['f_resp_pf', 'D_pthaw_bar', 'd_pthaw', 'D_pthaw', 'D_Fthaw', 'D_Ethaw', 'D_Epf', 'D_Epf_CO2', 'D_Epf_CH4', 'D_Cfroz', 'D_Cthaw']
-OSCAR_pfC = OSCAR.copy(add_name='_pfC', only=proc_pfC)
 
+## sub-models are only created when first accessed (e.g. 'from .mod_process import OSCAR_landC')
+sub_models = {'OSCAR_oceanC': ('_oceanC', proc_oceanC), 'OSCAR_landC': ('_landC', proc_landC), 'OSCAR_pfC': ('_pfC', proc_pfC)}
+
+def __getattr__(name):
+    if name in sub_models:
+        add_name, only = sub_models[name]
+        globals()[name] = OSCAR.copy(add_name=add_name, only=only)
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,167 @@
+"""
+OSCAR Input Catalog
+Persistent index of the NetCDF files found under the input_data folder.
+
+Main Logic:
+    1. Index: For each file, keeps its path, size, mtime, variables and dimensions.
+    2. Persistence: Saved as JSON in the cache folder, reused across sessions.
+    3. Refresh: Incremental; only new or modified files are opened again.
+    4. Lookup: Exact file stems are resolved from a dict, without touching the disk.
+    5. Threads: Lookups, refreshes and saves of a catalog are serialized by its lock
+       (loaders may run concurrently, see parallel_map).
+"""
+import os
+import json
+import threading
+from pathlib import Path
+
+import xarray as xr
+
+from .paths import get_cache_dir, get_in_dir
+
+CATALOG_VERSION = 1
+
+
+class InputCatalog:
+    """
+    Index of the NetCDF files of one input_data folder.
+    Entries are keyed by path relative to the folder.
+    """
+
+    def __init__(self, in_dir=None, catalog_file=None):
+        self.in_dir = Path(in_dir) if in_dir is not None else get_in_dir()
+        self.catalog_file = Path(catalog_file) if catalog_file is not None else get_cache_dir() / "input_catalog.json"
+        self.entries = {}
+        self._by_stem = {}
+        self._lock = threading.Lock()
+        self._read()
+
+    # --- PERSISTENCE ---
+
+    def _read(self):
+        """Loads the saved catalog if it was built for this same folder."""
+        try:
+            with open(self.catalog_file, "r") as f:
+                saved = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        if saved.get("version") == CATALOG_VERSION and saved.get("root") == str(self.in_dir):
+            self.entries = saved["entries"]
+            self._reindex()
+
+    def _write(self):
+        """Saves the catalog (write then rename, so readers never see half a file)."""
+        self.catalog_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.catalog_file.with_name(f".{self.catalog_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_file, "w") as f:
+            json.dump({"version": CATALOG_VERSION, "root": str(self.in_dir), "entries": self.entries}, f)
+        os.replace(tmp_file, self.catalog_file)
+
+    def _reindex(self):
+        """Rebuilds the stem lookup table; duplicated stems map to None."""
+        self._by_stem = {}
+        for rel in self.entries:
+            stem = Path(rel).stem
+            self._by_stem[stem] = None if stem in self._by_stem else rel
+
+    # --- INDEXING ---
+
+    @staticmethod
+    def _describe(path, stat):
+        """Reads the header of a NetCDF file (no data is loaded)."""
+        with xr.open_dataset(path) as ds:
+            return {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "dims": {str(k): int(v) for k, v in ds.sizes.items()},
+                "coords": [str(c) for c in ds.coords],
+                "data_vars": {str(v): [str(d) for d in ds[v].dims] for v in ds.data_vars},
+            }
+
+    def _is_current(self, rel, stat):
+        entry = self.entries.get(rel)
+        return entry is not None and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns
+
+    def refresh(self):
+        """
+        Synchronizes the catalog with the folder.
+        Unchanged files (same size and mtime) are not opened again.
+        """
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self):
+        found = {}
+        for dirpath, _, filenames in os.walk(self.in_dir):
+            for fn in filenames:
+                if fn.endswith(".nc"):
+                    path = Path(dirpath) / fn
+                    found[path.relative_to(self.in_dir).as_posix()] = path
+
+        changed = False
+        for rel in list(self.entries):
+            if rel not in found:
+                del self.entries[rel]
+                changed = True
+        for rel, path in found.items():
+            stat = path.stat()
+            if not self._is_current(rel, stat):
+                self.entries[rel] = self._describe(path, stat)
+                changed = True
+
+        if changed:
+            self._reindex()
+            self._write()
+        return self
+
+    # --- LOOKUP ---
+
+    def _match(self, name):
+        """Exact stem first (dict lookup), then unique substring of the relative path."""
+        rel = self._by_stem.get(name)
+        if rel is not None:
+            return [rel]
+        return [rel for rel in self.entries if name in rel]
+
+    def find(self, name):
+        """
+        Returns the path and catalog entry of the unique file matching name.
+        The folder is rescanned only if the name is unknown or the file changed.
+        """
+        with self._lock:
+            return self._find(name)
+
+    def _find(self, name):
+        matches = self._match(name)
+        if len(matches) == 0:
+            self._refresh()
+            matches = self._match(name)
+
+        if len(matches) == 0:
+            raise RuntimeError("no files were found (input name = '{0}')".format(name))
+        elif len(matches) > 1:
+            raise RuntimeError("more than one file was found (input name = '{0}')".format(name))
+
+        rel = matches[0]
+        path = self.in_dir / rel
+        if not path.exists():
+            self._refresh()
+            return self._find(name)
+
+        stat = path.stat()
+        if not self._is_current(rel, stat):
+            self.entries[rel] = self._describe(path, stat)
+            self._write()
+        return path, self.entries[rel]
+
+
+_CATALOGS = {}
+_CATALOGS_LOCK = threading.Lock()
+
+def get_catalog(in_dir=None):
+    """Returns the (session-wide) catalog of the given input_data folder."""
+    in_dir = Path(in_dir) if in_dir is not None else get_in_dir()
+    with _CATALOGS_LOCK:
+        if in_dir not in _CATALOGS:
+            _CATALOGS[in_dir] = InputCatalog(in_dir)
+        return _CATALOGS[in_dir]
@@ -0,0 +1,162 @@
+"""
+OSCAR Compiled Stores
+Builds and reuses consolidated NetCDF files derived from the raw input library.
+
+Main Logic:
+    1. Fingerprint: Hashes the source files (name, size, mtime) and the code version.
+    2. Lookup: A store is named after its fingerprint, so a match means it is up to date.
+    3. Build: On a miss, the store is rebuilt once and written atomically.
+    4. Open: Stores are opened lazily; variables are only read when accessed.
+"""
+import os
+import sys
+import hashlib
+from pathlib import Path
+from importlib.metadata import version, PackageNotFoundError
+
+import numpy as np
+import xarray as xr
+
+from .paths import get_cache_dir, get_in_dir
+
+
+def fingerprint_files(files, root=None):
+    """
+    Returns a hash of the name, size and modification time of each file.
+    Missing files are part of the fingerprint, so adding them later invalidates it.
+    """
+    sha = hashlib.sha256()
+    for file in sorted(Path(f) for f in files):
+        name = file.relative_to(root) if root is not None else file
+        if file.exists():
+            stat = file.stat()
+            sha.update(f"{name}|{stat.st_size}|{stat.st_mtime_ns}\n".encode())
+        else:
+            sha.update(f"{name}|missing\n".encode())
+    return sha.hexdigest()
+
+
+def fingerprint_dataset(ds):
+    """
+    Returns a hash of the content of an in-memory dataset (names, dims, values, attributes).
+    """
+    sha = hashlib.sha256()
+    for name in sorted(ds.variables, key=str):
+        var = ds.variables[name]
+        values = np.ascontiguousarray(var.values)
+        sha.update(f"{name}|{var.dims}|{values.dtype}|{values.shape}|{sorted(var.attrs.items())}\n".encode())
+        if values.dtype.kind == 'O':
+            sha.update(repr(values.tolist()).encode())
+        else:
+            sha.update(values.tobytes())
+    return sha.hexdigest()
+
+
+def code_version(*modules):
+    """
+    Returns a hash of the package version and the source of the given modules.
+    Any edit of a loader therefore triggers a rebuild of the stores it produced.
+    """
+    try:
+        pkg_version = version("oscar")
+    except PackageNotFoundError:
+        pkg_version = "unknown"
+
+    sha = hashlib.sha256(pkg_version.encode())
+    for module in modules:
+        with open(module.__file__, 'rb') as f:
+            sha.update(f.read())
+    return sha.hexdigest()
+
+
+def make_key(*parts):
+    """Combines several fingerprints (or plain strings) into a short store key."""
+    return hashlib.sha256("|".join(str(p) for p in parts).encode()).hexdigest()[:16]
+
+
+def write_atomic(ds, path, **kwargs):
+    """
+    Writes a dataset next to its destination and renames it in place.
+    A crash during the write never leaves a truncated store behind.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        ds.to_netcdf(tmp_path, **kwargs)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return path
+
+
+def compile_dataset(kind, name, key, builder, compress=False):
+    """
+    Returns the compiled store {cache}/{kind}/{name}__{key}.nc, building it if needed.
+
+    Args:
+        kind (str): Store family (e.g. 'parameters', 'drivers').
+        name (str): Store name within the family (e.g. the regional aggregation).
+        key (str): Fingerprint of everything the store content depends on.
+        builder (callable): Function returning the xr.Dataset to compile.
+        compress (bool): Whether to write chunked, zlib-compressed variables (NetCDF4).
+    """
+    store_dir = get_cache_dir() / kind
+    store_path = store_dir / f"{name}__{key}.nc"
+
+    if not store_path.exists():
+        # 1. Build from the raw inputs (slow path, once per change)
+        print(f"[OSCAR] Compiling {kind} store for '{name}'...")
+        # (source encodings are dropped: an inherited string width would truncate longer labels)
+        ds = builder().copy()
+        for var in ds.variables.values():
+            var.encoding = {}
+        encoding = {}
+        if compress:
+            encoding = {var: {'zlib': True, 'complevel': 1, 'shuffle': True}
+                        for var in ds.data_vars if ds[var].dtype.kind in 'fiub'}
+        write_atomic(ds, store_path, encoding=encoding)
+
+        # Round-trip check: labels must read back as they were built
+        with xr.open_dataset(store_path) as stored:
+            altered = [coord for coord in ds.coords if ds[coord].dtype.kind in 'OSU'
+                       and not np.array_equal(stored[coord].values.astype(str), ds[coord].values.astype(str))]
+        if altered:
+            store_path.unlink()
+            raise RuntimeError(f"compiled {kind} store for '{name}' altered coordinates: {altered}")
+
+        # 2. Drop outdated versions of the same store
+        for old in store_dir.glob(f"{name}__*.nc"):
+            if old != store_path:
+                old.unlink()
+
+    # 3. Lazy open: only the variables actually used are read from disk
+    return xr.open_dataset(store_path)
+
+
+def param_sources(mod_region):
+    """Returns the parameter files used by a regional aggregation (shared ones and its own)."""
+    param_dir = get_in_dir() / 'parameters'
+    return [f for f in param_dir.rglob('*.nc')
+        if '__' not in f.stem or f.stem.endswith(f'__{mod_region}')]
+
+
+def open_param_store(mod_region, builder):
+    """
+    Returns the compiled primary parameters of a regional aggregation.
+    The store depends on the global parameter files, on those of mod_region,
+    on the region mappings, and on the parameter loading, aggregation and compiling code.
+    """
+    from .._core import fct_loadP, fct_calib, fct_misc
+
+    # 1. Source files: shared ones and those of this region only, plus the region mappings used to aggregate them
+    param_dir = get_in_dir() / 'parameters'
+    files = param_sources(mod_region)
+    regions_dir = get_in_dir() / 'regions'
+    region_files = list(regions_dir.glob('*.csv'))
+
+    # 2. Key and store
+    key = make_key(fingerprint_files(files, root=param_dir), fingerprint_files(region_files, root=regions_dir),
+                   code_version(fct_loadP, fct_calib, fct_misc, sys.modules[__name__]))
+    return compile_dataset('parameters', mod_region, key, builder)
@@ -2,15 +2,16 @@
 OSCAR Data Downloader - Configured Mode specialization
 Handles the retrieval of official pre-compiled CMIP6/7 regional libraries.
 """
-import zipfile
-import requests
 from .paths import get_configured_dir
+from ._transfer import download_record_file, extract_zip, get_base_url
 from .._utils.load_config import load_config
 
-def ensure_configured_library(hist_type, region):
+def ensure_configured_library(hist_type, region, base_url=None):
     """
     Checks for the existence of a specific regional library.
     If missing, downloads and extracts the official bundle from Zenodo.
+    The download resumes after interruptions and is verified before extraction.
+    base_url overrides the record API URL of the config (e.g. a local mirror).
     """
     # 1. Resolve local path: data/configured/CMIP6/RCP_5reg/
     target_dir = get_configured_dir() / hist_type / region
@@ -21,46 +22,34 @@ def ensure_configured_library(hist_type, region):
 
     # 2. If not found, prepare for download
     full_cfg = load_config()
-    paths = full_cfg['paths']
     record_id = full_cfg['metadata']['configured']['zenodo_id']
     zip_filename = f"OSCAR_configured_{hist_type}_{region}.zip"
-    url = f"{paths['zenodo_base_url']}{record_id}/files/{zip_filename}/content"
     
-    # Path to temporarily store the zip during download
-    # (Put it one level up in the CMIP6 folder)
-    zip_temp_path = target_dir.parent / zip_filename
-    zip_temp_path.parent.mkdir(parents=True, exist_ok=True)
+    # The zip (and its partial segments, if interrupted) is kept one level up, in the CMIP6 folder
+    target_dir.parent.mkdir(parents=True, exist_ok=True)
     
     print(f"\n[OSCAR] Official library for '{region}' ({hist_type}) not found locally.")
     print(f"[OSCAR] Please wait, fetching remote bundle from Zenodo...")
     
     try:
-        # 3. Stream the download
-        response = requests.get(url, stream=True)
-        response.raise_for_status() # Ensure the Zenodo link is valid
-        
-        with open(zip_temp_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+        # 3. Resumable download, verified against the record's checksum
+        zip_path = download_record_file(record_id, zip_filename, target_dir.parent, base_url=base_url)
         
         # 4. Extraction
         # Because the Bundler script included the region folder in the zip,
         # we extract it into the CMIP6 directory.
         print(f"[OSCAR] Extracting: {zip_filename}")
-        with zipfile.ZipFile(zip_temp_path, 'r') as zip_ref:
-            zip_ref.extractall(target_dir.parent)
+        extract_zip(zip_path, target_dir.parent)
+        zip_path.unlink()
 
         print(f"[OSCAR] Setup complete. Library ready at {target_dir}")
 
     except Exception as e:
         raise RuntimeError(
             f"Failed to download scientific library for {region}.\n"
-            f"Please check your internet connection or URL: {url}\n"
+            f"Please check your internet connection; running again resumes the download.\n"
+            f"Record: {get_base_url(base_url)}{record_id}\n"
             f"Error: {e}"
         )
-    finally:
-        # Cleanup temporary zip
-        if zip_temp_path.exists():
-            zip_temp_path.unlink()
 
-    return target_dir
\ No newline at end of file
+    return target_dir
@@ -2,56 +2,47 @@
 OSCAR Data Downloader
 Handles the retrieval of the heavy scientific library from Zenodo.
 """
-import zipfile
-import requests
 from .paths import get_in_dir  # Use the helper we built
+from ._transfer import download_record_file, extract_zip, get_base_url, get_record_files
 from .._utils.load_config import load_config
 
-def download_data(input_dir=None):
+def download_data(input_dir=None, base_url=None):
     """
     Initial setup: Downloads the complete input_data library from Zenodo.
     
     Args:
         input_dir (str or Path, optional): Custom path to store the library. 
                                            Defaults to PACKAGE_ROOT/data/input_data.
+        base_url (str, optional): Record API URL overriding the config (e.g. a local mirror).
     """
-    # 1. Load Zenodo URL from config
+    # 1. Load Zenodo record from config
     config = load_config()
-    url = config['paths']['zenodo_base_url']
+    record_id = config['metadata']['input_data']['zenodo_id']
     
     # 2. Resolve the target directory
     # If input_dir is None, get_in_dir() returns the default data/input_data
     target_dir = get_in_dir(input_dir)
     target_dir.mkdir(parents=True, exist_ok=True)
     
-    # Place the temporary zip file in the parent of the target folder
-    zip_path = target_dir.parent / "input_data.zip"
-    
     print(f"Downloading OSCAR Input Library to: {target_dir}")
-    print(f"Source URL: {url}")
+    print(f"Source record: {get_base_url(base_url)}{record_id}")
     
-    # 3. Download logic
+    # 3. Download logic (resumable; zips and their partial segments are kept in the parent of the target folder)
     try:
-        response = requests.get(url, stream=True)
-        response.raise_for_status() # Check for download errors
-        
-        with open(zip_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+        bundles = [name for name in get_record_files(record_id, base_url=base_url) if name.endswith('.zip')]
+        for name in bundles:
+            zip_path = download_record_file(record_id, name, target_dir.parent, base_url=base_url)
                 
-        # 4. Extraction
-        print(f"Extracting files into {target_dir.parent}...")
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            # zip_ref.extractall(target_dir.parent) 
+            # 4. Extraction (only once the checksum is verified)
             # Note: Ensure your Zip file internal structure matches the target
-            zip_ref.extractall(target_dir.parent)
+            print(f"Extracting {name} into {target_dir.parent}...")
+            extract_zip(zip_path, target_dir.parent)
+            
+            # 5. Clean up the zip file once extracted
+            zip_path.unlink()
             
         print("Setup complete. You can now run the model offline.")
 
     except Exception as e:
         print(f"Error during download: {e}")
-    
-    finally:
-        # 5. Clean up the zip file even if it fails
-        if zip_path.exists():
-            zip_path.unlink()
\ No newline at end of file
+        print("Running the download again resumes where it stopped.")
@@ -0,0 +1,133 @@
+"""
+OSCAR Configured Library Access
+Reads (and optionally re-packs) the components of a configured library.
+
+Main Logic:
+    1. Components: Each library file (e.g. params_nMC500) is read by name, in NetCDF or Zarr layout.
+    2. Selection first: Files are opened lazily; variables and slices are selected before any data is read.
+    3. Zarr layout: An optional build step writes each component as a chunked, compressed Zarr store
+       (chunked along config, scen and year, with consolidated metadata), so that readers only touch
+       the chunks of their configs, scenarios or variables.
+"""
+import os
+import shutil
+from pathlib import Path
+
+import xarray as xr
+
+# Chunk lengths of the Zarr layout (other dimensions are kept whole)
+ZARR_CHUNKS = {'config': 50, 'scen': 1, 'year': 100}
+
+
+def _require_zarr():
+    """Raises a helpful error if the optional zarr dependency is missing."""
+    try:
+        import zarr
+    except ImportError:
+        raise ImportError("the Zarr library layout requires the 'zarr' library installed (pip install oscar[zarr])")
+    return zarr
+
+
+def component_path(lib_path, name, library_format='auto'):
+    """
+    Returns the file or store of a library component.
+
+    Args:
+        lib_path (Path): Library folder (e.g. configured/CMIP6/RCP_5reg).
+        name (str): Component name, without extension (e.g. 'params_nMC500').
+        library_format (str): 'netcdf', 'zarr', or 'auto' (Zarr if built and zarr is installed, else NetCDF).
+    """
+    lib_path = Path(lib_path)
+    nc_path, zarr_path = lib_path / f"{name}.nc", lib_path / f"{name}.zarr"
+
+    if library_format == 'netcdf':
+        return nc_path
+    elif library_format == 'zarr':
+        _require_zarr()
+        if not zarr_path.exists():
+            raise FileNotFoundError(f"No Zarr store for '{name}' in {lib_path}. Build it with build_zarr_library first.")
+        return zarr_path
+    elif library_format == 'auto':
+        if zarr_path.exists():
+            try:
+                _require_zarr()
+                return zarr_path
+            except ImportError:
+                pass
+        return nc_path
+    else:
+        raise ValueError(f"Invalid library_format: '{library_format}'. Available: ['auto', 'netcdf', 'zarr']")
+
+
+def open_component(path):
+    """Opens a component lazily (NetCDF file or Zarr store with consolidated metadata)."""
+    path = Path(path)
+    if path.suffix == '.zarr':
+        _require_zarr()
+        return xr.open_zarr(path, consolidated=True, chunks=None)
+    return xr.open_dataset(path)
+
+
+def load_selected(path, variables=None, **selection):
+    """
+    Reads only the requested variables and slices of one component.
+    The component is opened lazily, so the selection is applied before any data is read.
+
+    Args:
+        path (Path): NetCDF file or Zarr store.
+        variables (iterable): Variables to keep (None keeps all); names absent from the file are ignored.
+        **selection: Indexers passed to .sel(), for the dimensions present in the file.
+    """
+    with open_component(path) as ds:
+        if variables is not None:
+            variables = set(variables)
+            ds = ds[[var for var in ds.data_vars if var in variables]]
+        ds = ds.sel({dim: sel for dim, sel in selection.items() if dim in ds.dims})
+        return ds.load()
+
+
+def _zarr_encoding(ds, chunks):
+    """Per-variable chunks of the Zarr layout (source NetCDF encodings are discarded)."""
+    encoding = {}
+    for name, var in ds.variables.items():
+        var.encoding = {}
+        if var.ndim > 0:
+            encoding[name] = {'chunks': tuple(min(chunks.get(dim, size), size) for dim, size in zip(var.dims, var.shape))}
+    return encoding
+
+
+def build_zarr_library(lib_path, chunks=None, overwrite=False):
+    """
+    Writes a chunked, compressed Zarr store next to each NetCDF component of a library.
+    Stores are written to a temporary folder and renamed in place, so readers never see half a store.
+
+    Args:
+        lib_path (Path): Library folder (e.g. configured/CMIP6/RCP_5reg).
+        chunks (dict): Chunk length per dimension (default ZARR_CHUNKS); other dimensions are kept whole.
+        overwrite (bool): Whether existing stores are rebuilt.
+    """
+    _require_zarr()
+    lib_path = Path(lib_path)
+    chunks = {**ZARR_CHUNKS, **(chunks or {})}
+
+    built = []
+    for nc_file in sorted(lib_path.glob("*.nc")):
+        store = nc_file.with_suffix('.zarr')
+        if store.exists() and not overwrite:
+            continue
+
+        # 1. Read the component (one at a time, to bound memory)
+        print(f"[OSCAR] Building Zarr store: {store.name}")
+        with xr.open_dataset(nc_file) as ds:
+            ds = ds.load()
+
+        # 2. Write chunked store (default zarr compressor), then swap it in
+        tmp = store.with_name(f".{store.name}.{os.getpid()}.tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        ds.to_zarr(tmp, mode='w', consolidated=True, encoding=_zarr_encoding(ds, chunks))
+        if store.exists():
+            shutil.rmtree(store)
+        os.replace(tmp, store)
+        built.append(store)
+
+    return built
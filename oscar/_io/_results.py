@@ -0,0 +1,99 @@
+"""
+OSCAR Result Cache
+Reuses workflow results computed from identical inputs.
+
+Main Logic:
+    1. Key: Hashes the inputs (Par/For/Ini content, library version, solver options, kept variables)
+       and the package and model code version.
+    2. Lookup: A result is named after its key, so a match is never stale.
+    3. Store: Results are written atomically (compressed NetCDF4, half precision as single precision);
+       each hit refreshes their access time.
+    4. Evict: Least recently used results are removed once the cache exceeds its size cap.
+"""
+import os
+from pathlib import Path
+
+import xarray as xr
+
+from .paths import get_cache_dir
+from ._compilers import fingerprint_dataset, code_version, make_key, write_atomic
+from ._output import prepare_output
+
+# Size cap of the result cache (least recently used results are evicted beyond it)
+RESULT_CACHE_GB = 5.0
+
+
+def get_results_dir():
+    """Returns the folder of cached results ({cache}/results)."""
+    return get_cache_dir() / "results"
+
+
+def result_key(Par, For, Ini, options, library_version=None, *extra):
+    """
+    Returns the key of a model run.
+
+    Args:
+        Par, For, Ini (xr.Dataset): Model inputs (hashed by content).
+        options (dict): Solver and output options (e.g. nt, scheme, var_keep).
+        library_version (str): Version of the library the inputs come from.
+        *extra (xr.Dataset or str): Other inputs of the cached result (e.g. historical results it is appended to).
+    """
+    # Every module defining processes, alternative formulations or helpers used in a run
+    from .._core import cls_main, mod_process, fct_process_alt, fct_misc
+
+    parts = [fingerprint_dataset(ds) for ds in (Par, For, Ini)]
+    parts += [repr(sorted((k, repr(v)) for k, v in options.items())), str(library_version)]
+    parts += [fingerprint_dataset(x) if isinstance(x, xr.Dataset) else str(x) for x in extra]
+    parts += [code_version(cls_main, mod_process, fct_process_alt, fct_misc)]
+    return make_key(*parts)
+
+
+def load_result(key):
+    """Returns the cached result of a key (loaded in memory), or None on a miss."""
+    path = get_results_dir() / f"{key}.nc"
+    try:
+        with xr.open_dataset(path) as ds:
+            ds = ds.load()
+    except (FileNotFoundError, OSError):
+        return None
+
+    # Most recently used
+    os.utime(path)
+    return ds
+
+
+def store_result(key, ds, max_gb=RESULT_CACHE_GB):
+    """Caches a result under its key, then evicts the least recently used ones beyond max_gb."""
+    path = get_results_dir() / f"{key}.nc"
+    # Same preparation as saved outputs (no inherited encodings, no half precision in netCDF)
+    ds = prepare_output(ds, 'netcdf4')
+    encoding = {var: {'zlib': True, 'complevel': 1, 'shuffle': True}
+                for var in ds.data_vars if ds[var].dtype.kind in 'fiub'}
+    write_atomic(ds, path, encoding=encoding)
+    evict_results(max_gb, keep=path)
+    return path
+
+
+def evict_results(max_gb=RESULT_CACHE_GB, keep=None):
+    """Removes the least recently used results until the cache holds at most max_gb (keep is never removed)."""
+    files = []
+    for f in get_results_dir().glob("*.nc"):
+        try:
+            stat = f.stat()
+        except FileNotFoundError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, f))
+
+    total = sum(size for _, size, _ in files)
+    for _, size, f in sorted(files, key=lambda x: x[0]):
+        if total <= max_gb * 1e9:
+            break
+        if keep is not None and Path(f) == Path(keep):
+            continue
+        f.unlink(missing_ok=True)
+        total -= size
+
+
+def clear_results():
+    """Removes all cached results."""
+    evict_results(max_gb=0)
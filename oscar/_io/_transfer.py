@@ -0,0 +1,208 @@
+"""
+OSCAR Transfers
+Resumable, verified downloads of the files published in OSCAR's Zenodo records.
+
+Main Logic:
+    1. Record: File names, sizes and checksums are read from the record API (base URL from config).
+    2. Segments: Large files are split into byte ranges fetched in parallel (HTTP Range requests).
+    3. Resume: Each segment is kept as a partial file; retries and later calls continue where it stopped.
+    4. Verify: The assembled file is checked against the published checksum before it is used.
+"""
+import os
+import time
+import shutil
+import hashlib
+import zipfile
+import concurrent.futures
+from pathlib import Path
+
+import requests
+
+from .._utils.load_config import load_config
+
+CHUNK_SIZE = 1 << 20        # read/write buffer (1 MiB)
+MIN_SEGMENT_SIZE = 32 << 20 # files smaller than this are fetched as one segment
+N_SEGMENTS = 4              # parallel byte ranges for large files
+MAX_RETRIES = 8             # attempts per segment (resuming each time)
+TIMEOUT = 60                # seconds without data before a connection is dropped
+
+
+def get_base_url(base_url=None):
+    """
+    Returns the record API URL, from the argument, the OSCAR_ZENODO_URL environment variable,
+    or the config file (in this order). A local stand-in server can thus be used for testing.
+    """
+    url = base_url or os.environ.get("OSCAR_ZENODO_URL") or load_config()['paths']['zenodo_base_url']
+    return url if url.endswith("/") else url + "/"
+
+
+def get_record_files(record_id, base_url=None, session=None):
+    """
+    Returns the files published in a record, as {name: {'url', 'size', 'checksum'}}.
+    Checksums are given as 'algorithm:hexdigest' (e.g. 'md5:...').
+    """
+    base_url = get_base_url(base_url)
+    session = session or requests.Session()
+    response = session.get(f"{base_url}{record_id}", timeout=TIMEOUT)
+    response.raise_for_status()
+    return {entry['key']: {'url': f"{base_url}{record_id}/files/{entry['key']}/content",
+                           'size': entry.get('size'),
+                           'checksum': entry.get('checksum')}
+            for entry in response.json().get('files', [])}
+
+
+def verify_file(path, checksum):
+    """Checks a file against an 'algorithm:hexdigest' checksum (always True if none is published)."""
+    if not checksum:
+        return True
+    algorithm, _, expected = checksum.partition(":")
+    digest = hashlib.new(algorithm)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest() == expected.lower()
+
+
+def _fetch_segment(session, url, part, start, end):
+    """
+    Downloads bytes start..end (inclusive) of url into part, continuing from the bytes already there.
+    If end is None, the whole file is fetched in one stream (resumed only if the server accepts ranges).
+    """
+    for attempt in range(MAX_RETRIES):
+        done = part.stat().st_size if part.exists() else 0
+        if end is not None and start + done > end:
+            return
+
+        # 1. Ask only for what is missing
+        headers = {}
+        if start + done > 0 or end is not None:
+            headers['Range'] = f"bytes={start + done}-{'' if end is None else end}"
+
+        try:
+            with session.get(url, headers=headers, stream=True, timeout=TIMEOUT) as response:
+                if response.status_code >= 500:
+                    raise requests.ConnectionError(f"server error {response.status_code}")
+
+                # 2. Range starting at the end of the file: the part was completed by an earlier call (single stream only)
+                if response.status_code == 416 and end is None and done > 0:
+                    total = response.headers.get('Content-Range', '').rpartition('/')[2]
+                    if total.isdigit() and int(total) == start + done:
+                        return
+                response.raise_for_status()
+
+                # 3. A server ignoring the range sends the whole file: start the part over (single stream only)
+                if 'Range' in headers and response.status_code != 206:
+                    if start > 0 or end is not None:
+                        raise RuntimeError(f"server does not support byte ranges: {url}")
+                    done = 0
+
+                # 4. Stream to disk
+                with open(part, 'ab' if done > 0 else 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        f.write(chunk)
+            if end is None:
+                return
+
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+            if attempt == MAX_RETRIES - 1:
+                raise RuntimeError(f"download failed after {MAX_RETRIES} attempts: {e}")
+            time.sleep(min(2 ** attempt, 30))
+
+    # Stream ended early on every attempt
+    if end is not None and start + part.stat().st_size <= end:
+        raise RuntimeError(f"download incomplete after {MAX_RETRIES} attempts: {url}")
+
+
+def download_file(url, dest, size=None, checksum=None, n_segments=N_SEGMENTS, session=None):
+    """
+    Downloads url to dest, in parallel byte ranges, and verifies it against its checksum.
+    Partial files ({dest}.part{i}of{n}) are kept after a failure, so that the next call resumes.
+
+    Args:
+        url (str): File URL.
+        dest (str or Path): Destination file.
+        size (int): Expected size in bytes (asked to the server if None).
+        checksum (str): Expected 'algorithm:hexdigest' (no verification if None).
+        n_segments (int): Number of parallel ranges for large files.
+        session (requests.Session): Session to reuse (connection pooling).
+    """
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    session = session or requests.Session()
+
+    # 1. Already there and valid
+    if dest.exists() and (size is None or dest.stat().st_size == size) and verify_file(dest, checksum):
+        return dest
+
+    # 2. Size and range support
+    accept_ranges = False
+    try:
+        head = session.head(url, allow_redirects=True, timeout=TIMEOUT)
+        if head.ok:
+            accept_ranges = head.headers.get('Accept-Ranges', '').lower() == 'bytes'
+            size = size or int(head.headers.get('Content-Length', 0)) or None
+    except requests.RequestException:
+        pass
+
+    # 3. Byte ranges (one stream if the size is unknown, the file is small, or ranges are not supported)
+    if accept_ranges and size is not None and size >= MIN_SEGMENT_SIZE and n_segments > 1:
+        bounds = [(k * size // n_segments, (k + 1) * size // n_segments - 1) for k in range(n_segments)]
+    else:
+        bounds = [(0, None)]
+    parts = [dest.with_name(f"{dest.name}.part{k}of{len(bounds)}") for k in range(len(bounds))]
+
+    # 4. Parallel fetch
+    print(f"[OSCAR] Downloading {dest.name}" + (f" ({size / 1e6:.1f} MB, {len(bounds)} segments)" if size else ""))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(bounds)) as pool:
+        futures = [pool.submit(_fetch_segment, session, url, part, start, end) for part, (start, end) in zip(parts, bounds)]
+        for future in futures:
+            future.result()
+
+    # 5. Assemble and verify (a corrupted file is discarded entirely)
+    tmp = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+    with open(tmp, 'wb') as f:
+        for part in parts:
+            with open(part, 'rb') as p:
+                shutil.copyfileobj(p, f, CHUNK_SIZE)
+    if (size is not None and tmp.stat().st_size != size) or not verify_file(tmp, checksum):
+        for path in parts + [tmp]:
+            path.unlink(missing_ok=True)
+        raise RuntimeError(f"downloaded file does not match the published checksum: {dest.name}")
+    os.replace(tmp, dest)
+    for part in parts:
+        part.unlink(missing_ok=True)
+    return dest
+
+
+def download_record_file(record_id, name, dest_dir, base_url=None, n_segments=N_SEGMENTS):
+    """
+    Downloads one file of a record into dest_dir (resumable and verified), and returns its path.
+    """
+    session = requests.Session()
+    files = get_record_files(record_id, base_url=base_url, session=session)
+    if name not in files:
+        raise RuntimeError(f"file '{name}' not found in record {record_id}. Available: {list(files)}")
+    info = files[name]
+    return download_file(info['url'], Path(dest_dir) / name, size=info['size'], checksum=info['checksum'],
+                         n_segments=n_segments, session=session)
+
+
+def extract_zip(zip_path, target_dir):
+    """
+    Extracts a verified bundle. Members are written next to their destination and renamed in place,
+    so an interrupted extraction never leaves truncated files behind.
+    """
+    target_dir = Path(target_dir).resolve()
+    with zipfile.ZipFile(zip_path, 'r') as zf:
+        for member in zf.infolist():
+            out = (target_dir / member.filename).resolve()
+            if target_dir not in out.parents and out != target_dir:
+                raise RuntimeError(f"unsafe path in bundle: {member.filename}")
+            if member.is_dir():
+                out.mkdir(parents=True, exist_ok=True)
+                continue
+            out.parent.mkdir(parents=True, exist_ok=True)
+            tmp = out.with_name(f".{out.name}.{os.getpid()}.tmp")
+            with zf.open(member) as src, open(tmp, 'wb') as dst:
+                shutil.copyfileobj(src, dst, CHUNK_SIZE)
+            os.replace(tmp, out)
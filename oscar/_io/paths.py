@@ -4,9 +4,11 @@ Location: oscar/_io/paths.py
 
 Main Logic:
     1. PACKAGE_ROOT: Identifies the repository root (OSCAR-user/).
-    2. Settings: Stores user preferences in PACKAGE_ROOT/.oscar_settings.json.
+    2. Settings: Stores user preferences in PACKAGE_ROOT/.oscar_settings.json
+       (the OSCAR_DATA_DIR environment variable overrides it, e.g. for benchmarks on synthetic data).
     3. Bootstrap: Fixed internal path for 'standard' mode (small files).
     4. Data Root: Resolved path for large scientific libraries (Configured mode).
+    5. Cache: Compiled stores derived from the data root (rebuilt on demand).
 """
 
 import os
@@ -21,6 +23,9 @@ PACKAGE_ROOT = Path(__file__).resolve().parent.parent.parent
 # By saving here, deleting the repository removes all user traces.
 SETTINGS_FILE = PACKAGE_ROOT / ".oscar_settings.json"
 
+# Environment variable overriding the saved data directory (without touching the settings file)
+DATA_DIR_ENV = "OSCAR_DATA_DIR"
+
 # 3. INTERNAL BOOTSTRAP LOCATION (Small files shipped with code)
 # Used for 'standard' mode
 INTERNAL_BOOTSTRAP_DIR = PACKAGE_ROOT / "oscar" / "_resources" / "bootstrap"
@@ -48,8 +53,11 @@ def set_data_dir(path=None):
 def get_user_data_dir() -> Path:
     """
     Retrieves the saved data directory from the local settings file.
+    The OSCAR_DATA_DIR environment variable, if set, takes precedence.
     Returns None if never set.
     """
+    if os.environ.get(DATA_DIR_ENV):
+        return Path(os.environ[DATA_DIR_ENV]).expanduser()
     if SETTINGS_FILE.exists():
         try:
             with open(SETTINGS_FILE, "r") as f:
@@ -118,4 +126,19 @@ def get_out_dir(user_provided=None):
 
 def get_configured_dir(data_dir=None):
     """Entry point for all files used in configured mode."""
-    return resolve_data_root(data_dir) / "library" / "configured"
\ No newline at end of file
+    return resolve_data_root(data_dir) / "library" / "configured"
+
+def get_cache_dir(user_provided=None):
+    """
+    Returns the Path to compiled stores and caches (safe to delete).
+    Logic: {data_root}/cache/ > Package Root Default.
+    """
+    root = resolve_data_root(user_provided)
+    if root:
+        path = root / "cache"
+    else:
+        path = PACKAGE_ROOT / "data" / "cache"
+
+    path = path.expanduser().resolve()
+    path.mkdir(parents=True, exist_ok=True)
+    return path
@@ -7,6 +7,8 @@ import xarray as xr
 from .._io.paths import get_bootstrap_dir, get_in_dir
 from .._core.fct_genMC import generate_config
 from .._core.mod_process import OSCAR
+from .._core.fct_process_alt import packed_LUC
+from .._core.fct_genD import pack_LUC_drivers
 from .load_config import load_config
 
 def generate_bootstrap():
@@ -24,9 +26,18 @@ def generate_bootstrap():
     # Generate Monte Carlo parameters
     Par = generate_config(Par0, nMC=cfg['nMC'])
 
-    # 2. COMPILE For_hist
-    from .get_SSP_drivers import For_hist
+    # 2. COMPILE For_hist (reuses the cached regional drivers if up to date)
+    from .get_drivers import compile_ar6_hist_drivers, compile_ssp_scen_drivers
     print(f"Compiling historical forcings up to {cfg['hist_end_year']}...")
+    For_hist = For_hist_full = compile_ar6_hist_drivers(cfg['region'])
+    For_scen = compile_ssp_scen_drivers(cfg['region'], For_hist_full)
+
+    # land-use drivers packed on their active transitions (shared by historical and scenarios), with the matching model
+    model = OSCAR
+    if cfg.get('packed_luc', False):
+        For_hist, For_scen = pack_LUC_drivers(For_hist, For_scen)
+        model = packed_LUC(OSCAR, For_hist.bio_pair)
+
     # move parameters from For to Par
     Par = xr.merge([Par, For_hist.drop_vars([VAR for VAR in For_hist if 'year' in For_hist[VAR].dims])])
     # remove variables without 'year' dimension from For_hist
@@ -40,14 +51,13 @@ def generate_bootstrap():
     print("For_hist saved.")
 
     # 4. Prepare & SAVE SCENARIO FORCINGS
-    from .get_SSP_drivers import For_scen
     For_scen = For_scen.sel(year=slice(cfg['scen_start_year'], cfg['scen_end_year']))
     For_scen.to_netcdf(b_dir / "forcing_scen_standard.nc")
     print("For_scen saved.")
 
     # 5. RUN HISTORICAL & FREEZE STATE    
     print(f"Running historical simulation ({cfg['hist_start_year']} to {cfg['hist_end_year']})...")
-    Out_hist = OSCAR(Ini=None, Par=Par, For=For_hist)
+    Out_hist = model(Ini=None, Par=Par, For=For_hist)
     # save Out_hist with a subset of variables to reduce size
     Out_hist_select = Out_hist[cfg['var_select']]
     Out_hist_select.to_netcdf(b_dir / "output_hist_standard.nc")
@@ -2,6 +2,7 @@
 OSCAR Driver Utility: get_drivers.py
 Centralized functions for aggregating raw datasets into regional model drivers.
 """
+import sys
 import numpy as np
 import xarray as xr
 from .._core.fct_misc import aggreg_region, load_data
@@ -10,29 +11,82 @@ from .._core.fct_loadD import (
     load_landuse_scen, load_RFdrivers_scen
 )
 from .._core.fct_loadP import load_all_param
+from .._io._catalog import get_catalog
+from .._io._compilers import (
+    compile_dataset, fingerprint_files, fingerprint_dataset, code_version, make_key, param_sources
+)
+
+# Primary datasets read by each driver compiler (also the source files of their cache key)
+HIST_DATASETS = {
+    'emissions': 'emissions_CEDS', 'landuse': 'LUH2', 'concentrations': 'concentrations_CMIP6',
+    'RF': ['radiative-forcing_AR5', 'volcanic-activity_CMIP6', 'solar-activity_CMIP6', 'aviation_ICAO'],
+}
+SCEN_DATASETS = {
+    'emissions': 'emissions_ScenarioMIP', 'landuse': 'LUH2', 'concentrations': 'concentrations_ScenarioMIP',
+    'RF': ['solar-activity_CMIP6'],
+}
+
+def _driver_files(datasets):
+    """Input files behind a set of datasets (as read by load_data, load_landuse_* and load_RFdrivers_*)."""
+    return [datasets['emissions'], f"land-use_{datasets['landuse']}", datasets['concentrations']] + list(datasets['RF'])
+
+def _driver_key(mod_region, datasets, *extra):
+    """
+    Cache key of a compiled driver set: region, datasets and their source files
+    (drivers, region mappings and parameters), compiling and store-writing code and any extra input.
+    """
+    from .._core import fct_loadD, fct_misc
+    from .._io import _compilers
+    catalog = get_catalog()
+    files = [catalog.find(name)[0] for name in _driver_files(datasets)]
+    files += list((catalog.in_dir / 'regions').glob('*.csv')) + param_sources(mod_region)
+    code = code_version(sys.modules[__name__], fct_loadD, fct_misc, _compilers)
+    return make_key(mod_region, datasets, fingerprint_files(files), code, *extra)
 
-def compile_ar6_hist_drivers(mod_region):
+def compile_ar6_hist_drivers(mod_region, use_cache=True):
     """
     Aggregates historical data (CEDS, LUH2, CMIP6) for the AR6 period.
     Timeline: 1750-2014.
+    The result is cached per region in {data_root}/cache/drivers, and only
+    recompiled if a source file or the compiling code changes.
+    """
+    if not use_cache:
+        return _compile_ar6_hist_drivers(mod_region)
+    key = _driver_key(mod_region, HIST_DATASETS)
+    return compile_dataset('drivers', f'hist_{mod_region}', key,
+                           lambda: _compile_ar6_hist_drivers(mod_region), compress=True)
+
+def compile_ssp_scen_drivers(mod_region, for_h, use_cache=True):
     """
+    Aggregates scenario data (ScenarioMIP) and applies SSP extensions.
+    Timeline: 2015-2300.
+    The result is cached per region (and content of for_h) in {data_root}/cache/drivers.
+    """
+    if not use_cache:
+        return _compile_ssp_scen_drivers(mod_region, for_h)
+    key = _driver_key(mod_region, SCEN_DATASETS, fingerprint_dataset(for_h))
+    return compile_dataset('drivers', f'scen_{mod_region}', key,
+                           lambda: _compile_ssp_scen_drivers(mod_region, for_h), compress=True)
+
+def _compile_ar6_hist_drivers(mod_region):
+    """Uncached compilation of the historical drivers (see compile_ar6_hist_drivers)."""
     Par0 = load_all_param(mod_region)
 
     # 1. load emissions
-    for_h = aggreg_region(load_data('emissions_CEDS'), mod_region).sum('sector')
+    for_h = aggreg_region(load_data(HIST_DATASETS['emissions']), mod_region).sum('sector')
     for_h = for_h.rename({'E_CO2': 'Eff'})
 
     # 2. load LULCC
-    lu_h = load_landuse_hist(mod_region, ['LUH2'], LCC='gross').sel(data_LULCC='LUH2', drop=True)
+    lu_h = load_landuse_hist(mod_region, [HIST_DATASETS['landuse']], LCC='gross').sel(data_LULCC=HIST_DATASETS['landuse'], drop=True)
     for_h = xr.merge([for_h, lu_h])
 
     # 3. load RF drivers
-    rf_h = load_RFdrivers_hist().sel(data_RF_contr='ICAO', data_RF_solar='CMIP6', data_RF_volc='CMIP6', drop=True)
+    rf_h = load_RFdrivers_hist(datasets=HIST_DATASETS['RF']).sel(data_RF_contr='ICAO', data_RF_solar='CMIP6', data_RF_volc='CMIP6', drop=True)
     for_h = xr.merge([for_h, rf_h])
     for_h['RF_contr'] *= 0
 
     # 4. load atmospheric concentrations
-    conc_h = load_data('concentrations_CMIP6').sel(region='Globe', drop=True)
+    conc_h = load_data(HIST_DATASETS['concentrations'], variables=['CO2', 'CH4', 'N2O', 'Xhalo']).sel(region='Globe', drop=True)
     for VAR in ['CO2', 'CH4', 'N2O', 'Xhalo']:
         for_h['D_'+VAR] = conc_h[VAR] - Par0[VAR+'_0']
 
@@ -43,15 +97,12 @@ def compile_ar6_hist_drivers(mod_region):
     
     return for_h.fillna(0.)
 
-def compile_ssp_scen_drivers(mod_region, for_h):
-    """
-    Aggregates scenario data (ScenarioMIP) and applies SSP extensions.
-    Timeline: 2015-2300.
-    """
+def _compile_ssp_scen_drivers(mod_region, for_h):
+    """Uncached compilation of the scenario drivers (see compile_ssp_scen_drivers)."""
     Par0 = load_all_param(mod_region)
 
     # 1. load emissions
-    for_s = aggreg_region(load_data('emissions_ScenarioMIP'), mod_region, old_axis='region', dataset='ScenarioMIP')
+    for_s = aggreg_region(load_data(SCEN_DATASETS['emissions']), mod_region, old_axis='region', dataset='ScenarioMIP')
     for_s = xr.concat([for_s, for_s.sel(year=2100).assign_coords(year=2300)], dim='year')
 
     # 2. correction: non-CO2 emissions from FF&I decrease to 0, while those from LUC stay constant
@@ -77,7 +128,7 @@ def compile_ssp_scen_drivers(mod_region, for_h):
     for_s['Eluc'].loc[dict(year=np.arange(2150+1,2300+1))] = 0. # 0 afterwards
 
     # 4. load LULCC
-    lu_s = load_landuse_scen(mod_region, ['LUH2'], LCC='gross').rename({'scen_LULCC': 'scen'})
+    lu_s = load_landuse_scen(mod_region, [SCEN_DATASETS['landuse']], LCC='gross').rename({'scen_LULCC': 'scen'})
     lu_s.coords['scen'] = [s + '-OS' * (s == 'SSP5-3.4') for s in lu_s['scen'].values]
     lu_s = lu_s.where(lu_s.year < 2100).dropna('year')
     lu_s = xr.concat([lu_s, lu_s.sel(year=2099).assign_coords(year=2300)], dim='year').interp(year=np.arange(850, 2300+1))
@@ -85,13 +136,13 @@ def compile_ssp_scen_drivers(mod_region, for_h):
     for_s = xr.merge([for_s, lu_s])
 
     # 5. load RF drivers
-    TMP = load_RFdrivers_scen().sel(scen_RF_contr='CMIP5', scen_RF_solar='CMIP6', scen_RF_volc='CMIP6', drop=True)
+    TMP = load_RFdrivers_scen(datasets=SCEN_DATASETS['RF']).sel(scen_RF_contr='CMIP5', scen_RF_solar='CMIP6', scen_RF_volc='CMIP6', drop=True)
     for VAR in TMP:
         years = (for_h[VAR].dropna('year').year + TMP[VAR].dropna('year').year).year
         for_s[VAR] = for_h[VAR].sel(year=years).mean('year') / TMP[VAR].sel(year=years).mean('year') * TMP[VAR]
 
     # 6. load atmospheric concentrations
-    conc_s = load_data('concentrations_ScenarioMIP').drop('Xhalo_eq')
+    conc_s = load_data(SCEN_DATASETS['concentrations'], variables=['CO2', 'CH4', 'N2O', 'Xhalo'])
     for VAR in ['CO2', 'CH4', 'N2O', 'Xhalo']:
         for_s['D_'+VAR] = conc_s[VAR] - Par0[VAR+'_0']
     for_s['E_Xhalo'] = 0 * for_s['D_Xhalo']
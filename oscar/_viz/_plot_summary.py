@@ -1,78 +1,162 @@
 """
 OSCAR Visualization Module
 Time-series plotting for global variables.
+
+Main Logic:
+    1. Statistics: Ensemble mean, spread and quantiles are computed once per variable,
+       for all years and scenarios at once.
+    2. Interactive mode: Figures are drawn with pyplot and shown one after another.
+    3. Headless mode (opt-in): Figures are drawn with the object-oriented Agg API (no pyplot state),
+       in a pool of processes, and saved without being shown.
 """
-import matplotlib.pyplot as plt
+import numpy as np
 import xarray as xr
 
-def plot_timeseries_summary(ds, split_year, var_list, out_dir, show_plot=True):
+from .._core.fct_misc import parallel_map
+
+
+def ensemble_stats(da, quantiles=None):
+    """
+    Returns the ensemble statistics of a variable along 'config', for all other dims at once.
+
+    Args:
+        da (xr.DataArray): Variable with a 'config' dimension (returned as its own mean otherwise).
+        quantiles (list): Quantile levels to compute as well (e.g. [0.05, 0.95]).
+    Returns:
+        dict: 'mean' and 'std' (and 'quantiles', with levels first) as xr.DataArray without 'config'.
+    """
+    if 'config' not in da.dims:
+        return {'mean': da, 'std': None, 'quantiles': None}
+
+    # 1. Single pass over the members (config last, NaN members ignored as in xarray)
+    da = da.transpose(..., 'config')
+    values = da.values
+    dims, coords = da.dims[:-1], {dim: da[dim] for dim in da.dims[:-1] if dim in da.coords}
+    stats = {'mean': xr.DataArray(np.nanmean(values, axis=-1), dims=dims, coords=coords),
+             'std': xr.DataArray(np.nanstd(values, axis=-1), dims=dims, coords=coords),
+             'quantiles': None}
+
+    # 2. All quantile levels in one call
+    if quantiles:
+        levels = np.sort(np.asarray(quantiles, dtype=float))
+        stats['quantiles'] = xr.DataArray(np.nanquantile(values, levels, axis=-1),
+            dims=('quantile',) + dims, coords={'quantile': levels, **coords})
+    return stats
+
+
+def _build_spec(ds, var, split_year, out_dir, quantiles):
+    """Collects everything needed to draw one figure (plain arrays, so it can be sent to a worker)."""
+    # 1. Select the variable DataArray and squeeze extra dims (like region)
+    # Squeezing here ensures we have a clean (year, config, [scen]) object
+    da = ds[var].squeeze()
+    stats = ensemble_stats(da, quantiles)
+    scens = list(da.scen.values) if 'scen' in da.dims else [None]
+
+    def series(years, sn):
+        out = {'year': da.year.sel(year=years).values}
+        for key, x in stats.items():
+            if x is not None:
+                x = x.sel(year=years)
+                x = (x.sel(scen=sn) if sn is not None else x).values
+            out[key] = x
+        return out
+
+    # 2. Historical: first scenario only, to avoid multiple black lines
+    spec = {'var': var, 'file': out_dir / f"plt_{var}.png",
+            'hist': series(slice(None, split_year), scens[0])}
+
+    # 3. Scenarios
+    spec['scen'] = [{'label': str(sn) if sn is not None else "Projection", **series(slice(split_year + 1, None), sn)}
+                    for sn in scens]
+
+    # 4. Professional Scientific Title Logic
+    # Build a descriptive title: "Long Name (Symbol: ΔTg | ID: D_Tg)"
+    long_name = da.attrs.get('long_name', var)
+    sci_name  = da.attrs.get('sci_name', '')
+    spec['title'] = f"{long_name} ({sci_name} | ID: {var})" if sci_name else f"{long_name} (ID: {var})"
+    spec['units'] = da.attrs.get('units', 'n/a')
+    return spec
+
+
+def _draw_band(ax, year, stat, color):
+    """Ensemble spread: quantile fan (outer bands lighter) if available, else mean ± std."""
+    if stat['quantiles'] is not None:
+        q = stat['quantiles']
+        n = len(q)
+        for k in range(n // 2):
+            ax.fill_between(year, q[k], q[n - 1 - k], color=color, alpha=0.1 + 0.15 * k / max(n // 2 - 1, 1), lw=0)
+        if n % 2:
+            ax.plot(year, q[n // 2], color=color, lw=1, ls='--')
+    elif stat['std'] is not None:
+        ax.fill_between(year, stat['mean'] - stat['std'], stat['mean'] + stat['std'], color=color, alpha=0.2)
+
+
+def _draw(ax, spec):
+    """Draws one summary figure on the given axes."""
+    # 1. Historical (Black line + band)
+    h = spec['hist']
+    ax.plot(h['year'], h['mean'], color='k', lw=2, label='Historical')
+    _draw_band(ax, h['year'], h, 'k')
+
+    # 2. Scenarios (Colored lines per scenario)
+    for s in spec['scen']:
+        line, = ax.plot(s['year'], s['mean'], lw=1.5, label=s['label'])
+        _draw_band(ax, s['year'], s, line.get_color())
+
+    ax.set_title(spec['title'], fontsize=12, fontweight='normal', pad=10)
+    ax.set_ylabel(f"[{spec['units']}]", fontsize=11)
+    ax.set_xlabel("Year", fontsize=11)
+    ax.legend(loc='upper left', fontsize='small', ncol=2 if len(spec['scen']) > 1 else 1)
+    ax.grid(True, alpha=0.3)
+
+
+def _render(spec):
+    """Draws and saves one figure with the Agg canvas (no pyplot, safe in worker processes)."""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=(9, 6))
+    FigureCanvasAgg(fig)
+    _draw(fig.add_subplot(), spec)
+    fig.savefig(spec['file'], dpi=150, bbox_inches='tight')
+    return spec['file']
+
+
+def plot_timeseries_summary(ds, split_year, var_list, out_dir, show_plot=True, headless=False, quantiles=None, max_workers=None):
     """
     Plots historical vs scenario time-series with professional scientific titles.
     Format: Long Name | Sci Name | Var Name [Unit]
+
+    Args:
+        ds (xr.Dataset): Results (year, [scen], [config]).
+        split_year (int): Last historical year.
+        var_list (list): Variables to plot (those absent from ds are skipped).
+        out_dir (Path): Folder of the saved figures (plt_{var}.png).
+        show_plot (bool): Whether to show each figure (interactive mode only).
+        headless (bool): Whether to render in parallel without pyplot (figures are then never shown);
+                         calling scripts need an "if __name__ == '__main__':" guard on spawn platforms (macOS, Windows).
+        quantiles (list): Quantile levels drawn as a fan instead of the mean ± std band (e.g. [0.05, 0.17, 0.83, 0.95]);
+                          pairs are taken from the outside in, and a middle level (e.g. 0.5) is drawn as a dashed line.
+        max_workers (int): Processes rendering figures in headless mode (1 renders in the calling process).
     """
-    for var in var_list:
-        if var not in ds:
-            continue
-        
-        plt.figure(figsize=(9, 6))
-        
-        # 1. Select the variable DataArray and squeeze extra dims (like region)
-        # Squeezing here ensures we have a clean (year, config, [scen]) object
-        da = ds[var].squeeze()
-        
-        # 2. Split Timeline
-        h = da.sel(year=slice(None, split_year))
-        s = da.sel(year=slice(split_year + 1, None))
-
-        # 3. Plot Historical (Black line + ribbon)
-        # pick the first scenario if 'scen' exists to avoid multiple black lines
-        h_plot = h.isel(scen=0) if 'scen' in h.dims else h
-        
-        if 'config' in h_plot.dims:
-            mh, sh = h_plot.mean('config'), h_plot.std('config')
-            plt.plot(h_plot.year, mh, color='k', lw=2, label='Historical')
-            plt.fill_between(h_plot.year, mh - sh, mh + sh, color='k', alpha=0.2)
-        else:
-            plt.plot(h_plot.year, h_plot, color='k', lw=2, label='Historical')
-
-        # 4. Plot Scenario (Colored lines per scenario)
-        scens = s.scen.values if 'scen' in s.dims else [None]
-        for sn in scens:
-            s_sub = s.sel(scen=sn) if sn is not None else s
-            label = str(sn) if sn is not None else "Projection"
-            
-            if 'config' in s_sub.dims:
-                ms, ss = s_sub.mean('config'), s_sub.std('config')
-                line, = plt.plot(s.year, ms, lw=1.5, label=label)
-                plt.fill_between(s.year, ms - ss, ms + ss, 
-                                 color=line.get_color(), alpha=0.2)
-            else:
-                plt.plot(s.year, s_sub, lw=1.5, label=label)
-
-        # --- 5. Professional Scientific Title Logic ---
-        long_name = da.attrs.get('long_name', var)
-        sci_name  = da.attrs.get('sci_name', '')
-        units     = da.attrs.get('units', 'n/a')
-        
-        # Build a descriptive title: "Long Name (Symbol: ΔTg | ID: D_Tg)"
-        title_str = f"{long_name}"
-        if sci_name:
-            title_str += f" ({sci_name} | ID: {var})"
-        else:
-            title_str += f" (ID: {var})"
-        
-        plt.title(title_str, fontsize=12, fontweight='normal', pad=10)
-        plt.ylabel(f"[{units}]", fontsize=11)
-        plt.xlabel("Year", fontsize=11)
-        plt.legend(loc='upper left', fontsize='small', ncol=2 if len(scens) > 1 else 1)
-        plt.grid(True, alpha=0.3)
-
-        # 6. Save and Close
-        plot_file = out_dir / f"plt_{var}.png"
-        plt.savefig(plot_file, dpi=150, bbox_inches='tight')
-        print(f"Plot saved: {plot_file}")
-        
+    # 1. Statistics, all at once per variable
+    specs = [_build_spec(ds, var, split_year, out_dir, quantiles) for var in var_list if var in ds]
+
+    # 2. Headless: parallel Agg rendering
+    if headless:
+        for plot_file in parallel_map(_render, specs, max_workers=max_workers, use_processes=True):
+            print(f"Plot saved: {plot_file}")
+        return
+
+    # 3. Interactive: pyplot, one figure after another
+    import matplotlib.pyplot as plt
+    for spec in specs:
+        fig = plt.figure(figsize=(9, 6))
+        _draw(fig.gca(), spec)
+        fig.savefig(spec['file'], dpi=150, bbox_inches='tight')
+        print(f"Plot saved: {spec['file']}")
+
         if show_plot:
             plt.show()
         else:
-            plt.close()
\ No newline at end of file
+            plt.close(fig)
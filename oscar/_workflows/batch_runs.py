@@ -0,0 +1,263 @@
+"""
+OSCAR - Batch Workflow
+Manifest-driven configured runs over many libraries, scenarios and variable sets.
+
+Main Logic:
+    1. Manifest: A YAML file (or dict) lists hist types, regions, scenarios and variable sets ('all' expands the menu).
+    2. Job matrix: One job per (hist_type, region, scenario, variable set).
+    3. Groups: Jobs sharing a library are grouped, so each library is loaded once,
+       and its scenarios are projected together for all their variable sets.
+    4. Scheduler: Groups run in a pool of processes, under a cap on concurrent groups and on estimated memory.
+    5. Summary: Run time, status and output location of each job (printed and saved as JSON).
+
+Example manifest:
+    hist_type: CMIP6
+    region: [RCP_5reg, AR6_5reg]
+    scenario: all
+    variables:
+      climate: [D_Tg, D_OHC]
+      carbon: [D_CO2, D_Focean, D_Fland]
+    scen_per_run: 3        # scenarios projected together (default: all; fewer bounds memory)
+    output_format: netcdf4
+    max_workers: 2
+    max_memory_gb: 16
+"""
+import os
+import json
+import time
+import concurrent.futures
+from pathlib import Path
+
+import yaml
+
+from .._utils.load_config import load_config
+from .._io.paths import get_out_dir
+from .._io._download import ensure_configured_library
+from .._io._library import component_path
+from .._io._output import output_path, write_output
+from .configured_runs import load_configured_library, project_configured, _validate_choice
+
+# Estimated peak memory of a group, as a multiple of the size of its library files
+MEMORY_FACTOR = 4
+
+
+def load_manifest(manifest, **overrides):
+    """
+    Reads a manifest (path to a YAML file, or dict) and fills in the defaults of the configured mode.
+    Overrides (those not None) replace the manifest entries of the same name.
+    """
+    if not isinstance(manifest, dict):
+        with open(manifest, "r", encoding="utf-8-sig") as f:
+            manifest = yaml.safe_load(f) or {}
+    manifest = {**manifest, **{k: v for k, v in overrides.items() if v is not None}}
+
+    menu = load_config()['configured_options']
+    defaults = menu['defaults']
+
+    def as_list(value, default, menu_list):
+        value = default if value is None else value
+        if value == 'all':
+            return list(menu_list)
+        return [value] if isinstance(value, str) else list(value)
+
+    # 1. Axes of the job matrix
+    out = dict(manifest)
+    out['hist_type'] = as_list(manifest.get('hist_type'), defaults['hist_type'], menu['hist_list'])
+    out['region'] = as_list(manifest.get('region'), defaults['region'], menu['region_list'])
+    out['scenario'] = as_list(manifest.get('scenario'), defaults['scenario'], menu['scen_list'])
+
+    # 2. Variable sets: one list, a list of lists, or named lists
+    var_sets = manifest.get('variables', defaults['variables'])
+    if var_sets == 'all':
+        var_sets = {'all': list(menu['var_list'])}
+    elif isinstance(var_sets, str) or (isinstance(var_sets, list) and all(isinstance(v, str) for v in var_sets)):
+        var_sets = {'vars': [var_sets] if isinstance(var_sets, str) else list(var_sets)}
+    elif isinstance(var_sets, list):
+        var_sets = {f"vars{k}": list(v) for k, v in enumerate(var_sets)}
+    out['variables'] = {name: [v] if isinstance(v, str) else list(v) for name, v in var_sets.items()}
+
+    # 3. Validation (before anything is downloaded or run)
+    for h in out['hist_type']:
+        _validate_choice(h, menu['hist_list'].keys(), "hist_type")
+    for r in out['region']:
+        _validate_choice(r, menu['region_list'], "region")
+    for s in out['scenario']:
+        _validate_choice(s, menu['scen_list'], "scenario")
+    for var_set in out['variables'].values():
+        for v in var_set:
+            _validate_choice(v, menu['var_list'], "variable")
+    return out
+
+
+def expand_jobs(manifest):
+    """Returns the job matrix of a manifest: one dict per (hist_type, region, scenario, variable set)."""
+    manifest = load_manifest(manifest)
+    return [{'hist_type': h, 'region': r, 'scenario': s, 'var_set': name, 'variables': var_set}
+            for h in manifest['hist_type'] for r in manifest['region']
+            for s in manifest['scenario'] for name, var_set in manifest['variables'].items()]
+
+
+def group_jobs(jobs):
+    """Groups jobs by library (hist_type, region), keeping the order of first appearance."""
+    groups = {}
+    for job in jobs:
+        groups.setdefault((job['hist_type'], job['region']), []).append(job)
+    return [{'hist_type': h, 'region': r, 'jobs': group} for (h, r), group in groups.items()]
+
+
+def _library_size(lib_path, library_format='auto'):
+    """Size in bytes of the components of a library, in the layout load_configured_library opens (NetCDF file or Zarr store)."""
+    lib_path = Path(lib_path)
+    size = 0
+    for name in {p.stem for p in lib_path.iterdir() if p.suffix in ('.nc', '.zarr')}:
+        path = component_path(lib_path, name, library_format)
+        files = path.rglob('*') if path.is_dir() else [path]
+        size += sum(f.stat().st_size for f in files if f.is_file())
+    return size
+
+
+def _physical_memory():
+    """Physical memory in bytes, or None where the platform does not report it."""
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def _run_group(group):
+    """
+    Runs all the jobs of one library: loads it once (all scenarios and variables of the group),
+    projects its scenarios together (in runs of scen_per_run scenarios), and writes one output per job.
+    Reported times split the load and run times evenly among the jobs sharing them.
+    Errors are recorded in the summary rather than raised, so other groups keep running.
+    """
+    jobs, options = group['jobs'], group['options']
+    scenarios = list(dict.fromkeys(job['scenario'] for job in jobs))
+    variables = list(dict.fromkeys(v for job in jobs for v in job['variables']))
+    summary = []
+
+    # 1. Library, once
+    t0 = time.time()
+    try:
+        library = load_configured_library(group['hist_type'], group['region'], scenarios, variables, options['library_format'])
+    except Exception as e:
+        return [{**job, 'status': 'failed', 'error': f"library: {e}", 'seconds': 0.0, 'output': None} for job in jobs]
+    load_time = (time.time() - t0) / len(jobs)
+
+    # 2. Projections, several scenarios at once (OSCAR is vectorized along scen), split into jobs
+    step = options['scen_per_run'] or len(scenarios)
+    for k in range(0, len(scenarios), step):
+        scens = scenarios[k:k + step]
+        run_jobs = [job for job in jobs if job['scenario'] in scens]
+        run_vars = list(dict.fromkeys(v for job in run_jobs for v in job['variables']))
+        t0 = time.time()
+        try:
+            Out_all = project_configured(library, scens, run_vars, use_cache=options['use_cache'], **options['oscar_options'])
+        except Exception as e:
+            summary += [{**job, 'status': 'failed', 'error': str(e), 'seconds': (time.time() - t0) / len(run_jobs) + load_time, 'output': None} for job in run_jobs]
+            continue
+        run_time = (time.time() - t0) / len(run_jobs) + load_time
+
+        # 3. One output per job
+        for job in run_jobs:
+            t1 = time.time()
+            out_file = output_path(options['out_dir'], f"oscar_batch_{job['hist_type']}_{job['region']}_{job['scenario']}_{job['var_set']}", options['output_format'])
+            try:
+                Out_job = Out_all[job['variables']]
+                Out_job = Out_job.sel(scen=[job['scenario']]) if 'scen' in Out_job.dims else Out_job
+                write_output(Out_job, out_file, options['output_format'], **options['output_options'])
+                summary.append({**job, 'status': 'done', 'error': None, 'seconds': run_time + time.time() - t1, 'output': str(out_file)})
+            except Exception as e:
+                summary.append({**job, 'status': 'failed', 'error': f"write: {e}", 'seconds': run_time + time.time() - t1, 'output': None})
+
+    return summary
+
+
+def _schedule(groups, max_workers, max_memory):
+    """
+    Runs groups in a process pool: a group starts when a worker is free and its estimated memory fits
+    under max_memory (a group larger than the cap runs alone). Largest groups are started first.
+    """
+    # 1. Sequential execution in the calling process
+    if max_workers <= 1 or len(groups) <= 1:
+        return [row for group in groups for row in _run_group(group)]
+
+    # 2. Concurrent execution under the caps
+    pending = sorted(groups, key=lambda g: -g['memory'])
+    running, used, summary = {}, 0, []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            for group in list(pending):
+                if len(running) >= max_workers:
+                    break
+                if running and max_memory is not None and used + group['memory'] > max_memory:
+                    continue
+                pending.remove(group)
+                running[pool.submit(_run_group, group)] = group
+                used += group['memory']
+
+            done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                used -= running.pop(future)['memory']
+                summary += future.result()
+    return summary
+
+
+def run_batch(manifest, max_workers=None, max_memory_gb=None, dry_run=False, **kwargs):
+    """
+    Runs the job matrix of a manifest, one library load per (hist_type, region).
+
+    Args:
+        manifest (str, Path or dict): YAML manifest (see module docstring) or its content.
+        max_workers (int): Libraries processed concurrently (overrides the manifest; default: one per CPU).
+        max_memory_gb (float): Cap on the estimated memory of concurrent groups (overrides the manifest;
+                               default: 80% of the physical memory).
+        dry_run (bool): Whether to only print the job matrix and groups.
+        **kwargs: Overrides of other manifest entries (e.g. output_format).
+    Returns:
+        list: Summary of each job (hist_type, region, scenario, var_set, status, seconds, output, error).
+    """
+    # 1. Manifest and job matrix
+    manifest = load_manifest(manifest, **kwargs)
+    jobs = expand_jobs(manifest)
+    groups = group_jobs(jobs)
+    print(f"[OSCAR] Batch: {len(jobs)} jobs in {len(groups)} library groups.")
+    if dry_run:
+        for group in groups:
+            print(f"  {group['hist_type']}/{group['region']}: " + ", ".join(f"{j['scenario']}:{j['var_set']}" for j in group['jobs']))
+        return jobs
+
+    # 2. Shared options, output folder and libraries (downloaded here, once, before workers start)
+    out_dir = get_out_dir() / "batch_run" / manifest.get('name', 'batch')
+    out_dir.mkdir(parents=True, exist_ok=True)
+    options = {'out_dir': out_dir,
+               'library_format': manifest.get('library_format', 'auto'),
+               'output_format': manifest.get('output_format', 'netcdf4'),
+               'output_options': manifest.get('output_options') or {},
+               'oscar_options': manifest.get('oscar_options') or {},
+               'scen_per_run': manifest.get('scen_per_run'),
+               'use_cache': manifest.get('use_cache', True)}
+    per_group = manifest.get('memory_per_group_gb')
+    for group in groups:
+        lib_path = ensure_configured_library(group['hist_type'], group['region'])
+        group['options'] = options
+        group['memory'] = per_group * 1e9 if per_group else MEMORY_FACTOR * _library_size(lib_path, options['library_format'])
+
+    # 3. Caps
+    max_workers = max_workers or manifest.get('max_workers') or min(len(groups), os.cpu_count() or 1)
+    max_memory_gb = max_memory_gb or manifest.get('max_memory_gb')
+    max_memory = max_memory_gb * 1e9 if max_memory_gb else (0.8 * _physical_memory() if _physical_memory() else None)
+
+    # 4. Run
+    t0 = time.time()
+    summary = _schedule(groups, max_workers, max_memory)
+
+    # 5. Summary
+    with open(out_dir / "batch_summary.json", "w") as f:
+        json.dump(summary, f, indent=2)
+    print(f"\n{'hist_type':<10}{'region':<12}{'scenario':<18}{'var_set':<12}{'status':<8}{'time [s]':>9}  output")
+    for row in summary:
+        print(f"{row['hist_type']:<10}{row['region']:<12}{row['scenario']:<18}{row['var_set']:<12}{row['status']:<8}{row['seconds']:>9.1f}  {row['output'] or row['error']}")
+    n_done = sum(row['status'] == 'done' for row in summary)
+    print(f"[OSCAR] Batch finished in {time.time() - t0:.1f} s: {n_done}/{len(summary)} jobs done. Summary: {out_dir / 'batch_summary.json'}")
+    return summary
@@ -6,6 +6,9 @@ import xarray as xr
 from .._utils.load_config import load_config
 from .._io.paths import get_configured_dir, get_out_dir
 from .._io._download import ensure_configured_library
+from .._io._library import component_path, load_selected
+from .._io._output import output_path, write_output
+from .._io._results import result_key, load_result, store_result
 from .._core.mod_process import OSCAR
 from .._utils.metadata import apply_variable_metadata
 
@@ -16,6 +19,10 @@ def run_configured(
     variables=None, # user-selected output variables
     show_plot=True, # whether to display summary plots
     run_model=True, # whether to run the model (set False to only plot)
+    library_format='auto', # library layout: 'netcdf', 'zarr', or 'auto' (Zarr stores if built)
+    output_format='netcdf4', # results backend: 'netcdf4' (compressed), 'zarr', or 'netcdf3' (compatibility)
+    output_options=None,   # passed to oscar._io._output.write_output (complevel, var_complevel, chunks, max_workers)
+    use_cache=True,        # whether to reuse results of identical runs (see oscar._io._results)
     **kwargs
 ):
     """
@@ -28,6 +35,11 @@ def run_configured(
     - {data_root}/configured/{hist_type}/{region}/forcing_scen.nc
     - {data_root}/configured/{hist_type}/{region}/hist_results_nMC500.nc
     - {data_root}/configured/{hist_type}/{region}/ini_state_nMC500.nc
+    Each file may also be read from a chunked Zarr store of the same name (.zarr),
+    built with oscar._io._library.build_zarr_library (requires 'zarr').
+
+    Results are saved as compressed NetCDF4 by default (chunked for time-series access);
+    'zarr' writes variables concurrently, and 'netcdf3' keeps the former uncompressed files.
     -------------------------------------------------------------------------
     """
     # 1. LOAD CONFIGURATION SPECIFICATIONS
@@ -46,15 +58,13 @@ def run_configured(
     vars_final   = [vars_input] if isinstance(vars_input, str) else list(vars_input)
 
     hist_end_year   = menu['hist_list'][hist_final]
-    scen_start_year = hist_end_year + 1
-    scen_end_year   = menu['projection_end_year']
     
     nMC = menu['official_nMC']
 
     # Setup Output Path
     out_dir = get_out_dir() / "configured_run"
     out_dir.mkdir(parents=True, exist_ok=True)
-    out_file = out_dir / f"oscar_configured_{hist_final}_{region_final}.nc"
+    out_file = output_path(out_dir, f"oscar_configured_{hist_final}_{region_final}", output_format)
 
     if run_model:
         # 3. VALIDATION
@@ -67,48 +77,102 @@ def run_configured(
 
         # 4. LOAD LIBRARY COMPONENTS
         print(f"Loading official library for {region_final} ({nMC} members)...")
-        lib_path = ensure_configured_library(hist_final, region_final)
-        
-        # Load time-series results (for plotting) and the frozen state (for simulation)
-        hist_results = xr.open_dataset(lib_path / f"hist_results_nMC{nMC}.nc").load()
-        ini_state    = xr.open_dataset(lib_path / f"ini_state_nMC{nMC}.nc").load()
-        scen_forcing = xr.open_dataset(lib_path / "forcing_scen.nc").load()
-        params       = xr.open_dataset(lib_path / f"params_nMC{nMC}.nc").load()
-
-        # 5. ENSURE COMPLETE LIBRARY
-        lib_path = ensure_configured_library(hist_final, region_final)
-        print(f"Library components loaded successfully, in : {lib_path}")
-        
-        # 6. PREPARE INPUTS
-        For_scen = scen_forcing.sel(scen=scen_final, year=slice(scen_start_year, scen_end_year))
-        # Use the specialized ini_state file which contains all required restart variables
-        Ini = ini_state
+        library = load_configured_library(hist_final, region_final, scen_final, vars_final, library_format)
+        print(f"Library components loaded successfully, in : {library['path']}")
         
-        # 7. EXECUTE PROJECTION
+        # 5. EXECUTE PROJECTION & 6. COMBINE WITH HISTORY
         print(f"Running OSCAR (configured mode) for scenarios: {scen_final}")
-        Out_scen = OSCAR(Ini=Ini, Par=params, For=For_scen, nt=4, var_keep=vars_final, **kwargs) #always specify vars_final to make sure rquested variables are saved
-        
-        # 8. COMBINE & APPLY METADATA
-        print("Cleaning results and applying metadata...")
-        Out_all = xr.concat([hist_results[vars_final], Out_scen[vars_final]], dim='year')
-        Out_all = apply_variable_metadata(Out_all)
+        Out_all = project_configured(library, scen_final, vars_final, use_cache=use_cache, **kwargs)
 
-        # 9. SAVE
-        Out_all.to_netcdf(out_file, format="NETCDF3_64BIT")
+        # 7. SAVE
+        write_output(Out_all, out_file, output_format, **(output_options or {}))
         print(f"Success! Data saved to: {out_file}")
     
     else:
         # --- PLOT ONLY MODE ---
         if not out_file.exists():
             raise FileNotFoundError(f"No results found. Run with run_model=True first.")
-        Out_all = xr.open_dataset(out_file).load()
+        Out_all = load_selected(out_file, variables=vars_final)
 
-    # 10. PLOT SUMMARY
+    # 8. PLOT SUMMARY
     from .._viz import plot_timeseries_summary
     plot_timeseries_summary(Out_all, hist_end_year, vars_final, out_dir=out_dir, show_plot=show_plot)
     
     return Out_all
 
+def load_configured_library(hist_type, region, scenarios, variables, library_format='auto'):
+    """
+    Loads the components of a configured library needed to project some scenarios.
+    Files are opened lazily: only the selected variables, scenarios and years are read.
+
+    Args:
+        hist_type (str): Historical dataset (e.g. 'CMIP6').
+        region (str): Region aggregation (e.g. 'RCP_5reg').
+        scenarios (list): Scenarios to project.
+        variables (list): Output variables (of the historical results).
+        library_format (str): Library layout: 'netcdf', 'zarr', or 'auto'.
+    Returns:
+        dict: 'path', 'version', 'hist_results', 'Ini', 'For' and 'Par'.
+    """
+    full_cfg = load_config()
+    menu = full_cfg['configured_options']
+    nMC = menu['official_nMC']
+    scen_start_year = menu['hist_list'][hist_type] + 1
+    scen_end_year = menu['projection_end_year']
+
+    lib_path = ensure_configured_library(hist_type, region)
+    model_vars = OSCAR.var_all
+    component = lambda name: component_path(lib_path, name, library_format)
+
+    return {
+        'path': lib_path,
+        'version': full_cfg['metadata']['configured']['version'],
+        # Time-series results (for plotting): requested variables only
+        'hist_results': load_selected(component(f"hist_results_nMC{nMC}"), variables=variables),
+        # Frozen state (for simulation): the specialized ini_state file contains all required restart variables
+        'Ini': load_selected(component(f"ini_state_nMC{nMC}"), variables=model_vars, scen=scenarios),
+        # Forcing: requested scenarios over the projection period
+        'For': load_selected(component("forcing_scen"), variables=model_vars, scen=scenarios, year=slice(scen_start_year, scen_end_year)),
+        'Par': load_selected(component(f"params_nMC{nMC}")),
+    }
+
+
+def project_configured(library, scenarios, variables, use_cache=True, **kwargs):
+    """
+    Projects scenarios from a loaded library and appends them to the historical results.
+    The library may hold more scenarios and variables than requested (e.g. shared by several runs).
+
+    Args:
+        library (dict): Output of load_configured_library.
+        scenarios (list): Scenarios to project (subset of those loaded).
+        variables (list): Output variables (subset of those loaded).
+        use_cache (bool): Whether to reuse (and store) the result of an identical run.
+        **kwargs: Passed to OSCAR.
+    """
+    Ini, For = [ds.sel(scen=scenarios) if 'scen' in ds.dims else ds for ds in (library['Ini'], library['For'])]
+    hist_results = library['hist_results'][variables]
+    options = {'nt': 4, 'var_keep': list(variables), **kwargs}
+
+    # 1. Cached result of the same inputs and options
+    if use_cache:
+        key = result_key(library['Par'], For, Ini, options, library['version'], hist_results)
+        Out_all = load_result(key)
+        if Out_all is not None:
+            print(f"[OSCAR] Reusing cached results ({key}).")
+            return Out_all
+
+    # 2. Projection
+    Out_scen = OSCAR(Ini=Ini, Par=library['Par'], For=For, **options) #always specify var_keep to make sure rquested variables are saved
+
+    print("Cleaning results and applying metadata...")
+    Out_all = xr.concat([hist_results, Out_scen[variables]], dim='year')
+    Out_all = apply_variable_metadata(Out_all)
+
+    if use_cache:
+        store_result(key, Out_all)
+    return Out_all
+
+
 def _validate_choice(value, allowed_list, name):
     if value not in allowed_list:
-        raise ValueError(f"Invalid {name}: '{value}'. Available: {list(allowed_list)}")
\ No newline at end of file
+        raise ValueError(f"Invalid {name}: '{value}'. Available: {list(allowed_list)}")
@@ -0,0 +1,212 @@
+"""
+OSCAR - Resident Service
+Long-lived local HTTP server answering configured-run requests from warm memory.
+
+Main Logic:
+    1. Warm state: The model, the parsed config and the recently used libraries stay in memory
+       (libraries in a small LRU, each loaded once for all scenarios and variables of the menu).
+    2. Requests: JSON over HTTP on localhost (POST /run; GET /health, GET /info).
+    3. Runs: Projections are serialized by a lock (one model run at a time); results go through the
+       result cache, and are returned as a file path or inline as JSON.
+    4. Outputs: Writes of the same output file (identical requests in flight) are serialized by a per-file lock.
+
+Example:
+    oscar serve --port 8765
+    curl -X POST localhost:8765/run -d '{"scenario": ["SSP2-4.5"], "variables": ["D_Tg"], "return": "json"}'
+"""
+import json
+import time
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import numpy as np
+
+from .._utils.load_config import load_config
+from .._io.paths import get_out_dir
+from .._io._output import output_path, write_output
+from .configured_runs import load_configured_library, project_configured, _validate_choice
+
+DEFAULT_PORT = 8765
+MAX_LIBRARIES = 4  # libraries kept in memory (least recently used ones are dropped)
+
+
+class OscarService:
+    """
+    Warm state of the server: config, libraries (LRU) and the run lock.
+    Can also be used directly from Python (service.run(...)) without HTTP.
+    """
+
+    def __init__(self, max_libraries=MAX_LIBRARIES, library_format='auto'):
+        # Import the model now, so that the first request does not pay for it
+        from .._core.mod_process import OSCAR
+        self.model = OSCAR
+        self.config = load_config()
+        self.menu = self.config['configured_options']
+        self.max_libraries = max_libraries
+        self.library_format = library_format
+        self.libraries = OrderedDict()
+        self.lib_lock = threading.Lock()
+        self.run_lock = threading.Lock()
+        self.file_locks = {}  # path -> (lock, number of requests using it), dropped once unused
+        self.file_locks_lock = threading.Lock()
+        self.started = time.time()
+        self.n_runs = 0
+
+    def get_library(self, hist_type, region):
+        """Returns a library loaded for all menu scenarios and variables (from memory if recently used)."""
+        key = (hist_type, region)
+        with self.lib_lock:
+            if key in self.libraries:
+                self.libraries.move_to_end(key)
+                return self.libraries[key]
+
+            library = load_configured_library(hist_type, region, list(self.menu['scen_list']), list(self.menu['var_list']), self.library_format)
+            self.libraries[key] = library
+            while len(self.libraries) > self.max_libraries:
+                self.libraries.popitem(last=False)
+            return library
+
+    def run(self, scenario=None, region=None, hist_type=None, variables=None, overrides=None, output_format='netcdf4', use_cache=True):
+        """
+        Runs one configured projection (same selections and defaults as run_configured).
+
+        Returns:
+            tuple: (xr.Dataset of results, Path of the saved file, run time in seconds)
+        """
+        defaults = self.menu['defaults']
+        hist_final = hist_type or defaults['hist_type']
+        region_final = region or defaults['region']
+        scen_input = scenario or defaults['scenario']
+        scen_final = [scen_input] if isinstance(scen_input, str) else list(scen_input)
+        vars_input = variables or defaults['variables']
+        vars_final = [vars_input] if isinstance(vars_input, str) else list(vars_input)
+
+        # 1. Validation
+        _validate_choice(hist_final, self.menu['hist_list'].keys(), "hist_type")
+        _validate_choice(region_final, self.menu['region_list'], "region")
+        for s in scen_final:
+            _validate_choice(s, self.menu['scen_list'], "scenario")
+        for v in vars_final:
+            _validate_choice(v, self.menu['var_list'], "variable")
+
+        # 2. Warm library, then one run at a time
+        t0 = time.time()
+        library = self.get_library(hist_final, region_final)
+        with self.run_lock:
+            Out_all = project_configured(library, scen_final, vars_final, use_cache=use_cache, **(overrides or {}))
+            self.n_runs += 1
+
+        # 3. Save (named after the request, so concurrent clients do not overwrite each other)
+        out_dir = get_out_dir() / "service"
+        stem = f"oscar_service_{hist_final}_{region_final}_{'+'.join(scen_final)}_{'+'.join(vars_final)}"
+        out_file = output_path(out_dir, stem, output_format)
+        with self.file_lock(out_file):
+            write_output(Out_all, out_file, output_format)
+        return Out_all, out_file, time.time() - t0
+
+    @contextmanager
+    def file_lock(self, path):
+        """Holds the lock of an output file (created on first use, and dropped once no request uses it)."""
+        with self.file_locks_lock:
+            lock, users = self.file_locks.get(path, (None, 0))
+            lock = lock or threading.Lock()
+            self.file_locks[path] = (lock, users + 1)
+        try:
+            with lock:
+                yield
+        finally:
+            with self.file_locks_lock:
+                lock, users = self.file_locks[path]
+                if users == 1:
+                    del self.file_locks[path]
+                else:
+                    self.file_locks[path] = (lock, users - 1)
+
+    def health(self):
+        return {'status': 'ok', 'uptime': time.time() - self.started, 'runs': self.n_runs,
+                'libraries': [f"{h}/{r}" for h, r in self.libraries]}
+
+
+def _to_json(ds):
+    """Results as JSON-ready dict (coords and values as lists, NaN as null)."""
+    def clean(values):
+        values = np.asarray(values)
+        if values.dtype.kind == 'f':
+            return np.where(np.isnan(values), None, values).tolist()
+        return values.tolist()
+    return {'coords': {dim: clean(ds[dim].values) for dim in ds.dims if dim in ds.coords},
+            'data_vars': {var: {'dims': list(ds[var].dims), 'attrs': dict(ds[var].attrs), 'data': clean(ds[var].values)}
+                          for var in ds.data_vars}}
+
+
+def _make_handler(service):
+    """Request handler bound to a service."""
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def _send(self, code, body):
+            payload = json.dumps(body, default=str).encode()
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._send(200, service.health())
+            elif self.path == '/info':
+                self._send(200, service.menu)
+            else:
+                self._send(404, {'error': f"unknown path: {self.path}"})
+
+        def do_POST(self):
+            if self.path != '/run':
+                return self._send(404, {'error': f"unknown path: {self.path}"})
+            try:
+                request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b"{}")
+                to_return = request.pop('return', 'path')
+                Out_all, out_file, seconds = service.run(**request)
+            except (ValueError, TypeError, json.JSONDecodeError) as e:
+                return self._send(400, {'error': str(e)})
+            except Exception as e:
+                return self._send(500, {'error': f"{type(e).__name__}: {e}"})
+
+            body = {'status': 'done', 'seconds': seconds, 'output': str(out_file)}
+            if to_return == 'json':
+                body['results'] = _to_json(Out_all)
+            self._send(200, body)
+
+        def log_message(self, format, *args):
+            print(f"[OSCAR] {self.address_string()} {format % args}")
+
+    return Handler
+
+
+def serve(host='127.0.0.1', port=DEFAULT_PORT, max_libraries=MAX_LIBRARIES, library_format='auto', preload=()):
+    """
+    Starts the service and blocks until interrupted (Ctrl+C).
+
+    Args:
+        host (str): Interface to listen on (localhost by default; the service has no authentication).
+        port (int): TCP port.
+        max_libraries (int): Libraries kept warm in memory.
+        library_format (str): Library layout: 'netcdf', 'zarr', or 'auto'.
+        preload (list): (hist_type, region) libraries to load before accepting requests.
+    """
+    service = OscarService(max_libraries=max_libraries, library_format=library_format)
+    for hist_type, region in preload:
+        print(f"[OSCAR] Preloading library {hist_type}/{region}...")
+        service.get_library(hist_type, region)
+
+    server = ThreadingHTTPServer((host, port), _make_handler(service))
+    print(f"[OSCAR] Service ready on http://{host}:{port} (POST /run, GET /health, GET /info). Ctrl+C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print("[OSCAR] Service stopped.")
@@ -5,18 +5,22 @@ Author: Biqing Zhu
 """
 import xarray as xr
 from .._core.mod_process import OSCAR
+from .._core.fct_process_alt import packed_LUC
 from .._io.paths import get_bootstrap_dir, get_out_dir
+from .._io._output import output_path, write_output
+from .._io._library import load_selected
 from .._utils.load_config import load_config
 from .._utils.metadata import apply_variable_metadata
-from .._viz import plot_timeseries_summary
 
-def run_standard(show_plot=True, run_model=True,**kwargs):
+def run_standard(show_plot=True, run_model=True, output_format='netcdf4', output_options=None, **kwargs):
+    # output_format: 'netcdf4' (compressed, default), 'zarr', or 'netcdf3' (NETCDF3_64BIT compatibility mode)
+    # output_options: passed to oscar._io._output.write_output (complevel, var_complevel, chunks, max_workers)
     # 1. Load instructions from YAML
     cfg = load_config()['bootstrap_specs']
     b_dir = get_bootstrap_dir()
     out_dir = get_out_dir() / "standard_run"
     out_dir.mkdir(parents=True, exist_ok=True)
-    out_file = out_dir / "oscar_standard_results.nc"
+    out_file = output_path(out_dir, "oscar_standard_results", output_format)
 
     if run_model:
         # 2. Load the "Starter Kit" from internal package resources
@@ -30,8 +34,10 @@ def run_standard(show_plot=True, run_model=True,**kwargs):
         For = For.sel(year=slice(cfg['scen_start_year'], cfg['scen_end_year']))
         
         # 3. Run the model projection
+        # (with the packed book-keeping if the bootstrap was generated with packed_luc)
+        model = packed_LUC(OSCAR, For.bio_pair) if 'bio_pair' in For.dims else OSCAR
         print(f"Running OSCAR projection (Standard Mode)...")
-        Out_scen = OSCAR(Ini=Ini, Par=Par, For=For, nt=4)
+        Out_scen = model(Ini=Ini, Par=Par, For=For, nt=4)
         
         # Select subset of variables and combine into a single timeline
         Out_scen_sel = Out_scen[cfg['var_select']]
@@ -42,8 +48,7 @@ def run_standard(show_plot=True, run_model=True,**kwargs):
         Out_all = apply_variable_metadata(Out_all)
 
         # 5. Save results
-        # Use NETCDF3_64BIT for robustness on all systems
-        Out_all.to_netcdf(out_file, format="NETCDF3_64BIT")
+        write_output(Out_all, out_file, output_format, **(output_options or {}))
         print(f"Success! Data saved to: {out_file}")
         
     else:
@@ -51,10 +56,11 @@ def run_standard(show_plot=True, run_model=True,**kwargs):
         print(f"Loading existing results for plotting from: {out_file}")
         if not out_file.exists():
             raise FileNotFoundError(f"No results found. Run with run_model=True first.")
-        Out_all = xr.open_dataset(out_file).load()
+        Out_all = load_selected(out_file)
 
     # 6. Generate Summary Plots (Using centralized viz module)
     # Passed variables: dataset, split_year, var_list, output_dir, show_toggle
+    from .._viz import plot_timeseries_summary
     plot_timeseries_summary(
         ds=Out_all, 
         split_year=cfg['hist_end_year'], 
@@ -29,6 +29,9 @@ def main(ctx):
               help='Library region name.')
 @click.option('--variables', '-v', multiple=True,
               help='Output variable IDs. Repeat for multiple.')
+@click.option('--output-format', default='netcdf4', show_default=True,
+              type=click.Choice(['netcdf4', 'zarr', 'netcdf3']),
+              help='Results backend (netcdf3 for uncompressed legacy files).')
 def run(mode, **kwargs):
     """
     Execute an OSCAR simulation (Standard or Configured modes only).
@@ -48,5 +51,117 @@ def info(mode):
     """
     _info(mode)
 
+@main.command()
+@click.argument('manifest', type=click.Path(exists=True, dir_okay=False))
+@click.option('--max-workers', '-j', type=int,
+              help='Libraries processed concurrently (default: manifest, else one per CPU).')
+@click.option('--max-memory-gb', type=float,
+              help='Cap on the estimated memory of concurrent libraries.')
+@click.option('--dry-run', is_flag=True,
+              help='Only list the jobs and library groups.')
+def batch(manifest, **kwargs):
+    """
+    Run the job matrix of a YAML manifest (configured mode).
+    
+    Jobs sharing a library are grouped so that each library loads once.
+    """
+    from .run import batch as _batch
+    _batch(manifest, **kwargs)
+
+@main.command()
+@click.option('--host', default='127.0.0.1', show_default=True,
+              help='Interface to listen on (keep it local: there is no authentication).')
+@click.option('--port', '-p', default=8765, show_default=True, type=int,
+              help='TCP port.')
+@click.option('--max-libraries', default=4, show_default=True, type=int,
+              help='Configured libraries kept warm in memory.')
+@click.option('--preload', multiple=True,
+              help='Library to load at startup, as HIST/REGION (e.g. CMIP6/RCP_5reg). Repeat for multiple.')
+def serve(preload, **kwargs):
+    """
+    Start a resident local service answering run requests (HTTP/JSON).
+    
+    POST /run with {"scenario", "region", "hist_type", "variables", "overrides", "return"}.
+    """
+    _run(mode='serve', preload=[tuple(p.split('/', 1)) for p in preload], **kwargs)
+
+@main.group()
+def bench():
+    """
+    Performance benchmarks of the solver, workflows and input pipeline.
+    """
+
+@bench.command('run')
+@click.option('--preset', default='default', show_default=True,
+              type=click.Choice(['quick', 'default', 'full']),
+              help='Cases to run (full adds the whole standard workflow).')
+@click.option('--repeat', default=3, show_default=True, type=int,
+              help='Runs per case (best time is kept).')
+@click.option('--out', '-o', type=click.Path(dir_okay=False),
+              help='JSON file of the report.')
+@click.option('--select', '-k',
+              help='Only run cases whose name contains this string.')
+def bench_run(**kwargs):
+    """
+    Time the benchmark cases (wall time and peak RSS).
+    """
+    from ._bench.suite import main as _main
+    argv = ['run', '--preset', kwargs['preset'], '--repeat', str(kwargs['repeat'])]
+    argv += ['--out', kwargs['out']] if kwargs['out'] else []
+    argv += ['--select', kwargs['select']] if kwargs['select'] else []
+    raise SystemExit(_main(argv))
+
+@bench.command('compare')
+@click.argument('base', type=click.Path(exists=True, dir_okay=False))
+@click.argument('new', type=click.Path(exists=True, dir_okay=False))
+@click.option('--threshold', default=0.1, show_default=True, type=float,
+              help='Relative slowdown reported as a regression.')
+@click.option('--rss-threshold', default=0.1, show_default=True, type=float,
+              help='Relative peak RSS increase reported as a regression.')
+def bench_compare(base, new, threshold, rss_threshold):
+    """
+    Compare two benchmark reports (exit code 1 on time or memory regressions).
+    """
+    from ._bench.suite import main as _main
+    raise SystemExit(_main(['compare', base, new, '--threshold', str(threshold), '--rss-threshold', str(rss_threshold)]))
+
+@bench.command('pipeline')
+@click.option('--data-dir', type=click.Path(file_okay=False),
+              help='Existing synthetic data directory (default: made in a temporary folder).')
+@click.option('--n-iso', type=int, help='Number of countries of the synthetic data.')
+@click.option('--n-reg', type=int, help='Number of regions of the synthetic aggregation.')
+@click.option('--repeat', default=3, show_default=True, type=int,
+              help='Runs per stage (best time is kept).')
+@click.option('--out', '-o', type=click.Path(dir_okay=False),
+              help='JSON file of the report.')
+@click.option('--select', '-k',
+              help='Only run stages whose name contains this string.')
+def bench_pipeline(**kwargs):
+    """
+    Time the loading of parameters and drivers on a synthetic input_data tree.
+    """
+    from ._bench.pipeline import main as _main
+    argv = ['run', '--repeat', str(kwargs['repeat'])]
+    for opt in ['data_dir', 'n_iso', 'n_reg', 'out', 'select']:
+        argv += [f"--{opt.replace('_', '-')}", str(kwargs[opt])] if kwargs[opt] is not None else []
+    raise SystemExit(_main(argv))
+
+@main.command('build-library')
+@click.option('--region', '-r', required=True,
+              help='Library region name.')
+@click.option('--hist-type', default='CMIP6', show_default=True,
+              help='Historical dataset of the library.')
+@click.option('--overwrite', is_flag=True,
+              help='Rebuild existing Zarr stores.')
+def build_library(region, hist_type, overwrite):
+    """
+    Re-pack a configured library as chunked Zarr stores (requires 'zarr').
+    
+    Configured runs then read only the chunks they need.
+    """
+    from ._io._download import ensure_configured_library
+    from ._io._library import build_zarr_library
+    build_zarr_library(ensure_configured_library(hist_type, region), overwrite=overwrite)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
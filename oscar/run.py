@@ -52,8 +52,22 @@ def run(mode="standard", **kwargs):
         from ._workflows import customized_runs
         return customized_runs.run_customized(**kwargs)
 
+    if mode == "batch":
+        from ._workflows import batch_runs
+        return batch_runs.run_batch(**kwargs)
+
+    if mode == "serve":
+        from ._workflows import service
+        return service.serve(**kwargs)
+
     if mode == "advanced":
         from ._workflows import advanced_runs
         return advanced_runs.run_advanced(**kwargs)
         
-    raise ValueError(f"Unknown mode: {mode}")
\ No newline at end of file
+    raise ValueError(f"Unknown mode: {mode}")
+
+def batch(manifest, **kwargs):
+    """
+    Entry point for manifest-driven batch runs (see oscar._workflows.batch_runs).
+    """
+    return run(mode="batch", manifest=manifest, **kwargs)